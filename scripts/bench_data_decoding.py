@@ -0,0 +1,91 @@
+"""
+This script micro-benchmarks decoding of Conversational Analytics data results:
+the legacy per-cell proto-map + pandas path against the columnar decoder in
+data_agent_helper.handle_data_response.
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+# Add the project root to the Python path to allow for absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from google.cloud import geminidataanalytics
+
+from src.agents.data_agent_helper import handle_data_response
+
+FIELDS = [
+    ("claim_id", "STRING"),
+    ("patient_id", "STRING"),
+    ("medication_name", "STRING"),
+    ("insurance_plan", "STRING"),
+    ("approval_status", "STRING"),
+    ("copay_amount", "FLOAT64"),
+    ("quantity", "INT64"),
+    ("claim_date", "TIMESTAMP"),
+    ("service_date", "DATE"),
+]
+
+
+def build_data_message(num_rows: int) -> geminidataanalytics.DataMessage:
+    """Builds a DataMessage shaped like a pbm_claims result with num_rows rows."""
+    rows = []
+    for i in range(num_rows):
+        rows.append({
+            "claim_id": f"CLM-{i:06d}",
+            "patient_id": f"pat-{i % 500:03d}",
+            "medication_name": ["Atorvastatin", "Lisinopril", "Metformin", "Ozempic"][i % 4],
+            "insurance_plan": ["BlueCross Gold", "Aetna Silver", "Medicare Part D"][i % 3],
+            "approval_status": "Approved" if i % 5 else "Rejected",
+            "copay_amount": 10.0 + (i % 7),
+            "quantity": str(30 + i % 60),
+            "claim_date": str(1762585448.536530 + i),
+            "service_date": "2025-11-08",
+        })
+    schema = geminidataanalytics.Schema(fields=[geminidataanalytics.Field(name=name, type_=field_type) for name, field_type in FIELDS])
+    # proto-plus can't marshal a list of dicts into repeated Struct, so rows go onto the raw pb
+    result_pb = geminidataanalytics.DataResult.pb(geminidataanalytics.DataResult(schema=schema))
+    for row in rows:
+        result_pb.data.add().update(row)
+    return geminidataanalytics.DataMessage(result=geminidataanalytics.DataResult.wrap(result_pb))
+
+
+def legacy_handle_data_response(resp):
+    """The pre-columnar implementation, kept here as the benchmark baseline."""
+    import pandas as pd
+
+    fields = [field.name for field in resp.result.schema.fields]
+    d = {}
+    for el in resp.result.data:
+        for field in fields:
+            if field in d:
+                d[field].append(el[field])
+            else:
+                d[field] = [el[field]]
+    return {"data_retrieved": pd.DataFrame(d).to_dict()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark CA data result decoding.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 10000], help="Result sizes to benchmark.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repetitions per size (best is reported).")
+    args = parser.parse_args()
+
+    try:
+        import pandas  # noqa: F401
+        has_pandas = True
+    except ImportError:
+        has_pandas = False
+        print("pandas is not installed; skipping the legacy baseline.")
+
+    print(f"{'rows':>8} {'legacy ms':>12} {'columnar ms':>12} {'speedup':>8}")
+    for num_rows in args.rows:
+        message = build_data_message(num_rows)
+        columnar = min(timeit.repeat(lambda m=message: handle_data_response(m), number=1, repeat=args.repeat)) * 1000
+        if has_pandas:
+            legacy = min(timeit.repeat(lambda m=message: legacy_handle_data_response(m), number=1, repeat=args.repeat)) * 1000
+            print(f"{num_rows:>8} {legacy:>12.2f} {columnar:>12.2f} {legacy / columnar:>7.1f}x")
+        else:
+            print(f"{num_rows:>8} {'-':>12} {columnar:>12.2f} {'-':>8}")
@@ -0,0 +1,247 @@
+"""
+This script benchmarks the agent tree end to end without Google Cloud.
+
+The Conversational Analytics API is replaced by the local fake server in
+fake_ca_server.py and every LlmAgent gets a scripted model that calls its
+tools and then answers, so the measured time is the tools, callbacks,
+streaming and decoding of this repo plus the fake server's configured
+latencies. Each scenario runs a number of single-turn sessions at a fixed
+concurrency and reports throughput, p50/p95/p99 latency and memory.
+
+Scenarios:
+    patient, medication, pbm  one data-agent sub-agent and its CA tool
+    root                      root_agent fanning out to all three sub-agents
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import math
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
+# Add the project root to the Python path to allow for absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fake_ca_server import FakeDataChatServer, add_profile_arguments, profile_from_args
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+QUESTIONS = {
+    "patient": [
+        "How many encounters did each practitioner specialty handle?",
+        "List patients with a Condition event and their condition names.",
+        "Which medications were held or refused during administration?",
+    ],
+    "medication": [
+        "Which pharmacies have less than 20 units of Ozempic in stock?",
+        "What is the total stock of Atorvastatin by zip code?",
+        "Which medications are out of stock anywhere?",
+    ],
+    "pbm": [
+        "What is the approval rate per insurance plan?",
+        "Show the average copay for Metformin claims.",
+        "List rejected claims and their rejection reasons.",
+    ],
+}
+QUESTIONS["root"] = [
+    "For patients prescribed Ozempic, was it in stock nearby and were their claims approved?",
+    "Compare refused medication administrations with claim rejections for the same drugs.",
+]
+
+SCENARIOS = ["patient", "medication", "pbm", "root"]
+DATA_SUB_AGENTS = ["patient_encounters_agent", "medication_inventory_agent", "pbm_agent"]
+
+
+class ScriptedLlm(BaseLlm):
+    """A model that calls the agent's data tools (or data sub-agents) once, in parallel, then answers.
+
+    latency_s is added to every model call to stand in for Gemini.
+    """
+
+    latency_s: float = 0.0
+
+    async def generate_content_async(self, llm_request, stream: bool = False):
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+        last = llm_request.contents[-1]
+        if any(part.function_response for part in last.parts or []):
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text="Here is what the data shows.")]))
+            return
+        question = next((part.text for part in last.parts or [] if part.text), "")
+        calls = []
+        for name in llm_request.tools_dict:
+            if name.startswith("stateful_chat_"):
+                calls.append(types.FunctionCall(name=name, args={"user_input": question}))
+            elif name in DATA_SUB_AGENTS:
+                calls.append(types.FunctionCall(name=name, args={"request": question}))
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(function_call=call) for call in calls]))
+
+
+def load_agents(endpoint: str, llm_latency_s: float, keep_caches: bool) -> dict:
+    """Imports the agent tree against the fake endpoint and returns the scenario agents.
+
+    config_project reads CA_API_* from the environment when it is imported,
+    so they must be set before the first import of src.agents.
+    """
+    os.environ["CA_API_ENDPOINT"] = endpoint
+    os.environ["CA_API_INSECURE"] = "true"
+    from src.agents import agent, config_project
+
+    if not keep_caches:
+        config_project.NL_SQL_CACHE_ENABLED = False
+        config_project.SQL_RESULT_CACHE_ENABLED = False
+    scenario_agents = {
+        "patient": agent.patient_encounters_agent,
+        "medication": agent.medication_inventory_agent,
+        "pbm": agent.pbm_agent,
+        "root": agent.root_agent,
+    }
+    for llm_agent in scenario_agents.values():
+        llm_agent.model = ScriptedLlm(model="scripted", latency_s=llm_latency_s)
+    return scenario_agents
+
+
+def _tool_messages(response) -> list:
+    """Returns the messages of a function response: a data tool's result list, or a sub-agent's tool_response."""
+    result = response.get("result", response) if isinstance(response, dict) else response
+    if isinstance(result, str):
+        try:
+            result = json.loads(result)
+        except ValueError:
+            return []
+    if isinstance(result, dict):
+        return result.get("tool_response", [result])
+    return result if isinstance(result, list) else []
+
+
+def tool_error_status(event) -> str | None:
+    """Returns the first status other than success (e.g. error, unavailable) in the event's function responses.
+
+    Data tools report CA failures as a status message rather than raising, so a
+    turn can complete and still have failed.
+    """
+    for function_response in event.get_function_responses():
+        for message in _tool_messages(function_response.response):
+            status = message.get("status") if isinstance(message, dict) else None
+            if status and status != "success":
+                return status
+    return None
+
+
+def percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))] if ordered else float("nan")
+
+
+def rss_mb() -> float:
+    """Current resident set size, from /proc where available."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def run_scenario(name: str, root, requests: int, concurrency: int) -> dict:
+    runner = InMemoryRunner(agent=root, app_name=f"bench_{name}")
+    questions = QUESTIONS[name]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors = 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            session = await runner.session_service.create_session(app_name=runner.app_name, user_id=f"user-{i}")
+            message = types.Content(role="user", parts=[types.Part(text=questions[i % len(questions)])])
+            start = time.perf_counter()
+            status = None
+            try:
+                async for event in runner.run_async(user_id=session.user_id, session_id=session.id, new_message=message):
+                    status = status or tool_error_status(event)
+            except Exception as e:
+                errors += 1
+                print(f"  {name} request {i} failed: {e!r}")
+                return
+            if status:
+                errors += 1
+                print(f"  {name} request {i} failed: tool status {status}")
+                return
+            latencies.append(time.perf_counter() - start)
+
+    gc.collect()
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    return {
+        "scenario": name,
+        "requests": requests,
+        "errors": errors,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "rss_mb": rss_mb(),
+        "rss_delta_mb": rss_mb() - rss_before,
+    }
+
+
+async def main(args: argparse.Namespace, scenario_agents: dict):
+    results = []
+    for name in args.scenarios:
+        if args.warmup:
+            await run_scenario(name, scenario_agents[name], args.warmup, args.concurrency)
+        if args.tracemalloc:
+            tracemalloc.start()
+        result = await run_scenario(name, scenario_agents[name], args.requests, args.concurrency)
+        if args.tracemalloc:
+            result["peak_alloc_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+            tracemalloc.stop()
+        results.append(result)
+
+    header = f"{'scenario':<11} {'reqs':>5} {'errors':>6} {'req/s':>8} {'p50 s':>8} {'p95 s':>8} {'p99 s':>8} {'rss MB':>8} {'Δrss MB':>8}"
+    if args.tracemalloc:
+        header += f" {'peak alloc MB':>14}"
+    print(header)
+    for r in results:
+        line = (
+            f"{r['scenario']:<11} {r['requests']:>5} {r['errors']:>6} {r['throughput']:>8.2f} "
+            f"{r['p50']:>8.3f} {r['p95']:>8.3f} {r['p99']:>8.3f} {r['rss_mb']:>8.1f} {r['rss_delta_mb']:>8.1f}"
+        )
+        if args.tracemalloc:
+            line += f" {r['peak_alloc_mb']:>14.1f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the data-agent tools and root_agent against a fake CA server.")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--requests", type=int, default=50, help="Sessions per scenario, one question each.")
+    parser.add_argument("--concurrency", type=int, default=10, help="Sessions in flight at once.")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured sessions run before each scenario.")
+    parser.add_argument("--llm-latency-s", type=float, default=0.0, help="Delay added to every scripted model call.")
+    parser.add_argument("--tracemalloc", action="store_true", help="Also report peak Python allocations (slows the run).")
+    parser.add_argument("--endpoint", help="Use an already running fake server instead of starting one in-process.")
+    parser.add_argument("--keep-caches", action="store_true", help="Leave the NL-to-SQL and SQL result caches enabled.")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    server = None if args.endpoint else FakeDataChatServer(profile_from_args(args))
+    scenario_agents = load_agents(args.endpoint or server.start(), args.llm_latency_s, args.keep_caches)
+    from src.agents import ca_client_pool
+
+    try:
+        asyncio.run(main(args, scenario_agents))
+    finally:
+        ca_client_pool.shutdown()
+        if server:
+            print(f"fake server: {server.stats}")
+            server.stop()
@@ -0,0 +1,115 @@
+"""
+This script profiles how long importing the agent package takes and enforces a budget.
+
+It imports src.agents.agent in fresh interpreters with `python -X importtime`
+and reports the wall time and the slowest modules, by self and cumulative
+time. It exits non-zero when the median import time exceeds the budget or
+when a library that should load lazily on first use (BigQuery, pandas,
+geminidataanalytics, Cloud Logging) was imported, so it can gate CI and
+deploys:
+
+    python scripts/check_import_time.py --budget-s 1.8
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Libraries only needed once a request arrives; package import must not load them
+LAZY_MODULES = [
+    "google.cloud.bigquery",
+    "pandas",
+    "google.cloud.geminidataanalytics_v1",
+    "google.cloud.logging_v2",
+]
+
+DEFAULT_BUDGET_S = float(os.environ.get("IMPORT_TIME_BUDGET_S", "1.8"))
+
+_CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+
+def profile_import(module: str) -> tuple[dict, list[tuple[int, int, int, str]]]:
+    """Imports module in a fresh interpreter; returns its result and the (self_us, cumulative_us, depth, name) rows."""
+    env = {**os.environ, "LOG_LEVEL": "WARNING"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD.format(module=module, lazy=LAZY_MODULES)],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        sys.exit(f"Importing {module} failed:\n{result.stderr[-4000:]}")
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return json.loads(result.stdout.strip().splitlines()[-1]), rows
+
+
+def top_level_package(name: str) -> str:
+    """Groups google.* and src.* modules by their first three name parts, everything else by the first."""
+    parts = name.split(".")
+    return ".".join(parts[:3] if parts[0] in ("google", "src") else parts[:1])
+
+
+def print_report(rows: list[tuple[int, int, int, str]], top: int):
+    print(f"\nSlowest modules by self time (top {top}):")
+    for self_us, cumulative_us, _, name in sorted(rows, reverse=True)[:top]:
+        print(f"  {self_us / 1000:>8.1f} ms self {cumulative_us / 1000:>9.1f} ms cumulative  {name}")
+
+    by_package = defaultdict(int)
+    for self_us, _, _, name in rows:
+        by_package[top_level_package(name)] += self_us
+    print(f"\nSelf time by package (top {top}):")
+    for package, self_us in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"  {self_us / 1000:>8.1f} ms  {package}")
+
+    print("\nProject modules:")
+    for self_us, cumulative_us, _, name in rows:
+        if name.startswith("src.agents"):
+            print(f"  {self_us / 1000:>8.1f} ms self {cumulative_us / 1000:>9.1f} ms cumulative  {name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profile agent package import time and fail when it exceeds a budget.")
+    parser.add_argument("--module", default="src.agents.agent", help="Module to import.")
+    parser.add_argument("--budget-s", type=float, default=DEFAULT_BUDGET_S, help="Maximum median import time in seconds.")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh-interpreter imports to take the median of.")
+    parser.add_argument("--top", type=int, default=15, help="Rows per report section.")
+    args = parser.parse_args()
+
+    results = []
+    rows = []
+    for _ in range(args.runs):
+        result, rows = profile_import(args.module)
+        results.append(result)
+    median_s = statistics.median(r["seconds"] for r in results)
+    print_report(rows, args.top)
+
+    failures = []
+    loaded = sorted({m for r in results for m in r["loaded"]})
+    if loaded:
+        failures.append(f"imported libraries that must load lazily: {', '.join(loaded)}")
+    if median_s > args.budget_s:
+        failures.append(f"median import time {median_s:.3f}s exceeds the {args.budget_s:.3f}s budget")
+
+    print(f"\nimport {args.module}: median {median_s:.3f}s over {args.runs} run(s) "
+          f"(min {min(r['seconds'] for r in results):.3f}s, budget {args.budget_s:.3f}s)")
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+    print("OK")
@@ -0,0 +1,55 @@
+"""
+This script compiles each src/data/<domain> directory into a context bundle.
+
+A bundle is the domain's published Context (system instruction, table schemas,
+example queries) serialized as protobuf under src/data/bundles, named by the
+content hash of its source files. Compiling validates bigquery_data_context.json
+against the CREATE TABLE column lists in ddl_and_dml.sql, so a misspelled or
+dropped column fails here instead of when an agent is provisioned. Run it
+before deploying, or in CI with --check to fail on missing or stale bundles.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add the project root to the Python path to allow for absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agents import context_bundles
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile and validate data agent context bundles.")
+    parser.add_argument("--domains", nargs="+", default=context_bundles.domains(), help="Directories under src/data to compile.")
+    parser.add_argument("--check", action="store_true", help="Only report missing or stale bundles; exit 1 if there are any.")
+    parser.add_argument("--strict", action="store_true", help="Treat validation warnings as errors.")
+    args = parser.parse_args()
+
+    failed = False
+    for domain in args.domains:
+        content_hash = context_bundles.source_hash(domain)
+        path = context_bundles.bundle_path(domain, content_hash)
+        if args.check:
+            up_to_date = path.exists()
+            failed |= not up_to_date
+            print(f"{domain}: {'up to date' if up_to_date else 'missing or stale'} ({path.name})")
+            continue
+        start = time.perf_counter()
+        try:
+            info = context_bundles.compile_bundle(domain)
+        except context_bundles.ContextValidationError as e:
+            failed = True
+            print(f"{domain}: FAILED")
+            for error in e.errors:
+                print(f"  error: {error}")
+            continue
+        compile_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        context_bundles.geminidataanalytics.Context.deserialize(info.path.read_bytes())
+        load_us = (time.perf_counter() - start) * 1e6
+        print(f"{domain}: {info.path.name} {info.size_bytes} bytes, compiled in {compile_ms:.1f} ms, loads in {load_us:.0f} us")
+        for warning in info.warnings:
+            print(f"  warning: {warning}")
+        failed |= args.strict and bool(info.warnings)
+    sys.exit(1 if failed else 0)
@@ -1,5 +1,9 @@
 """
-This script creates a BigQuery Data Agent using the Conversational Analytics API.
+This script creates BigQuery Data Agents using the Conversational Analytics API.
+
+Agents are created concurrently and an agent that already exists counts as
+success, so the script can be re-run safely. For multi-project rollouts and
+context updates use the full CLI: python -m src.agents.ca_api_helper --help
 """
 
 import argparse
@@ -9,19 +13,22 @@ import sys
 # Add the project root to the Python path to allow for absolute imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.api.ca_api_helper import create_bigquery_ca_data_agent
+from src.agents.ca_api_helper import provision_data_agents
 from src.agents import config_project
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Create a BigQuery Data Agent.")
-    parser.add_argument("--agent_id", type=str, help="The ID or config variable name of the agent to create.")
+    parser = argparse.ArgumentParser(description="Create BigQuery Data Agents.")
+    parser.add_argument("--agent_id", type=str, nargs="+", help="IDs or config variable names of the agents to create.")
+    parser.add_argument("--update", action="store_true", help="Replace the published context of agents that already exist.")
     args = parser.parse_args()
 
-    agent_id_str = args.agent_id if args.agent_id else "PATIENT_ANALYTICS_AGENT_ID"
+    agent_id_strs = args.agent_id if args.agent_id else ["PATIENT_ANALYTICS_AGENT_ID"]
 
-    # Check if the provided agent_id is a variable name in config_project
-    agent_id = getattr(config_project, agent_id_str) if hasattr(config_project, agent_id_str) else agent_id_str
+    # Check if each provided agent_id is a variable name in config_project
+    agent_ids = [getattr(config_project, agent_id_str, agent_id_str) for agent_id_str in agent_id_strs]
 
-    print(f"Creating BigQuery Data Agent with ID: {agent_id}")
-    agent = create_bigquery_ca_data_agent(agent_id)
-    print(f"Successfully created BigQuery Data Agent: {agent.name}")
+    print(f"Creating BigQuery Data Agents with IDs: {', '.join(agent_ids)}")
+    results = provision_data_agents(agent_ids, update_existing=args.update)
+    for result in results:
+        print(f"- {result.data_agent_id}: {result.status}{f' ({result.error})' if result.error else ''}")
+    sys.exit(0 if all(result.ok for result in results) else 1)
@@ -0,0 +1,406 @@
+"""
+This script runs a local stand-in for the Conversational Analytics DataChatService.
+
+It serves CreateConversation and streaming Chat over plaintext gRPC, plus
+DataAgentService Get/Create/UpdateDataAgent (operations complete at once) for
+warm-up and provisioning runs, and answers
+every question with the message sequence the real API produces: thinking text,
+schema query and result, data query, generated SQL, data result, chart query
+and vega-lite chart, and a final answer. Tables and columns come from the
+domain's bigquery_data_context.json and ddl_and_dml.sql under src/data, so
+result rows have the real schema. Latencies, result sizes and error rates are
+configurable, which makes it usable for benchmarks and load tests.
+
+Point the agents at it by setting, before src.agents is imported:
+    CA_API_ENDPOINT=127.0.0.1:<port> CA_API_INSECURE=true
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import random
+import re
+import threading
+from dataclasses import dataclass, fields
+from pathlib import Path
+
+import grpc
+from google.cloud import geminidataanalytics
+from google.longrunning import operations_pb2
+
+SERVICE_NAME = "google.cloud.geminidataanalytics.v1.DataChatService"
+AGENT_SERVICE_NAME = "google.cloud.geminidataanalytics.v1.DataAgentService"
+DATA_DIR = Path(__file__).resolve().parent.parent / "src" / "data"
+
+_COLUMN_RE = re.compile(r"^\s*(\w+)\s+(STRING|INT64|FLOAT64|NUMERIC|BOOL|DATE|DATETIME|TIMESTAMP)\b", re.IGNORECASE)
+
+
+@dataclass
+class FakeServerProfile:
+    """Latency, size and error settings for the fake server. Delays are in seconds."""
+
+    create_latency_s: float = 0.05
+    first_message_s: float = 0.5
+    schema_s: float = 0.8
+    sql_s: float = 1.5
+    data_s: float = 1.0
+    chart_s: float = 1.0
+    message_gap_s: float = 0.01
+    jitter: float = 0.2
+    rows: int = 50
+    text_messages: int = 3
+    chart: bool = True
+    create_error_rate: float = 0.0
+    chat_error_rate: float = 0.0
+    stream_error_rate: float = 0.0
+    error_code: str = "UNAVAILABLE"
+    seed: int | None = None
+
+
+def parse_ddl_columns(ddl_path: Path) -> list[tuple[str, str]]:
+    """Returns (column, type) pairs of the CREATE TABLE statement in a domain's ddl_and_dml.sql."""
+    columns = []
+    in_table = False
+    for line in ddl_path.read_text().splitlines():
+        if line.lstrip().upper().startswith("CREATE TABLE"):
+            in_table = True
+            continue
+        if in_table:
+            if line.strip().startswith(");"):
+                break
+            match = _COLUMN_RE.match(line)
+            if match:
+                columns.append((match.group(1), match.group(2).upper()))
+    return columns
+
+
+def _domain_tables() -> dict[str, list[str]]:
+    """Maps each src/data domain directory to the table IDs in its bigquery_data_context.json."""
+    tables = {}
+    for context_path in sorted(DATA_DIR.glob("*/bigquery_data_context.json")):
+        tables[context_path.parent.name] = [t["table_id"] for t in json.loads(context_path.read_text())["tables"]]
+    return tables
+
+
+_DOMAIN_TABLES = _domain_tables()
+
+
+def _cell(column: str, column_type: str, i: int):
+    if column_type in ("INT64", "NUMERIC"):
+        return str(i * 7 % 1000)
+    if column_type == "FLOAT64":
+        return round(5.0 + (i * 13 % 400) / 4, 2)
+    if column_type == "BOOL":
+        return i % 3 != 0
+    if column_type == "DATE":
+        return f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}"
+    if column_type in ("TIMESTAMP", "DATETIME"):
+        return str(1762585448.53653 + i * 3600)
+    return f"{column}-{i % 97:03d}"
+
+
+class _Domain:
+    """Pre-built messages for one data agent; only the question-bearing ones are built per call."""
+
+    def __init__(self, config_dir: str, profile: FakeServerProfile):
+        context = json.loads((DATA_DIR / config_dir / "bigquery_data_context.json").read_text())
+        table = context["tables"][0]
+        self.table = f"{table['project_id']}.{table['dataset_id']}.{table['table_id']}"
+        self.datasources = [
+            geminidataanalytics.Datasource(
+                bigquery_table_reference=geminidataanalytics.BigQueryTableReference(
+                    project_id=t["project_id"], dataset_id=t["dataset_id"], table_id=t["table_id"],
+                )
+            )
+            for t in context["tables"]
+        ]
+        self.columns = parse_ddl_columns(DATA_DIR / config_dir / "ddl_and_dml.sql")
+        rows = [{name: _cell(name, column_type, i) for name, column_type in self.columns} for i in range(profile.rows)]
+
+        self.schema_result = _system_message(schema=geminidataanalytics.SchemaMessage(
+            result=geminidataanalytics.SchemaResult(datasources=self.datasources)
+        ))
+        self.generated_sql = _system_message(data=geminidataanalytics.DataMessage(
+            generated_sql=f"SELECT {', '.join(name for name, _ in self.columns)}\nFROM `{self.table}`\nLIMIT {profile.rows}"
+        ))
+        schema = geminidataanalytics.Schema(fields=[
+            geminidataanalytics.Field(name=name, type_=column_type) for name, column_type in self.columns
+        ])
+        # proto-plus can't marshal a list of dicts into repeated Struct, so rows go onto the raw pb
+        result_pb = geminidataanalytics.DataResult.pb(geminidataanalytics.DataResult(name="query_1", schema=schema))
+        for row in rows:
+            result_pb.data.add().update(row)
+        self.data_result = _system_message(data=geminidataanalytics.DataMessage(
+            result=geminidataanalytics.DataResult.wrap(result_pb)
+        ))
+
+        x_field = next((n for n, t in self.columns if t == "STRING"), self.columns[0][0])
+        y_field = next((n for n, t in self.columns if t in ("INT64", "FLOAT64", "NUMERIC")), x_field)
+        chart_pb = geminidataanalytics.ChartResult.pb(geminidataanalytics.ChartResult())
+        chart_pb.vega_config.update({
+            "$schema": "https://vega.github.io/schema/vega-lite/v5.json",
+            "title": f"{y_field} by {x_field}",
+            "mark": {"type": "bar", "tooltip": True},
+            "encoding": {
+                "x": {"field": x_field, "type": "nominal", "sort": "-y"},
+                "y": {"field": y_field, "type": "quantitative", "aggregate": "sum"},
+            },
+            "data": {"values": [{x_field: row[x_field], y_field: row[y_field]} for row in rows]},
+        })
+        self.chart_result = _system_message(chart=geminidataanalytics.ChartMessage(
+            result=geminidataanalytics.ChartResult.wrap(chart_pb)
+        ))
+
+
+def _system_message(**part) -> geminidataanalytics.Message:
+    return geminidataanalytics.Message(system_message=geminidataanalytics.SystemMessage(**part))
+
+
+def _text(text: str, text_type=geminidataanalytics.TextMessage.TextType.PROGRESS) -> geminidataanalytics.Message:
+    return _system_message(text=geminidataanalytics.TextMessage(parts=[text], text_type=text_type))
+
+
+def _apply_update_mask(target, source, paths):
+    """Copies the fields named by an UpdateDataAgent field mask from source to target."""
+    for path in paths:
+        *parents, leaf = path.split(".")
+        target_pb, source_pb = type(target).pb(target), type(source).pb(source)
+        for parent in parents:
+            target_pb, source_pb = getattr(target_pb, parent), getattr(source_pb, parent)
+        value = getattr(target_pb, leaf)
+        if hasattr(value, "extend"):
+            del value[:]
+            value.extend(getattr(source_pb, leaf))
+        elif hasattr(value, "CopyFrom"):
+            value.CopyFrom(getattr(source_pb, leaf))
+        else:
+            setattr(target_pb, leaf, getattr(source_pb, leaf))
+
+
+class FakeDataChatServer:
+    """In-process fake DataChatService on its own event loop thread."""
+
+    def __init__(self, profile: FakeServerProfile | None = None, host: str = "127.0.0.1", port: int = 0):
+        self.profile = profile or FakeServerProfile()
+        self.host = host
+        self.port = port
+        self._random = random.Random(self.profile.seed)
+        self._domains: dict[str, _Domain] = {}
+        self._conversations: dict[str, str] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._server = None
+        self._stopped: asyncio.Event | None = None
+        self._thread: threading.Thread | None = None
+        self._ready = threading.Event()
+        self._data_agents: dict[str, geminidataanalytics.DataAgent] = {}
+        self.stats = {"agent_lookups": 0, "agent_writes": 0, "conversations": 0, "chats": 0, "messages": 0, "errors": 0, "active_streams": 0}
+
+    @property
+    def endpoint(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    # ------------------------------------------------------------------
+    # Behaviour
+    # ------------------------------------------------------------------
+
+    def _domain(self, agent_name: str) -> _Domain:
+        # Data agent IDs start with their table name, e.g. pbm_claims-agent-6
+        agent_id = agent_name.rsplit("/", 1)[-1]
+        config_dir = next((d for d, tables in _DOMAIN_TABLES.items() if any(agent_id.startswith(t) for t in tables)), None)
+        config_dir = config_dir or next(iter(_DOMAIN_TABLES))
+        if config_dir not in self._domains:
+            self._domains[config_dir] = _Domain(config_dir, self.profile)
+        return self._domains[config_dir]
+
+    async def _sleep(self, seconds: float):
+        if seconds > 0:
+            await asyncio.sleep(seconds * (1 + self._random.uniform(-self.profile.jitter, self.profile.jitter)))
+
+    async def _maybe_fail(self, context, rate: float, where: str):
+        if rate and self._random.random() < rate:
+            self.stats["errors"] += 1
+            await context.abort(grpc.StatusCode[self.profile.error_code], f"fake {where} failure")
+
+    async def get_data_agent(self, request, context):
+        await self._sleep(self.profile.create_latency_s)
+        self.stats["agent_lookups"] += 1
+        # Agents never provisioned here are reported as existing so warm-up checks pass
+        return self._data_agents.get(request.name) or geminidataanalytics.DataAgent(name=request.name)
+
+    def _done_operation(self, data_agent: geminidataanalytics.DataAgent) -> operations_pb2.Operation:
+        operation = operations_pb2.Operation(name=f"{data_agent.name}/operations/fake", done=True)
+        operation.response.Pack(geminidataanalytics.DataAgent.pb(data_agent))
+        return operation
+
+    async def create_data_agent(self, request, context):
+        await self._sleep(self.profile.create_latency_s)
+        await self._maybe_fail(context, self.profile.create_error_rate, "CreateDataAgent")
+        name = f"{request.parent}/dataAgents/{request.data_agent_id}"
+        if name in self._data_agents:
+            await context.abort(grpc.StatusCode.ALREADY_EXISTS, f"{name} already exists")
+        data_agent = geminidataanalytics.DataAgent(request.data_agent, name=name)
+        self._data_agents[name] = data_agent
+        self.stats["agent_writes"] += 1
+        return self._done_operation(data_agent)
+
+    async def update_data_agent(self, request, context):
+        await self._sleep(self.profile.create_latency_s)
+        name = request.data_agent.name
+        if name not in self._data_agents:
+            await context.abort(grpc.StatusCode.NOT_FOUND, f"{name} not found")
+        if request.update_mask.paths:
+            _apply_update_mask(self._data_agents[name], request.data_agent, request.update_mask.paths)
+        else:
+            self._data_agents[name] = request.data_agent
+        self.stats["agent_writes"] += 1
+        return self._done_operation(self._data_agents[name])
+
+    async def create_conversation(self, request, context):
+        await self._sleep(self.profile.create_latency_s)
+        await self._maybe_fail(context, self.profile.create_error_rate, "CreateConversation")
+        name = request.conversation.name or f"{request.parent}/conversations/{request.conversation_id}"
+        if name in self._conversations:
+            await context.abort(grpc.StatusCode.ALREADY_EXISTS, f"{name} already exists")
+        self._conversations[name] = request.conversation.agents[0] if request.conversation.agents else ""
+        self.stats["conversations"] += 1
+        return geminidataanalytics.Conversation(name=name, agents=request.conversation.agents)
+
+    async def chat(self, request, context):
+        self.stats["chats"] += 1
+        self.stats["active_streams"] += 1
+        try:
+            async for message in self._chat_messages(request, context):
+                self.stats["messages"] += 1
+                yield message
+        finally:
+            self.stats["active_streams"] -= 1
+
+    async def _chat_messages(self, request, context):
+        profile = self.profile
+        reference = request.conversation_reference
+        agent_name = reference.data_agent_context.data_agent or self._conversations.get(reference.conversation, "")
+        domain = self._domain(agent_name)
+        question = request.messages[-1].user_message.text if request.messages else ""
+
+        await self._sleep(profile.first_message_s)
+        await self._maybe_fail(context, profile.chat_error_rate, "Chat")
+        thinking = max(profile.text_messages - 1, 0)
+        for i in range(thinking):
+            yield _text(f"Step {i + 1}: working out which data answers the question.", geminidataanalytics.TextMessage.TextType.THOUGHT)
+            await self._sleep(profile.message_gap_s)
+        yield _system_message(schema=geminidataanalytics.SchemaMessage(query=geminidataanalytics.SchemaQuery(question=question)))
+        await self._sleep(profile.schema_s)
+        yield domain.schema_result
+        await self._maybe_fail(context, profile.stream_error_rate, "Chat stream")
+        yield _system_message(data=geminidataanalytics.DataMessage(query=geminidataanalytics.DataQuery(
+            name="query_1", question=question, datasources=domain.datasources,
+        )))
+        await self._sleep(profile.sql_s)
+        yield domain.generated_sql
+        await self._sleep(profile.data_s)
+        yield domain.data_result
+        if profile.chart:
+            yield _system_message(chart=geminidataanalytics.ChartMessage(query=geminidataanalytics.ChartQuery(
+                instructions=f"Bar chart for: {question}", data_result_name="query_1",
+            )))
+            await self._sleep(profile.chart_s)
+            yield domain.chart_result
+        if profile.text_messages:
+            await self._sleep(profile.message_gap_s)
+            yield _text(f"Found {profile.rows} rows in {domain.table}.", geminidataanalytics.TextMessage.TextType.FINAL_RESPONSE)
+
+    # ------------------------------------------------------------------
+    # Server lifecycle
+    # ------------------------------------------------------------------
+
+    def _handlers(self):
+        agent_handler = grpc.method_handlers_generic_handler(AGENT_SERVICE_NAME, {
+            "GetDataAgent": grpc.unary_unary_rpc_method_handler(
+                self.get_data_agent,
+                request_deserializer=geminidataanalytics.GetDataAgentRequest.deserialize,
+                response_serializer=geminidataanalytics.DataAgent.serialize,
+            ),
+            "CreateDataAgent": grpc.unary_unary_rpc_method_handler(
+                self.create_data_agent,
+                request_deserializer=geminidataanalytics.CreateDataAgentRequest.deserialize,
+                response_serializer=operations_pb2.Operation.SerializeToString,
+            ),
+            "UpdateDataAgent": grpc.unary_unary_rpc_method_handler(
+                self.update_data_agent,
+                request_deserializer=geminidataanalytics.UpdateDataAgentRequest.deserialize,
+                response_serializer=operations_pb2.Operation.SerializeToString,
+            ),
+        })
+        chat_handler = grpc.method_handlers_generic_handler(SERVICE_NAME, {
+            "CreateConversation": grpc.unary_unary_rpc_method_handler(
+                self.create_conversation,
+                request_deserializer=geminidataanalytics.CreateConversationRequest.deserialize,
+                response_serializer=geminidataanalytics.Conversation.serialize,
+            ),
+            "Chat": grpc.unary_stream_rpc_method_handler(
+                self.chat,
+                request_deserializer=geminidataanalytics.ChatRequest.deserialize,
+                response_serializer=geminidataanalytics.Message.serialize,
+            ),
+        })
+        return agent_handler, chat_handler
+
+    async def serve(self):
+        """Runs the server on the current event loop until it is stopped."""
+        self._loop = asyncio.get_running_loop()
+        self._server = grpc.aio.server(options=[("grpc.max_send_message_length", -1)])
+        self._server.add_generic_rpc_handlers(self._handlers())
+        self.port = self._server.add_insecure_port(self.endpoint)
+        self._stopped = asyncio.Event()
+        await self._server.start()
+        self._ready.set()
+        # Returning cancels whatever is left on the loop, so wait until stop() has finished, not just for termination
+        await self._stopped.wait()
+
+    async def _stop(self, grace_s: float):
+        await self._server.stop(grace_s)
+        self._stopped.set()
+
+    def start(self) -> str:
+        """Starts the server on a background thread and returns its endpoint."""
+        self._thread = threading.Thread(target=lambda: asyncio.run(self.serve()), name="fake-ca-server", daemon=True)
+        self._thread.start()
+        if not self._ready.wait(10):
+            raise RuntimeError("Fake CA server did not start within 10s")
+        return self.endpoint
+
+    def stop(self, grace_s: float = 1.0):
+        if self._loop and self._server:
+            asyncio.run_coroutine_threadsafe(self._stop(grace_s), self._loop).result()
+        if self._thread:
+            self._thread.join(grace_s + 5)
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser):
+    """Adds a --<field> option for every FakeServerProfile setting."""
+    for field in fields(FakeServerProfile):
+        option = f"--{field.name.replace('_', '-')}"
+        if field.type in (bool, "bool"):
+            parser.add_argument(option, type=lambda v: v.lower() in ("1", "true", "yes"), default=field.default)
+        elif field.name == "seed":
+            parser.add_argument(option, type=int, default=None)
+        else:
+            parser.add_argument(option, type=type(field.default), default=field.default)
+
+
+def profile_from_args(args: argparse.Namespace) -> FakeServerProfile:
+    return FakeServerProfile(**{field.name: getattr(args, field.name) for field in fields(FakeServerProfile)})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local fake Conversational Analytics DataChatService.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=50051)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    server = FakeDataChatServer(profile_from_args(args), host=args.host, port=args.port)
+    print(f"Fake DataChatService listening on {args.host}:{args.port}")
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(server.serve())
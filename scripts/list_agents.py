@@ -8,11 +8,12 @@ import sys
 # Add the project root to the Python path to allow for absolute imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.api.ca_api_helper import list_data_agents
+from src.agents.ca_api_helper import list_data_agents
 
 if __name__ == "__main__":
     print("Listing Data Analytics Agents...")
-    agents = list_data_agents()
+    # list_data_agents returns a pager, which is truthy even when empty
+    agents = list(list_data_agents())
     if not agents:
         print("No Data Analytics Agents found.")
     else:
@@ -0,0 +1,299 @@
+"""
+This script load-tests root_agent with many concurrent ADK sessions.
+
+Each virtual user opens a session, asks --turns questions from the question
+mix one after another, and starts over with a new session. The models are
+scripted (bench_end_to_end.ScriptedLlm, with --llm-latency-s per call) and
+the Conversational Analytics API is the fake server from fake_ca_server.py,
+run as a separate process so its CPU use doesn't skew the measurements.
+
+Concurrency ramps through --users, holding each level for --stage-s seconds.
+Every --sample-s the script records throughput, latency, event-loop lag,
+thread count and RSS; the per-stage summary marks where throughput stops
+growing while latency climbs. --slow-callback-s turns on asyncio debug mode
+and counts callbacks that blocked the loop for longer, by source location,
+to show whether blocking calls cause the saturation.
+"""
+
+import argparse
+import asyncio
+import csv
+import itertools
+import logging
+import os
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+# Add the project root to the Python path to allow for absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bench_end_to_end import QUESTIONS, load_agents, percentile, rss_mb, tool_error_status
+from fake_ca_server import FakeServerProfile, add_profile_arguments
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+QUESTION_MIX = [q for questions in QUESTIONS.values() for q in questions]
+
+
+@dataclass
+class Sample:
+    elapsed_s: float
+    users: int
+    completed: int
+    errors: int
+    throughput: float
+    p50_s: float
+    p95_s: float
+    p99_s: float
+    loop_lag_max_ms: float
+    loop_lag_p99_ms: float
+    threads: int
+    rss_mb: float
+
+
+@dataclass
+class Window:
+    """Turns finished and loop lag observed since the last sample."""
+
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    lags: list[float] = field(default_factory=list)
+
+
+class SlowCallbackCounter(logging.Handler):
+    """Counts asyncio debug-mode "Executing <handle> took N seconds" warnings by callback."""
+
+    _PATTERN = re.compile(r"Executing (.*) took ([\d.]+) seconds")
+    _CORO = re.compile(r"coro=<([\w.<>]+)\(\) running at ([^>\s]+)")
+
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.counts: Counter = Counter()
+        self.seconds: Counter = Counter()
+
+    def emit(self, record: logging.LogRecord):
+        match = self._PATTERN.search(record.getMessage())
+        if match:
+            # Key by coroutine and the line it was running at, not by task name or address
+            coro = self._CORO.search(match.group(1))
+            key = f"{coro.group(1)} at {coro.group(2)}" if coro else re.sub(r" at 0x[0-9a-f]+", "", match.group(1))[:160]
+            self.counts[key] += 1
+            self.seconds[key] += float(match.group(2))
+
+
+def start_fake_server(args: argparse.Namespace) -> tuple[subprocess.Popen, str]:
+    """Starts fake_ca_server.py in a subprocess with the profile options and waits for its port."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    command = [sys.executable, os.path.join(os.path.dirname(__file__), "fake_ca_server.py"), "--port", str(port)]
+    for name in FakeServerProfile.__dataclass_fields__:
+        value = getattr(args, name)
+        if value is not None:
+            command += [f"--{name.replace('_', '-')}", str(value)]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        with socket.socket() as s:
+            if s.connect_ex(("127.0.0.1", port)) == 0:
+                return process, f"127.0.0.1:{port}"
+        if process.poll() is not None:
+            sys.exit("Fake CA server exited during startup")
+        time.sleep(0.1)
+    process.kill()
+    sys.exit("Fake CA server did not start within 30s")
+
+
+async def measure_loop_lag(window: Window, interval_s: float, stop: asyncio.Event):
+    """Records how late a sleep(interval_s) wakes up; a blocked loop shows up as lag."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval_s
+        await asyncio.sleep(interval_s)
+        window.lags.append(max(0.0, loop.time() - expected))
+
+
+async def virtual_user(runner: InMemoryRunner, user: int, turns: int, window: Window, stop: asyncio.Event):
+    i = user
+    while not stop.is_set():
+        session = await runner.session_service.create_session(app_name=runner.app_name, user_id=f"load-{user}")
+        for _ in range(turns):
+            if stop.is_set():
+                return
+            message = types.Content(role="user", parts=[types.Part(text=QUESTION_MIX[i % len(QUESTION_MIX)])])
+            i += 1
+            start = time.perf_counter()
+            status = None
+            try:
+                async for event in runner.run_async(user_id=session.user_id, session_id=session.id, new_message=message):
+                    status = status or tool_error_status(event)
+            except Exception as e:
+                window.errors += 1
+                logging.getLogger(__name__).debug(f"turn failed: {e!r}")
+                continue
+            if status:
+                window.errors += 1
+                logging.getLogger(__name__).debug(f"turn failed: tool status {status}")
+                continue
+            window.latencies.append(time.perf_counter() - start)
+
+
+async def run_load(args: argparse.Namespace, root_agent) -> tuple[list[Sample], list[dict]]:
+    runner = InMemoryRunner(agent=root_agent, app_name="load_test")
+    window = Window()
+    samples: list[Sample] = []
+    stages: list[dict] = []
+    stop_all = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(window, args.lag_probe_s, stop_all))
+    users: list[tuple[asyncio.Task, asyncio.Event]] = []
+    began = time.perf_counter()
+
+    for level in args.users:
+        while len(users) < level:
+            stop = asyncio.Event()
+            users.append((asyncio.create_task(virtual_user(runner, len(users), args.turns, window, stop)), stop))
+        stage_latencies: list[float] = []
+        stage_lags: list[float] = []
+        stage_errors = 0
+        stage_start = time.perf_counter()
+        while time.perf_counter() - stage_start < args.stage_s:
+            await asyncio.sleep(args.sample_s)
+            latencies, lags, errors = window.latencies, window.lags, window.errors
+            window.latencies, window.lags, window.errors = [], [], 0
+            stage_latencies += latencies
+            stage_lags += lags
+            stage_errors += errors
+            sample = Sample(
+                elapsed_s=round(time.perf_counter() - began, 1),
+                users=level,
+                completed=len(latencies),
+                errors=errors,
+                throughput=len(latencies) / args.sample_s,
+                p50_s=percentile(latencies, 0.50),
+                p95_s=percentile(latencies, 0.95),
+                p99_s=percentile(latencies, 0.99),
+                loop_lag_max_ms=max(lags, default=0.0) * 1000,
+                loop_lag_p99_ms=percentile(lags, 0.99) * 1000 if lags else 0.0,
+                threads=threading.active_count(),
+                rss_mb=rss_mb(),
+            )
+            samples.append(sample)
+            if args.verbose:
+                print(
+                    f"  t={sample.elapsed_s:>6.1f}s users={level:<4} turns/s={sample.throughput:>6.2f} "
+                    f"p95={sample.p95_s:>6.2f}s lag_max={sample.loop_lag_max_ms:>7.1f}ms "
+                    f"threads={sample.threads:<4} rss={sample.rss_mb:.0f}MB"
+                )
+        elapsed = time.perf_counter() - stage_start
+        stages.append({
+            "users": level,
+            "turns": len(stage_latencies),
+            "errors": stage_errors,
+            "throughput": len(stage_latencies) / elapsed,
+            "p50": percentile(stage_latencies, 0.50),
+            "p95": percentile(stage_latencies, 0.95),
+            "p99": percentile(stage_latencies, 0.99),
+            "lag_p99_ms": percentile(stage_lags, 0.99) * 1000 if stage_lags else 0.0,
+            "lag_max_ms": max(stage_lags, default=0.0) * 1000,
+            "threads": threading.active_count(),
+            "rss_mb": rss_mb(),
+        })
+
+    stop_all.set()
+    for _, stop in users:
+        stop.set()
+    # Let in-flight turns finish rather than cancelling them mid-stream
+    await asyncio.wait([task for task, _ in users] + [lag_task], timeout=args.drain_s)
+    for task, _ in users:
+        task.cancel()
+    return samples, stages
+
+
+def saturation_point(stages: list[dict]) -> dict | None:
+    """Returns the first stage where more users bought <10% more throughput while p95 grew by >50%."""
+    for previous, stage in itertools.pairwise(stages):
+        if previous["throughput"] and stage["throughput"] < previous["throughput"] * 1.1 and stage["p95"] > previous["p95"] * 1.5:
+            return stage
+    return None
+
+
+def print_report(stages: list[dict], slow_callbacks: SlowCallbackCounter | None):
+    print(f"{'users':>6} {'turns':>6} {'errors':>6} {'turns/s':>8} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} "
+          f"{'lag p99 ms':>10} {'lag max ms':>10} {'threads':>7} {'rss MB':>7}")
+    for s in stages:
+        print(f"{s['users']:>6} {s['turns']:>6} {s['errors']:>6} {s['throughput']:>8.2f} {s['p50']:>7.2f} {s['p95']:>7.2f} "
+              f"{s['p99']:>7.2f} {s['lag_p99_ms']:>10.1f} {s['lag_max_ms']:>10.1f} {s['threads']:>7} {s['rss_mb']:>7.0f}")
+    saturated = saturation_point(stages)
+    if saturated:
+        print(f"\nThroughput saturates around {saturated['users']} concurrent users "
+              f"({saturated['throughput']:.2f} turns/s, p95 {saturated['p95']:.2f}s).")
+    else:
+        print("\nNo saturation within the tested concurrency range.")
+    if slow_callbacks is not None:
+        print("\nCallbacks that blocked the event loop (asyncio debug mode, top 10 by total time):")
+        for key, seconds in slow_callbacks.seconds.most_common(10):
+            print(f"  {seconds:>8.2f}s {slow_callbacks.counts[key]:>6}x  {key}")
+        if not slow_callbacks.counts:
+            print("  none")
+
+
+def write_csv(path: str, samples: list[Sample]):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(Sample.__dataclass_fields__)
+        for sample in samples:
+            writer.writerow(vars(sample).values())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ramp concurrent ADK sessions against root_agent with stubbed LLM and CA backends.")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 5, 10, 25, 50, 100], help="Concurrency levels to ramp through.")
+    parser.add_argument("--stage-s", type=float, default=30.0, help="Seconds to hold each concurrency level.")
+    parser.add_argument("--sample-s", type=float, default=5.0, help="Seconds between samples.")
+    parser.add_argument("--turns", type=int, default=3, help="Questions per session before a user starts a new one.")
+    parser.add_argument("--llm-latency-s", type=float, default=0.5, help="Delay added to every scripted model call.")
+    parser.add_argument("--lag-probe-s", type=float, default=0.05, help="Interval of the event-loop lag probe.")
+    parser.add_argument("--slow-callback-s", type=float, help="Enable asyncio debug mode and report callbacks slower than this.")
+    parser.add_argument("--drain-s", type=float, default=30.0, help="How long in-flight turns may finish after the last stage.")
+    parser.add_argument("--endpoint", help="Use an already running fake server instead of starting one.")
+    parser.add_argument("--keep-caches", action="store_true", help="Leave the NL-to-SQL and SQL result caches enabled.")
+    parser.add_argument("--csv", help="Write the per-sample time series to this file.")
+    parser.add_argument("--verbose", action="store_true", help="Print every sample as it is taken.")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    server = None
+    endpoint = args.endpoint
+    if not endpoint:
+        server, endpoint = start_fake_server(args)
+    root_agent = load_agents(endpoint, args.llm_latency_s, args.keep_caches)["root"]
+    from src.agents import ca_client_pool
+
+    slow_callbacks = None
+    if args.slow_callback_s:
+        slow_callbacks = SlowCallbackCounter()
+        logging.getLogger("asyncio").addHandler(slow_callbacks)
+
+    async def main():
+        if args.slow_callback_s:
+            loop = asyncio.get_running_loop()
+            loop.set_debug(True)
+            loop.slow_callback_duration = args.slow_callback_s
+        return await run_load(args, root_agent)
+
+    try:
+        samples, stages = asyncio.run(main())
+        print_report(stages, slow_callbacks)
+        if args.csv:
+            write_csv(args.csv, samples)
+    finally:
+        ca_client_pool.shutdown()
+        if server:
+            server.terminate()
+            server.wait(10)
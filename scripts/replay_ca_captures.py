@@ -0,0 +1,109 @@
+"""
+This script replays captured Conversational Analytics chat streams offline.
+
+Captures are written by the data-agent tools when CA_STREAM_CAPTURE_DIR is set
+(see src/agents/stream_capture.py). Replay feeds the captured messages back
+with their original timing, or scaled by --time-scale (0 plays them as fast as
+possible), and reports latency, CPU time and memory.
+
+Modes:
+    stream  drains each capture through chat_stream.collect_chat_async, i.e.
+            show_message, result decoding and the stream metrics
+    agents  runs the data sub-agent that owns each capture through ADK with a
+            scripted model, so the tools and callbacks are included
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+
+# Add the project root to the Python path to allow for absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bench_end_to_end import ScriptedLlm, percentile
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from src.agents import agent, ca_client_pool, chat_stream, config_project, stream_capture
+from src.agents.data_agent_helper import build_chat_request
+
+SUB_AGENTS = {
+    config_project.PATIENT_ANALYTICS_AGENT_ID: agent.patient_encounters_agent,
+    config_project.MEDICATION_INVENTORY_AGENT_ID: agent.medication_inventory_agent,
+    config_project.PBM_CLAIMS_AGENT_ID: agent.pbm_agent,
+}
+
+
+async def replay_stream(client: stream_capture.ReplayChatAsyncClient, capture: stream_capture.StreamCapture):
+    request = build_chat_request(config_project.PROJECT_ID, capture.agent_id, "replay", "replay")
+    await chat_stream.collect_chat_async(capture.agent_id, lambda: client.chat(request=request), first_message_timeout_s=3600)
+
+
+async def replay_agent(runners: dict, capture: stream_capture.StreamCapture, i: int):
+    runner = runners[capture.agent_id]
+    session = await runner.session_service.create_session(app_name=runner.app_name, user_id=f"replay-{i}")
+    message = types.Content(role="user", parts=[types.Part(text="Replay the captured question.")])
+    async for _ in runner.run_async(user_id=session.user_id, session_id=session.id, new_message=message):
+        pass
+
+
+async def main(args: argparse.Namespace, captures: list[stream_capture.StreamCapture]):
+    async_client = stream_capture.ReplayChatAsyncClient(captures, args.time_scale)
+    if args.mode == "agents":
+        ca_client_pool.use_clients(stream_capture.ReplayChatClient(captures, args.time_scale), async_client)
+        # A cache hit would answer without replaying the capture
+        config_project.NL_SQL_CACHE_ENABLED = False
+        config_project.SQL_RESULT_CACHE_ENABLED = False
+        runners = {}
+        for agent_id in {c.agent_id for c in captures}:
+            sub_agent = SUB_AGENTS[agent_id]
+            sub_agent.model = ScriptedLlm(model="scripted")
+            runners[agent_id] = InMemoryRunner(agent=sub_agent, app_name=f"replay_{sub_agent.name}")
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: list[float] = []
+
+    async def one(i: int, capture: stream_capture.StreamCapture):
+        async with semaphore:
+            start = time.perf_counter()
+            if args.mode == "agents":
+                await replay_agent(runners, capture, i)
+            else:
+                await replay_stream(async_client, capture)
+            latencies.append(time.perf_counter() - start)
+
+    work = [capture for _ in range(args.repeat) for capture in captures]
+    if args.tracemalloc:
+        tracemalloc.start()
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    await asyncio.gather(*(one(i, capture) for i, capture in enumerate(work)))
+    cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+
+    print(f"replayed {len(work)} stream(s) in {args.mode} mode at time scale {args.time_scale}")
+    print(f"  wall {wall:.3f}s  cpu {cpu:.3f}s  cpu/stream {cpu / len(work) * 1000:.2f}ms  throughput {len(work) / wall:.2f}/s")
+    print(f"  latency p50 {percentile(latencies, 0.5):.3f}s  p95 {percentile(latencies, 0.95):.3f}s  p99 {percentile(latencies, 0.99):.3f}s")
+    if args.tracemalloc:
+        print(f"  peak Python allocations {tracemalloc.get_traced_memory()[1] / 2**20:.1f} MB")
+        tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay captured CA chat streams offline.")
+    parser.add_argument("capture_dir", help="Directory written by CA_STREAM_CAPTURE_DIR.")
+    parser.add_argument("--mode", choices=["stream", "agents"], default="stream")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="1 keeps the captured timing, 0 replays without delays.")
+    parser.add_argument("--repeat", type=int, default=1, help="Times each capture is replayed.")
+    parser.add_argument("--concurrency", type=int, default=1, help="Streams replayed at once.")
+    parser.add_argument("--agent", help="Only replay captures of this data agent ID.")
+    parser.add_argument("--tracemalloc", action="store_true", help="Also report peak Python allocations (slows the run).")
+    args = parser.parse_args()
+
+    captures = [c for c in stream_capture.load_captures(args.capture_dir) if not args.agent or c.agent_id == args.agent]
+    if not captures:
+        sys.exit(f"No captures found in {args.capture_dir}")
+    total_bytes = sum(c.size_bytes for c in captures)
+    print(f"loaded {len(captures)} capture(s), {sum(len(c.records) for c in captures)} messages, {total_bytes / 2**20:.2f} MB")
+    asyncio.run(main(args, captures))
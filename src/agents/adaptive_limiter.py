@@ -0,0 +1,265 @@
+'''
+File: adaptive_limiter.py
+Project: adk-data-analytics
+File Created: Sunday, 18th October 2026 3:58:12 pm
+-------------------------------------------------------------
+Copyright 2025 Google LLC. This software is provided as-is, without
+warranty or representation for any use or purpose. Your use of it is
+subject to your agreement with Google.
+Licensed under the Apache License, Version 2.0 (the 'License');
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an 'AS IS' BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+import asyncio
+import threading
+import time
+from collections import deque
+
+from google.api_core import exceptions as core_exceptions
+
+from . import metrics
+from .utils_google_logging import get_logger
+
+logger = get_logger(__name__)
+
+_window = metrics.gauge("data_agent_limiter_window", "Current AIMD concurrency window per data agent.", ("agent",))
+_rate = metrics.gauge("data_agent_limiter_rate_per_second", "Current token-bucket request rate per data agent.", ("agent",))
+_queue_depth = metrics.gauge("data_agent_limiter_queue_depth", "Calls waiting for a data-agent slot.", ("agent",))
+_shed = metrics.counter("data_agent_limiter_shed_total", "Calls shed by the limiter, by reason.", ("agent", "reason"))
+
+
+def is_quota_error(error: BaseException) -> bool:
+    """Returns True for RESOURCE_EXHAUSTED / HTTP 429 errors from the CA API."""
+    return isinstance(error, (core_exceptions.ResourceExhausted, core_exceptions.TooManyRequests))
+
+
+class LimiterRejectedError(Exception):
+    """Raised when a call is shed instead of queued or admitted."""
+
+    def __init__(self, name: str, reason: str):
+        super().__init__(f"{name}: {reason}")
+        self.name = name
+        self.reason = reason
+
+
+class TokenBucket:
+    """Request-rate bucket whose refill rate backs off on quota errors. Callers hold the limiter lock."""
+
+    def __init__(self, rate_per_s: float, burst: float, min_rate_per_s: float):
+        self.max_rate = rate_per_s
+        self.min_rate = min_rate_per_s
+        self.rate = rate_per_s
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, max_wait_s: float) -> float | None:
+        """Takes a token, returning how long to wait for it, or None if that exceeds max_wait_s."""
+        self._refill(time.monotonic())
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        wait_s = (1 - self._tokens) / self.rate
+        if wait_s > max_wait_s:
+            return None
+        # Going into debt keeps later reservations queued behind this one
+        self._tokens -= 1
+        return wait_s
+
+    def decrease(self, factor: float):
+        self._refill(time.monotonic())
+        self.rate = max(self.min_rate, self.rate * factor)
+
+    def increase(self, step: float):
+        self.rate = min(self.max_rate, self.rate + step)
+
+
+class _Waiter:
+    __slots__ = ("granted", "wake")
+
+    def __init__(self, wake):
+        self.wake = wake
+        self.granted = False
+
+
+class AdaptiveLimiter:
+    """Admits calls to one data agent under a token bucket and an AIMD concurrency window.
+
+    The window grows by roughly one slot per window's worth of healthy calls and
+    is cut by backoff_factor when a call hits RESOURCE_EXHAUSTED or runs longer
+    than latency_threshold_s (at most once per backoff_cooldown_s, so a burst of
+    failures from one overload counts once). Quota errors also slow the token
+    bucket. Calls that find the window full wait in a bounded FIFO queue for at
+    most max_wait_s; when the queue is full or the wait runs out they are shed
+    with LimiterRejectedError instead of piling more load on the backend.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate_per_s: float,
+        burst: float,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        max_queue: int,
+        max_wait_s: float,
+        latency_threshold_s: float,
+        backoff_factor: float = 0.5,
+        backoff_cooldown_s: float = 1.0,
+    ):
+        self.name = name
+        self._lock = threading.Lock()
+        self._bucket = TokenBucket(rate_per_s, burst, min_rate_per_s=max(rate_per_s * 0.1, 0.1))
+        self._limit = float(initial_limit)
+        self._min_limit = min_limit
+        self._max_limit = max_limit
+        self._max_queue = max_queue
+        self._max_wait_s = max_wait_s
+        self._latency_threshold_s = latency_threshold_s
+        self._backoff_factor = backoff_factor
+        self._backoff_cooldown_s = backoff_cooldown_s
+        self._last_backoff = 0.0
+        self._in_flight = 0
+        self._queue: deque[_Waiter] = deque()
+        self._publish()
+
+    # ------------------------------------------------------------------
+    # Admission
+    # ------------------------------------------------------------------
+
+    def _try_admit(self, wake) -> _Waiter | None:
+        """Admits immediately, queues a waiter, or sheds. Returns the waiter when queued."""
+        with self._lock:
+            if not self._queue and self._in_flight < int(self._limit):
+                self._in_flight += 1
+                return None
+            if len(self._queue) >= self._max_queue:
+                self._reject("queue_full")
+            waiter = _Waiter(wake)
+            self._queue.append(waiter)
+            _queue_depth.set(len(self._queue), agent=self.name)
+            return waiter
+
+    def _abandon(self, waiter: _Waiter) -> bool:
+        """Removes a waiter that gave up; returns True if it was granted a slot in the meantime."""
+        with self._lock:
+            if waiter.granted:
+                return True
+            self._queue.remove(waiter)
+            _queue_depth.set(len(self._queue), agent=self.name)
+        return False
+
+    def _reserve_token(self, deadline: float) -> float:
+        with self._lock:
+            wait_s = self._bucket.reserve(max(0.0, deadline - time.monotonic()))
+        if wait_s is None:
+            self._release_slot()
+            self._reject("rate_limited")
+        return wait_s
+
+    def _reject(self, reason: str):
+        _shed.inc(agent=self.name, reason=reason)
+        raise LimiterRejectedError(self.name, reason)
+
+    def acquire(self):
+        """Blocks until the call is admitted; raises LimiterRejectedError when shed."""
+        deadline = time.monotonic() + self._max_wait_s
+        event = threading.Event()
+        waiter = self._try_admit(event.set)
+        if waiter is not None and not event.wait(self._max_wait_s) and not self._abandon(waiter):
+            self._reject("queue_timeout")
+        wait_s = self._reserve_token(deadline)
+        if wait_s:
+            time.sleep(wait_s)
+
+    async def acquire_async(self):
+        """Waits on the event loop until the call is admitted; raises LimiterRejectedError when shed."""
+        deadline = time.monotonic() + self._max_wait_s
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+        waiter = self._try_admit(wake)
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(future, self._max_wait_s)
+            except TimeoutError:
+                if not self._abandon(waiter):
+                    self._reject("queue_timeout")
+            except asyncio.CancelledError:
+                if self._abandon(waiter):
+                    self._release_slot()
+                raise
+        wait_s = self._reserve_token(deadline)
+        if wait_s:
+            try:
+                await asyncio.sleep(wait_s)
+            except asyncio.CancelledError:
+                self._release_slot()
+                raise
+
+    # ------------------------------------------------------------------
+    # Feedback
+    # ------------------------------------------------------------------
+
+    def _release_slot(self):
+        with self._lock:
+            self._in_flight -= 1
+            self._drain()
+
+    def _drain(self):
+        while self._queue and self._in_flight < int(self._limit):
+            waiter = self._queue.popleft()
+            self._in_flight += 1
+            waiter.granted = True
+            waiter.wake()
+        _queue_depth.set(len(self._queue), agent=self.name)
+
+    def release(self, latency_s: float, quota_exceeded: bool = False):
+        """Returns the slot and feeds the call's latency and quota outcome back into the window."""
+        overloaded = quota_exceeded or latency_s > self._latency_threshold_s
+        with self._lock:
+            self._in_flight -= 1
+            now = time.monotonic()
+            if overloaded:
+                if now - self._last_backoff >= self._backoff_cooldown_s:
+                    self._last_backoff = now
+                    self._limit = max(float(self._min_limit), self._limit * self._backoff_factor)
+                    if quota_exceeded:
+                        self._bucket.decrease(self._backoff_factor)
+                    logger.warning(
+                        f"Limiter {self.name} backing off to window {int(self._limit)}, "
+                        f"rate {self._bucket.rate:.2f}/s ({'quota' if quota_exceeded else f'latency {latency_s:.1f}s'})"
+                    )
+            else:
+                self._limit = min(float(self._max_limit), self._limit + 1 / max(self._limit, 1.0))
+                self._bucket.increase(self._bucket.max_rate * 0.05)
+            self._drain()
+            self._publish()
+
+    def _publish(self):
+        _window.set(int(self._limit), agent=self.name)
+        _rate.set(round(self._bucket.rate, 3), agent=self.name)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "window": int(self._limit),
+                "in_flight": self._in_flight,
+                "queued": len(self._queue),
+                "rate_per_s": round(self._bucket.rate, 3),
+            }
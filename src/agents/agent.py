@@ -27,15 +27,19 @@ from google.adk.agents import LlmAgent
 from google.adk.planners.built_in_planner import BuiltInPlanner
 from google.adk.tools import agent_tool, google_search
 
-from .medication_data_agent import medication_data_agent_tool
-from .patient_data_agent import patient_data_agent_tool
-from .pbm_data_agent import pbm_data_agent_tool
+from .data_agent_tools import build_data_agent_tools
 from .utils_google_logging import get_logger
 
-from . import callback, prompt, config_model
+from . import callback, prompt, config_model, config_project, warmup
 
 logger = get_logger(__name__)
 
+# One data-agent tool per registered CA agent; shared pools and caches are initialized on first use
+data_agent_tools = build_data_agent_tools()
+patient_data_agent_tool = data_agent_tools[config_project.PATIENT_ANALYTICS_AGENT_ID]
+medication_data_agent_tool = data_agent_tools[config_project.MEDICATION_INVENTORY_AGENT_ID]
+pbm_data_agent_tool = data_agent_tools[config_project.PBM_CLAIMS_AGENT_ID]
+
 # ============================================================================
 # A2A SERVICE AGENTS (Patient & Medication)
 # ============================================================================
@@ -129,3 +133,6 @@ root_agent = LlmAgent(
     after_agent_callback=callback.after_orchestrator_callback,
 )
 
+# Pay cold-start costs while the instance starts up instead of on its first request
+if config_project.STARTUP_WARMUP:
+    warmup.warm_up()
@@ -0,0 +1,82 @@
+'''
+File: bq_executor.py
+Project: adk-data-analytics
+File Created: Sunday, 18th October 2026 1:10:44 pm
+-------------------------------------------------------------
+Copyright 2025 Google LLC. This software is provided as-is, without
+warranty or representation for any use or purpose. Your use of it is
+subject to your agreement with Google.
+Licensed under the Apache License, Version 2.0 (the 'License');
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an 'AS IS' BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+from __future__ import annotations
+
+import threading
+
+from . import ca_client_pool, config_project, sql_result_cache
+from .data_agent_helper import convert_columns, format_columns
+from .lazy_imports import lazy_import
+from .utils_google_logging import get_logger
+
+logger = get_logger(__name__)
+
+bigquery = lazy_import("google.cloud.bigquery")
+
+_client: bigquery.Client | None = None
+_client_lock = threading.Lock()
+
+
+def get_bigquery_client() -> bigquery.Client:
+    """Returns a shared BigQuery client that reuses the pooled CA credentials."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = bigquery.Client(project=config_project.PROJECT_ID, credentials=ca_client_pool.get_credentials())
+    return _client
+
+
+def execute_sql(sql: str) -> list[dict]:
+    """Runs previously generated SQL directly on BigQuery.
+
+    Args:
+        sql: The SQL the Conversational Analytics API generated earlier.
+
+    Returns:
+        A list of messages shaped like the ones show_message extracts from a CA
+        stream ({"sql_generated": ...} followed by {"data_retrieved": ...}).
+    """
+    logger.info("Executing cached SQL on BigQuery.")
+    rows = get_bigquery_client().query(sql).result(timeout=config_project.BQ_QUERY_TIMEOUT_S)
+    fields = [(field.name, field.field_type.upper()) for field in rows.schema]
+    values = [row.values() for row in rows]
+    columns = {name: [row[i] for row in values] for i, (name, _) in enumerate(fields)}
+    return [
+        {"sql_generated": sql},
+        {
+            "data_retrieved": format_columns(convert_columns(fields, columns)),
+            "data_schema": [{"name": name, "type": field_type} for name, field_type in fields],
+        },
+    ]
+
+
+def execute_cached_sql(agent_id: str, sql: str, use_result_cache: bool = True) -> list[dict]:
+    """Serves SQL from the result cache when its tables are still fresh, otherwise runs it on BigQuery."""
+    if not use_result_cache:
+        return execute_sql(sql)
+    responses = sql_result_cache.lookup(agent_id, sql)
+    if responses is not None:
+        logger.info("Served SQL result from cache.")
+        return responses
+    watermarks = sql_result_cache.watermarks(sql)
+    responses = execute_sql(sql)
+    sql_result_cache.store(agent_id, responses, watermarks)
+    return responses
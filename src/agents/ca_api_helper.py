@@ -21,107 +21,68 @@ See the License for the specific language governing permissions and
 limitations under the License.
 '''
 
-import json
-from pathlib import Path
+from __future__ import annotations
 
-import yaml
-from google.cloud import geminidataanalytics
+import argparse
+import hashlib
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+from google.api_core import exceptions as core_exceptions
 from google.protobuf import field_mask_pb2
 
-from . import config_project
+from . import ca_client_pool, config_project, context_bundles
+from .lazy_imports import lazy_import
 from .utils_google_logging import get_logger
 
 logger = get_logger(__name__)
 
+geminidataanalytics = lazy_import("google.cloud.geminidataanalytics")
+
 conversation_messages = []
 
-def create_bigquery_ca_data_agent(data_agent_id: str) -> geminidataanalytics.DataAgent:
-    """Creates a BigQuery Data Analytics Agent.
+# Published context fields built from src/data; each is hashed and updated on its own
+CONTEXT_SECTIONS = ("system_instruction", "datasource_references", "example_queries", "options")
+
+def build_published_context(data_agent_id: str) -> geminidataanalytics.Context:
+    """Returns a data agent's published context, loaded from its compiled bundle (see context_bundles.py).
 
     Args:
-        data_agent_id: The Data Agent ID.
+        data_agent_id: The Data Agent ID, a key of AGENT_ID_TO_CONFIG_DIR.
 
     Returns:
-        A DataAgent object.
+        A Context object.
     """
-    project_id = config_project.PROJECT_ID
-    logger.info("Creating Data Analytics Agent...")
-    data_agent_client = geminidataanalytics.DataAgentServiceClient()
-    logger.info("DataAgentServiceClient created.")
-
-    script_dir = Path(__file__).parent
-
     config_dir_name = config_project.AGENT_ID_TO_CONFIG_DIR.get(data_agent_id)
     if not config_dir_name:
         raise ValueError(f"No config directory found for agent ID: {data_agent_id}")
+    return context_bundles.load_context(config_dir_name)
 
-    # Load system instruction from data_agent_metadata.yaml
-    metadata_file_path = script_dir.parent / 'data' / config_dir_name / 'system_instructions.yaml'
-    with open(metadata_file_path) as file:
-        metadata_config = yaml.safe_load(file)
-    system_instruction = yaml.dump(metadata_config)
-    logger.info("Loaded system instruction from metadata.")
-
-    # Load BigQuery table context from bigquery_data_context.json
-    bq_context_file_path = script_dir.parent / 'data' / config_dir_name / 'bigquery_data_context.json'
-    with open(bq_context_file_path) as file:
-        bq_context_config = json.load(file)
-    logger.info("Loaded BigQuery table context.")
-
-    table_references = []
-    for table_item in bq_context_config["tables"]:
-        fields = []
-        if "fields" in table_item:
-            for field_item in table_item["fields"]:
-                fields.append(geminidataanalytics.Field(
-                    name=field_item["name"],
-                    description=field_item["description"]
-                ))
-
-        schema = geminidataanalytics.Schema(
-            description=table_item.get("description", ""),
-            synonyms=table_item.get("synonyms", []),
-            tags=table_item.get("tags", []),
-            fields=fields
-        )
 
-        bqr = geminidataanalytics.BigQueryTableReference(
-            project_id=table_item["project_id"],
-            dataset_id=table_item["dataset_id"],
-            table_id=table_item["table_id"],
-            schema=schema
-        )
-        table_references.append(bqr)
-    logger.info("Created BigQuery table references with schema.")
+def create_bigquery_ca_data_agent(
+    data_agent_id: str,
+    data_agent_client: geminidataanalytics.DataAgentServiceClient | None = None,
+    project_id: str | None = None,
+    timeout: float | None = None,
+) -> geminidataanalytics.DataAgent:
+    """Creates a BigQuery Data Analytics Agent.
 
-    datasource_references = geminidataanalytics.DatasourceReferences(
-        bq=geminidataanalytics.BigQueryTableReferences(
-            table_references=table_references
-        )
-    )
-    logger.info("Created datasource references.")
-
-    example_queries = []
-    if "example_queries" in bq_context_config:
-        for query_item in bq_context_config["example_queries"]:
-            example_queries.append(geminidataanalytics.ExampleQuery(
-                natural_language_question=query_item["natural_language_question"],
-                sql_query=query_item["sql_query"]
-            ))
-    logger.info("Created example queries.")
-
-    published_context = geminidataanalytics.Context(
-        system_instruction=system_instruction,
-        datasource_references=datasource_references,
-        example_queries=example_queries,
-        options=geminidataanalytics.ConversationOptions(
-            analysis=geminidataanalytics.AnalysisOptions(
-                python=geminidataanalytics.AnalysisOptions.Python(
-                    enabled=True
-                )
-            )
-        )
-    )
+    Args:
+        data_agent_id: The Data Agent ID.
+        data_agent_client: Client to use; a new one by default.
+        project_id: Project to create the agent in; config_project.PROJECT_ID by default.
+        timeout: Seconds to wait for the creation to complete; unbounded by default.
+
+    Returns:
+        A DataAgent object.
+    """
+    project_id = project_id or config_project.PROJECT_ID
+    logger.info("Creating Data Analytics Agent...")
+    data_agent_client = data_agent_client or geminidataanalytics.DataAgentServiceClient()
+
+    published_context = build_published_context(data_agent_id)
     logger.info("Created published context.")
 
     data_agent = geminidataanalytics.DataAgent(
@@ -141,27 +102,101 @@ def create_bigquery_ca_data_agent(data_agent_id: str) -> geminidataanalytics.Dat
 
     operation = data_agent_client.create_data_agent(request=request)
     logger.info("Waiting for Data Analytics Agent creation to complete...")
-    response = operation.result()
+    response = operation.result(timeout=timeout)
     logger.info(f"Data Analytics Agent created with name: {response.name}")
     return response
 
 
-def get_data_agent(data_agent_id: str) -> geminidataanalytics.DataAgent:
+def context_section_hashes(context: geminidataanalytics.Context) -> dict[str, str]:
+    """Returns a SHA-256 of every CONTEXT_SECTIONS field of a published context.
+
+    Messages are hashed in deterministic wire format, so equal content hashes
+    equally whether it was built locally or read back from the API.
+    """
+    context_pb = geminidataanalytics.Context.pb(context)
+    hashes = {}
+    for section in CONTEXT_SECTIONS:
+        value = getattr(context_pb, section)
+        if isinstance(value, str):
+            payload = value.encode()
+        elif hasattr(value, "SerializeToString"):
+            payload = value.SerializeToString(deterministic=True)
+        else:
+            # Repeated messages, e.g. example_queries; order matters to the agent
+            payload = b"".join(len(item).to_bytes(4, "little") + item for item in (m.SerializeToString(deterministic=True) for m in value))
+        hashes[section] = hashlib.sha256(payload).hexdigest()
+    return hashes
+
+
+def sync_published_context(
+    data_agent_id: str,
+    data_agent_client: geminidataanalytics.DataAgentServiceClient | None = None,
+    project_id: str | None = None,
+    timeout: float | None = None,
+) -> list[str]:
+    """Brings a deployed agent's published context in line with its files under src/data.
+
+    Hashes every context section of the desired and the deployed context and
+    sends one field-masked update carrying only the sections that differ.
+    An agent that is already in sync costs a single read and no write.
+
+    Args:
+        data_agent_id: The Data Agent ID.
+        data_agent_client: Client to use; a new one by default.
+        project_id: Project of the agent; config_project.PROJECT_ID by default.
+        timeout: Seconds the read and the update may each take; unbounded by default.
+
+    Returns:
+        The names of the sections that were updated, empty when none changed.
+    """
+    project_id = project_id or config_project.PROJECT_ID
+    data_agent_client = data_agent_client or geminidataanalytics.DataAgentServiceClient()
+    desired = build_published_context(data_agent_id)
+    deployed = get_data_agent(data_agent_id, data_agent_client, timeout=timeout, project_id=project_id)
+    deployed_hashes = context_section_hashes(deployed.data_analytics_agent.published_context)
+    changed = [section for section, digest in context_section_hashes(desired).items() if deployed_hashes[section] != digest]
+    if not changed:
+        logger.info(f"Published context of {deployed.name} is in sync, nothing to update.")
+        return []
+
+    data_agent = geminidataanalytics.DataAgent(name=deployed.name)
+    for section in changed:
+        setattr(data_agent.data_analytics_agent.published_context, section, getattr(desired, section))
+    request = geminidataanalytics.UpdateDataAgentRequest(
+        data_agent=data_agent,
+        update_mask=field_mask_pb2.FieldMask(paths=[f"data_analytics_agent.published_context.{section}" for section in changed]),
+    )
+    logger.info(f"Updating {', '.join(changed)} of {deployed.name}...")
+    operation = data_agent_client.update_data_agent(request=request)
+    operation.result(timeout=timeout)
+    logger.info(f"Published context of {deployed.name} updated.")
+    return changed
+
+
+def get_data_agent(
+    data_agent_id: str,
+    data_agent_client: geminidataanalytics.DataAgentServiceClient | None = None,
+    timeout: float | None = None,
+    project_id: str | None = None,
+) -> geminidataanalytics.DataAgent:
     """Gets a Data Analytics Agent.
 
     Args:
         data_agent_id: The Data Agent ID.
+        data_agent_client: Client to use, e.g. the pooled one from ca_client_pool; a new one by default.
+        timeout: Deadline for the call in seconds.
+        project_id: Project of the agent; config_project.PROJECT_ID by default.
 
     Returns:
         A DataAgent object.
     """
-    project_id = config_project.PROJECT_ID
+    project_id = project_id or config_project.PROJECT_ID
     logger.info(f"Getting Data Analytics Agent: {data_agent_id}")
-    data_agent_client = geminidataanalytics.DataAgentServiceClient()
+    data_agent_client = data_agent_client or geminidataanalytics.DataAgentServiceClient()
     request = geminidataanalytics.GetDataAgentRequest(
         name=f"projects/{project_id}/locations/global/dataAgents/{data_agent_id}",
     )
-    response = data_agent_client.get_data_agent(request=request)
+    response = data_agent_client.get_data_agent(request=request, timeout=timeout)
     logger.info(f"Successfully retrieved Data Analytics Agent: {response}")
     return response
 
@@ -202,6 +237,7 @@ def update_data_agent(
     display_name: str | None = None,
     description: str | None = None,
     system_instruction: str | None = None,
+    data_agent_client: geminidataanalytics.DataAgentServiceClient | None = None,
 ) -> None:
     """Updates a Data Analytics Agent.
 
@@ -210,10 +246,11 @@ def update_data_agent(
         display_name: The new display name for the agent.
         description: The new description for the agent.
         system_instruction: The new system instruction for the agent.
+        data_agent_client: Client to use; a new one by default.
     """
     project_id = config_project.PROJECT_ID
     logger.info(f"Updating Data Analytics Agent: {data_agent_id}")
-    data_agent_client = geminidataanalytics.DataAgentServiceClient()
+    data_agent_client = data_agent_client or geminidataanalytics.DataAgentServiceClient()
 
     data_agent = geminidataanalytics.DataAgent()
     data_agent.name = (
@@ -231,19 +268,9 @@ def update_data_agent(
         update_mask_paths.append("description")
 
     if system_instruction:
-        current_agent = get_data_agent(data_agent_id)
-        current_published_context = current_agent.data_analytics_agent.published_context
-
-        # Create a new context with the updated system instruction
-        new_published_context = geminidataanalytics.Context(
-            system_instruction=system_instruction,
-            datasource_references=current_published_context.datasource_references,
-            example_queries=current_published_context.example_queries,
-            options=current_published_context.options,
-        )
-
-        data_agent.data_analytics_agent.published_context = new_published_context
-        update_mask_paths.append("data_analytics_agent.published_context")
+        # The mask leaves the rest of the published context as deployed
+        data_agent.data_analytics_agent.published_context.system_instruction = system_instruction
+        update_mask_paths.append("data_analytics_agent.published_context.system_instruction")
 
     if not update_mask_paths:
         logger.warning("No fields provided to update.")
@@ -264,41 +291,115 @@ def update_data_agent(
         raise
 
 
-if __name__ == "__main__":
-    
-    bigquery_data_agent_id = config_project.PATIENT_ANALYTICS_AGENT_ID
-
-    agent = create_bigquery_ca_data_agent(bigquery_data_agent_id)
-    logger.info(f"Created BigQuery Data Agent: {agent.name}")
-
-    bigquery_data_agent_id = config_project.MEDICATION_INVENTORY_AGENT_ID
-
-    agent = create_bigquery_ca_data_agent(bigquery_data_agent_id)
-    logger.info(f"Created BigQuery Data Agent: {agent.name}")
+@dataclass
+class ProvisionResult:
+    """Outcome of provisioning one data agent in one project."""
 
-    bigquery_data_agent_id = config_project.PBM_CLAIMS_AGENT_ID
+    project_id: str
+    data_agent_id: str
+    status: str  # created, updated, exists, error or timeout
+    seconds: float
+    error: str | None = None
+    changed_sections: list[str] = field(default_factory=list)
 
-    agent = create_bigquery_ca_data_agent(bigquery_data_agent_id)
-    logger.info(f"Created BigQuery Data Agent: {agent.name}")
+    @property
+    def ok(self) -> bool:
+        return self.status in ("created", "updated", "exists")
 
 
-    #agent = get_data_agent(bigquery_data_agent_id)
-    #print(f"Retrieved Data Agent: {agent.name}")
-
-    list_data_agents()
+def _provision_data_agent(
+    data_agent_client,
+    project_id: str,
+    data_agent_id: str,
+    update_existing: bool,
+    timeout_s: float,
+) -> ProvisionResult:
+    start = time.perf_counter()
+    changed = []
+    try:
+        try:
+            create_bigquery_ca_data_agent(data_agent_id, data_agent_client, project_id, timeout=timeout_s)
+            status = "created"
+        except core_exceptions.AlreadyExists:
+            # Surfaces from the create call or from its operation; either way the agent is there
+            status = "exists"
+            if update_existing:
+                remaining_s = max(timeout_s - (time.perf_counter() - start), 1)
+                changed = sync_published_context(data_agent_id, data_agent_client, project_id, timeout=remaining_s)
+                status = "updated" if changed else "exists"
+        return ProvisionResult(project_id, data_agent_id, status, time.perf_counter() - start, changed_sections=changed)
+    except TimeoutError:
+        return ProvisionResult(project_id, data_agent_id, "timeout", time.perf_counter() - start, f"not done after {timeout_s}s")
+    except Exception as e:
+        return ProvisionResult(project_id, data_agent_id, "error", time.perf_counter() - start, str(e))
+
+
+def provision_data_agents(
+    data_agent_ids: list[str],
+    project_ids: list[str] | None = None,
+    update_existing: bool = False,
+    timeout_s: float = 600,
+    max_workers: int = 16,
+    data_agent_client: geminidataanalytics.DataAgentServiceClient | None = None,
+) -> list[ProvisionResult]:
+    """Creates every data agent in every project concurrently; safe to re-run.
+
+    All calls share one client and every creation's long-running operation is
+    awaited in parallel, so a rollout takes about as long as its slowest agent.
+    An agent that already exists counts as success; with update_existing the
+    sections of its published context that differ from src/data are updated
+    (see sync_published_context). Failures and timeouts
+    are reported per agent rather than raised.
 
-    #get_data_agent(looker_data_agent_id)
+    Args:
+        data_agent_ids: Data Agent IDs, keys of AGENT_ID_TO_CONFIG_DIR.
+        project_ids: Projects to provision in; config_project.PROJECT_ID by default.
+        update_existing: Sync the published context of agents that already exist.
+        timeout_s: Seconds each agent's create (and update) may take.
+        max_workers: Agents provisioned at once.
+        data_agent_client: Client to share; the pooled one from ca_client_pool by default.
 
-    #delete_data_agent("patient_encounters-agent-6")
+    Returns:
+        One ProvisionResult per (project, agent), in completion order.
+    """
+    project_ids = project_ids or [config_project.PROJECT_ID]
+    data_agent_client = data_agent_client or ca_client_pool.get_data_agent_client()
+    targets = [(project_id, data_agent_id) for project_id in project_ids for data_agent_id in data_agent_ids]
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(targets))), thread_name_prefix="provision") as executor:
+        futures = [
+            executor.submit(_provision_data_agent, data_agent_client, project_id, data_agent_id, update_existing, timeout_s)
+            for project_id, data_agent_id in targets
+        ]
+        for done, future in enumerate(as_completed(futures), start=1):
+            result = future.result()
+            results.append(result)
+            message = f"[{done}/{len(targets)}] {result.project_id}/{result.data_agent_id}: {result.status} in {result.seconds:.1f}s"
+            if result.ok:
+                logger.info(message)
+            else:
+                logger.error(f"{message}: {result.error}")
+    return results
 
-    # script_dir = Path(__file__).parent
-    # metadata_file_path = script_dir.parent / 'data' / 'patient_records' / 'system_instructions.yaml'
-    # with open(metadata_file_path) as file:
-    #     metadata_config = yaml.safe_load(file)
-    # system_instruction = yaml.dump(metadata_config)
-    # logger.info("Loaded system instruction from metadata.")
 
-    # update_data_agent(
-    #     data_agent_id=bigquery_data_agent_id,
-    #     system_instruction=system_instruction
-    # )
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create or update Conversational Analytics data agents in parallel.")
+    parser.add_argument(
+        "--agents", nargs="+", default=list(config_project.AGENT_ID_TO_CONFIG_DIR),
+        help="Data agent IDs or config_project variable names, e.g. PBM_CLAIMS_AGENT_ID. Defaults to every configured agent.",
+    )
+    parser.add_argument("--projects", nargs="+", default=[config_project.PROJECT_ID], help="Projects to provision the agents in.")
+    parser.add_argument("--update", action="store_true", help="Sync the changed published context sections of agents that already exist.")
+    parser.add_argument("--timeout-s", type=float, default=600, help="Seconds each agent may take.")
+    parser.add_argument("--max-workers", type=int, default=16, help="Agents provisioned at once.")
+    args = parser.parse_args()
+
+    agent_ids = [getattr(config_project, name, name) for name in args.agents]
+    started = time.perf_counter()
+    results = provision_data_agents(agent_ids, args.projects, args.update, args.timeout_s, args.max_workers)
+    failed = [r for r in results if not r.ok]
+    logger.info(f"Provisioned {len(results) - len(failed)}/{len(results)} data agent(s) in {time.perf_counter() - started:.1f}s.")
+    for result in sorted(results, key=lambda r: (r.project_id, r.data_agent_id)):
+        detail = f" - {result.error}" if result.error else f" - {', '.join(result.changed_sections)}" if result.changed_sections else ""
+        logger.info(f"  {result.project_id}/{result.data_agent_id}: {result.status} ({result.seconds:.1f}s){detail}")
+    sys.exit(1 if failed else 0)
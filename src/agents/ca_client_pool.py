@@ -0,0 +1,366 @@
+'''
+File: ca_client_pool.py
+Project: adk-data-analytics
+File Created: Sunday, 18th October 2026 9:12:04 am
+-------------------------------------------------------------
+Copyright 2025 Google LLC. This software is provided as-is, without
+warranty or representation for any use or purpose. Your use of it is
+subject to your agreement with Google.
+Licensed under the Apache License, Version 2.0 (the 'License');
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an 'AS IS' BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import datetime
+import threading
+import time
+
+import google.auth
+import grpc
+from google.auth.credentials import AnonymousCredentials
+from google.auth.transport.requests import Request
+
+from . import config_project
+from .lazy_imports import lazy_import
+from .utils_google_logging import get_logger
+
+logger = get_logger(__name__)
+
+geminidataanalytics = lazy_import("google.cloud.geminidataanalytics")
+
+CLOUD_PLATFORM_SCOPE = "https://www.googleapis.com/auth/cloud-platform"
+
+
+class DataChatClientPool:
+    """A process-wide pool of DataChatServiceClients over long-lived gRPC channels.
+
+    Credentials are resolved once and refreshed in a background thread ahead of
+    expiry, so tool calls never pay for ADC discovery or token minting. Each
+    client owns one keepalive-enabled channel; callers are handed clients
+    round-robin once the pool is full. Async clients are pooled per event loop.
+    Data agent lookups share the credentials through one DataAgentServiceClient.
+    """
+
+    def __init__(
+        self,
+        size: int = config_project.CA_CLIENT_POOL_SIZE,
+        keepalive_ms: int = config_project.CA_CHANNEL_KEEPALIVE_MS,
+        refresh_margin_s: float = config_project.CA_CREDENTIALS_REFRESH_MARGIN_S,
+    ):
+        self._size = max(1, size)
+        self._keepalive_ms = keepalive_ms
+        self._refresh_margin_s = refresh_margin_s
+
+        self._lock = threading.Lock()
+        # Resolving credentials can take seconds; it has its own lock so pooled clients stay available meanwhile
+        self._credentials_lock = threading.Lock()
+        self._clients: list[geminidataanalytics.DataChatServiceClient] = []
+        # grpc.aio channels are bound to the event loop that created them
+        self._async_clients: dict[asyncio.AbstractEventLoop, list[geminidataanalytics.DataChatServiceAsyncClient]] = {}
+        self._async_cursor = 0
+        self._cursor = 0
+        self._agent_client: geminidataanalytics.DataAgentServiceClient | None = None
+        self._closed = False
+
+        self._credentials = None
+        self._refresher: threading.Thread | None = None
+        self._stop = threading.Event()
+
+        self._reuse_count = 0
+        self._setup_time_s = 0.0
+        self._last_setup_time_s = 0.0
+        self._credential_refreshes = 0
+        self._credential_refresh_failures = 0
+
+    # ------------------------------------------------------------------
+    # Credentials
+    # ------------------------------------------------------------------
+
+    def get_credentials(self):
+        """Returns the cached ADC credentials, resolving them on first use."""
+        with self._credentials_lock:
+            return self._ensure_credentials()
+
+    def _ensure_credentials(self):
+        if self._credentials is None and config_project.CA_API_INSECURE:
+            # Local stand-in servers (scripts/fake_ca_server.py) take plaintext calls without a token
+            self._credentials = AnonymousCredentials()
+            logger.info(f"Using anonymous credentials for plaintext endpoint {config_project.CA_API_ENDPOINT}")
+        if self._credentials is None:
+            credentials, _ = google.auth.default(scopes=[CLOUD_PLATFORM_SCOPE])
+            credentials.refresh(Request())
+            self._credentials = credentials
+            logger.info(f"Resolved credentials for {getattr(credentials, 'service_account_email', 'user credentials')}")
+            self._refresher = threading.Thread(target=self._refresh_loop, name="ca-credentials-refresher", daemon=True)
+            self._refresher.start()
+        return self._credentials
+
+    def _seconds_until_refresh(self) -> float:
+        expiry = getattr(self._credentials, "expiry", None)
+        if not expiry:
+            return self._refresh_margin_s
+        # google-auth stores expiry as a naive UTC datetime
+        remaining = (expiry - datetime.datetime.now(datetime.UTC).replace(tzinfo=None)).total_seconds()
+        return max(remaining - self._refresh_margin_s, 1.0)
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self._seconds_until_refresh()):
+            try:
+                self._credentials.refresh(Request())
+                self._credential_refreshes += 1
+                logger.info("Refreshed Conversational Analytics API credentials in background.")
+            except Exception as e:
+                self._credential_refresh_failures += 1
+                logger.warning(f"Background credential refresh failed, retrying in 30s: {e}")
+                if self._stop.wait(30):
+                    return
+
+    # ------------------------------------------------------------------
+    # Clients
+    # ------------------------------------------------------------------
+
+    def _channel_options(self) -> list[tuple[str, int]]:
+        return [
+            ("grpc.keepalive_time_ms", self._keepalive_ms),
+            ("grpc.keepalive_timeout_ms", 10000),
+            ("grpc.keepalive_permit_without_calls", 1),
+            ("grpc.http2.max_pings_without_data", 0),
+            ("grpc.max_receive_message_length", -1),
+        ]
+
+    def _create_client(self, client_cls, transport_label: str):
+        """Opens a client on a new channel; called without holding self._lock."""
+        start = time.perf_counter()
+        credentials = self.get_credentials()
+        transport_cls = client_cls.get_transport_class(transport_label)
+        if config_project.CA_API_INSECURE:
+            insecure_channel = grpc.aio.insecure_channel if transport_label == "grpc_asyncio" else grpc.insecure_channel
+            channel = insecure_channel(config_project.CA_API_ENDPOINT, options=self._channel_options())
+        else:
+            channel = transport_cls.create_channel(
+                config_project.CA_API_ENDPOINT,
+                credentials=credentials,
+                options=self._channel_options(),
+            )
+        client = client_cls(transport=transport_cls(channel=channel))
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._setup_time_s += elapsed
+            self._last_setup_time_s = elapsed
+        logger.info(f"{client_cls.__name__} channel created in {elapsed * 1000:.1f} ms.")
+        return client
+
+    def _check_open(self):
+        if self._closed:
+            raise RuntimeError("DataChatClientPool has been shut down.")
+
+    def _next_client(self):
+        client = self._clients[self._cursor % len(self._clients)]
+        self._cursor += 1
+        self._reuse_count += 1
+        return client
+
+    def get_client(self) -> geminidataanalytics.DataChatServiceClient:
+        """Returns a pooled client, opening a new channel until the pool is full.
+
+        Channels are opened outside the pool lock, so callers handed an existing
+        client never wait behind another caller's channel setup.
+        """
+        with self._lock:
+            self._check_open()
+            if len(self._clients) >= self._size:
+                return self._next_client()
+        client = self._create_client(geminidataanalytics.DataChatServiceClient, "grpc")
+        with self._lock:
+            if not self._closed and len(self._clients) < self._size:
+                self._clients.append(client)
+                return client
+        # The pool was filled (or shut down) by concurrent callers while this channel was opening
+        client.transport.close()
+        with self._lock:
+            self._check_open()
+            return self._next_client()
+
+    def connect(self, timeout_s: float) -> int:
+        """Opens every pooled sync channel and waits until each is connected; returns how many are.
+
+        Async channels are bound to the event loop that serves requests, so they are
+        created on first use there; they share the warmed-up credentials.
+        """
+        with self._lock:
+            self._check_open()
+            missing = self._size - len(self._clients)
+        for _ in range(missing):
+            self.get_client()
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            grpc.channel_ready_future(client.transport.grpc_channel).result(timeout=timeout_s)
+        return len(clients)
+
+    def get_agent_client(self) -> geminidataanalytics.DataAgentServiceClient:
+        """Returns a shared DataAgentServiceClient for data agent lookups, on its own channel."""
+        with self._lock:
+            self._check_open()
+            if self._agent_client is not None:
+                return self._agent_client
+        client = self._create_client(geminidataanalytics.DataAgentServiceClient, "grpc")
+        with self._lock:
+            if not self._closed and self._agent_client is None:
+                self._agent_client = client
+                return client
+        client.transport.close()
+        with self._lock:
+            self._check_open()
+            return self._agent_client
+
+    async def get_async_client(self) -> geminidataanalytics.DataChatServiceAsyncClient:
+        """Returns a pooled async client bound to the running event loop.
+
+        On a cold pool the credentials (google.auth.default() and a token refresh)
+        are resolved on a worker thread, so concurrent sessions on the loop don't
+        stall behind them.
+        """
+        if self._credentials is None:
+            await asyncio.to_thread(self.get_credentials)
+        return self._loop_client(asyncio.get_running_loop())
+
+    def _loop_client(self, loop: asyncio.AbstractEventLoop) -> geminidataanalytics.DataChatServiceAsyncClient:
+        """Returns a client for loop, opening its channel if the pool for that loop has room."""
+        with self._lock:
+            self._check_open()
+            # Drop channels whose loop has gone away (e.g. a finished asyncio.run())
+            for stale in [loop_ for loop_ in self._async_clients if loop_.is_closed()]:
+                del self._async_clients[stale]
+            clients = self._async_clients.setdefault(loop, [])
+            if len(clients) >= self._size:
+                return self._next_async_client(clients)
+        # Opened outside the pool lock, as in get_client(); only this loop adds to its own list, and it
+        # doesn't yield in between, so the slot checked above is still free
+        client = self._create_client(geminidataanalytics.DataChatServiceAsyncClient, "grpc_asyncio")
+        with self._lock:
+            self._check_open()
+            clients = self._async_clients.setdefault(loop, [])
+            clients.append(client)
+            return client
+
+    def _next_async_client(self, clients: list):
+        client = clients[self._async_cursor % len(clients)]
+        self._async_cursor += 1
+        self._reuse_count += 1
+        return client
+
+    def stats(self) -> dict:
+        """Returns counters that show whether per-call connection cost is gone."""
+        with self._lock:
+            return {
+                "pool_size": self._size,
+                "open_channels": len(self._clients) + sum(len(c) for c in self._async_clients.values()) + (self._agent_client is not None),
+                "reuse_count": self._reuse_count,
+                "setup_time_s_total": round(self._setup_time_s, 6),
+                "setup_time_s_last": round(self._last_setup_time_s, 6),
+                "credential_refreshes": self._credential_refreshes,
+                "credential_refresh_failures": self._credential_refresh_failures,
+            }
+
+    def shutdown(self):
+        """Stops the credential refresher and closes every pooled channel."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._stop.set()
+            clients, self._clients = self._clients, []
+            if self._agent_client is not None:
+                clients.append(self._agent_client)
+                self._agent_client = None
+            async_clients, self._async_clients = self._async_clients, {}
+        for client in clients:
+            try:
+                client.transport.close()
+            except Exception as e:
+                logger.warning(f"Error closing {type(client).__name__} channel: {e}")
+        for loop, loop_clients in async_clients.items():
+            # Async channels can only be closed from their own loop; a closed loop
+            # has already torn them down.
+            if loop.is_closed() or not loop.is_running():
+                continue
+            for client in loop_clients:
+                asyncio.run_coroutine_threadsafe(client.transport.close(), loop)
+        closed = len(clients) + sum(len(c) for c in async_clients.values())
+        logger.info(f"DataChatClientPool shut down, closed {closed} channel(s).")
+
+
+_pool: DataChatClientPool | None = None
+_pool_lock = threading.Lock()
+# Clients served instead of the pool's, see use_clients()
+_client_override = None
+_async_client_override = None
+
+
+def get_pool() -> DataChatClientPool:
+    """Returns the process-wide client pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = DataChatClientPool()
+                atexit.register(shutdown)
+    return _pool
+
+
+def get_data_chat_client() -> geminidataanalytics.DataChatServiceClient:
+    """Returns a shared DataChatServiceClient from the process-wide pool."""
+    if _client_override is not None:
+        return _client_override
+    return get_pool().get_client()
+
+
+async def get_data_chat_async_client() -> geminidataanalytics.DataChatServiceAsyncClient:
+    """Returns a shared DataChatServiceAsyncClient for the running event loop."""
+    if _async_client_override is not None:
+        return _async_client_override
+    return await get_pool().get_async_client()
+
+
+def get_data_agent_client() -> geminidataanalytics.DataAgentServiceClient:
+    """Returns the shared DataAgentServiceClient from the process-wide pool."""
+    return get_pool().get_agent_client()
+
+
+def use_clients(client=None, async_client=None):
+    """Serves the given clients instead of the pool's, e.g. stream_capture's replay clients.
+
+    Call with no arguments to go back to the pool.
+    """
+    global _client_override, _async_client_override
+    _client_override, _async_client_override = client, async_client
+
+
+def get_credentials():
+    """Returns the pool's cached credentials."""
+    return get_pool().get_credentials()
+
+
+def pool_stats() -> dict:
+    """Returns the process-wide pool stats, or an empty dict before first use."""
+    return _pool.stats() if _pool else {}
+
+
+def shutdown():
+    """Closes the process-wide pool; safe to call more than once."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool:
+        pool.shutdown()
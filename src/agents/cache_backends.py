@@ -0,0 +1,134 @@
+'''
+File: cache_backends.py
+Project: adk-data-analytics
+File Created: Sunday, 18th October 2026 12:05:18 pm
+-------------------------------------------------------------
+Copyright 2025 Google LLC. This software is provided as-is, without
+warranty or representation for any use or purpose. Your use of it is
+subject to your agreement with Google.
+Licensed under the Apache License, Version 2.0 (the 'License');
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an 'AS IS' BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+from .utils_google_logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class MemoryCacheBackend:
+    """An in-process LRU cache with per-entry TTL."""
+
+    def __init__(self, max_entries: int):
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl_s: float):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl_s, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SqliteCacheBackend:
+    """An LRU cache with per-entry TTL in a SQLite file that several worker processes can share.
+
+    Values are stored as JSON. WAL mode lets readers in other processes proceed
+    while one process writes; recency is tracked in accessed_at so LRU eviction
+    sees hits from every process.
+    """
+
+    def __init__(self, path: str | Path, max_entries: int, table: str = "cache"):
+        self._path = Path(path)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._max_entries = max_entries
+        self._table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self._path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed_at ON {table} (accessed_at)")
+
+    def get(self, key: str) -> Any | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(f"SELECT value, expires_at FROM {self._table} WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._conn.execute(f"DELETE FROM {self._table} WHERE key = ?", (key,))
+                return None
+            self._conn.execute(f"UPDATE {self._table} SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl_s: float):
+        now = time.time()
+        payload = json.dumps(value, default=str)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self._table} (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, payload, now + ttl_s, now),
+            )
+            self._conn.execute(f"DELETE FROM {self._table} WHERE expires_at < ?", (now,))
+            self._conn.execute(
+                f"DELETE FROM {self._table} WHERE key IN "
+                f"(SELECT key FROM {self._table} ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self._max_entries,),
+            )
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self._table} WHERE key = ?", (key,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self._table}").fetchone()[0]
+
+
+def create_backend(kind: str, path: str | Path, max_entries: int, table: str = "cache"):
+    """Creates a 'sqlite' or 'memory' cache backend, falling back to memory if the file can't be opened."""
+    if kind == "sqlite":
+        try:
+            return SqliteCacheBackend(path, max_entries, table=table)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Could not open SQLite cache at {path}, using an in-memory cache: {e}")
+    return MemoryCacheBackend(max_entries)
@@ -29,11 +29,90 @@ from google.adk.agents.callback_context import CallbackContext
 from google.adk.tools.base_tool import BaseTool
 from google.adk.tools.tool_context import ToolContext
 
-from .utils_google_logging import get_logger
+from . import tracing, turn_ledger
+from .utils_google_logging import get_logger, log_payload
 
 logger = get_logger(__name__)
 
 
+# ============================================================================
+# TRACING
+# ============================================================================
+
+# Spans are opened in before_* callbacks and closed in the matching after_* callbacks, keyed by
+# invocation ID for agents and by function call ID for tools (see tracing.py).
+
+def _start_agent_span(callback_context: CallbackContext, kind: str):
+    tracing.start_span(
+        f"agent:{callback_context.invocation_id}:{callback_context.agent_name}",
+        f"{kind} {callback_context.agent_name}",
+        {
+            "adk.agent_name": callback_context.agent_name,
+            "adk.invocation_id": callback_context.invocation_id,
+            "adk.session_id": callback_context._invocation_context.session.id,
+        },
+    )
+
+
+def _end_agent_span(callback_context: CallbackContext, attributes: dict | None = None):
+    tracing.end_span(f"agent:{callback_context.invocation_id}:{callback_context.agent_name}", attributes)
+
+
+def _start_tool_span(tool: BaseTool, tool_context: ToolContext):
+    tracing.start_span(
+        f"tool:{tool_context.function_call_id}",
+        f"tool {tool.name}",
+        {"adk.tool_name": tool.name, "adk.agent_name": tool_context.agent_name, "adk.function_call_id": tool_context.function_call_id or ""},
+    )
+
+
+def _end_tool_span(tool_context: ToolContext, tool_response):
+    error = None
+    if isinstance(tool_response, list) and tool_response and isinstance(tool_response[0], dict) and tool_response[0].get("status") in ("error", "unavailable"):
+        error = tool_response[0].get("error_message", "tool error")
+    tracing.end_span(f"tool:{tool_context.function_call_id}", error=error)
+
+
+# ============================================================================
+# DATA AGENT TURNS
+# ============================================================================
+
+def _finish_data_agent_turn(callback_context: CallbackContext, output_key: str) -> types.Content:
+    """Stores this turn's data tool results once and returns them as JSON for A2A transmission.
+
+    The agent's output keeps its summary and refers to its results by function
+    call ID. Run on its own, the agent writes the results to its turn ledger;
+    run as the orchestrator's tool, the orchestrator stores them from the JSON
+    under the same IDs, so the results are not also copied into its state.
+    """
+    state = callback_context.state
+    agent_text_output = state.get(output_key, '')
+
+    # Merge each call's list of dicts into a single dict for better frontend display
+    # Each dict has a single key (query, schema_resolved, sql_generated, etc.)
+    results = {}
+    for function_call_id, entry in turn_ledger.get_ledger().pop(callback_context.invocation_id).items():
+        merged_result = turn_ledger.merge_items(entry.get('result', []))
+        if merged_result:
+            results[function_call_id] = {'tool_name': entry.get('tool_name'), 'input': entry.get('input'), 'result': merged_result}
+
+    state[output_key] = {
+        'summary': agent_text_output,
+        'tool_response': list(results)
+    }
+    if state.get(turn_ledger.LEDGER_OWNER_KEY, callback_context.agent_name) == callback_context.agent_name:
+        state[turn_ledger.LEDGER_KEY] = results
+
+    # For A2A: Return structured data as plain JSON (no delimiters)
+    # The orchestrator will parse this JSON directly
+    structured_data = {
+        'summary': agent_text_output,
+        'tool_response': [entry['result'] for entry in results.values()],
+        'function_call_ids': list(results),
+    }
+    return types.Content(parts=[types.Part(text=json.dumps(structured_data))])
+
+
 # ============================================================================
 # PATIENT AGENT CALLBACKS
 # ============================================================================
@@ -49,6 +128,7 @@ def check_before_agent(callback_context: CallbackContext) -> types.Content | Non
 
     logger.info(f"\n[Callback] Entering agent: {agent_name} (Inv: {invocation_id})")
     logger.info("[Callback] Current State")
+    _start_agent_span(callback_context, "agent")
 
     return None
 
@@ -56,48 +136,16 @@ def check_before_agent(callback_context: CallbackContext) -> types.Content | Non
 def after_patient_agent_callback(callback_context: CallbackContext) -> types.Content | None:
     """
     This callback restructures the agent's output to include both the summary
-    and the detailed tool response.
+    and references to its tool results in the turn ledger.
 
     For A2A transmission, embeds structured data as JSON in the text output.
     """
     agent_name = callback_context.agent_name
     invocation_id = callback_context.invocation_id
     logger.info(f"[Callback] Exiting agent: {agent_name} (Invocation: {invocation_id})")
+    _end_agent_span(callback_context)
 
-    state = callback_context.state
-
-    # Get the agent's text output
-    agent_text_output = state.get('patient_agent_output', '')
-
-    # Get the detailed tool response as a list of dicts
-    tool_response_list = state.get('patient_data_agent_tool_response', [])
-
-    # Merge the list of dicts into a single dict for better frontend display
-    # Each dict has a single key (query, schema_resolved, sql_generated, etc.)
-    # Merge them into one object: {query: "...", schema_resolved: {...}, ...}
-    merged_tool_response = {}
-    for item in tool_response_list:
-        if isinstance(item, dict):
-            merged_tool_response.update(item)
-
-    # Wrap in a list to match JsonResponseFormatter expected format
-    tool_response = [merged_tool_response] if merged_tool_response else []
-
-    # Restructure agent_output to include both
-    state['patient_agent_output'] = {
-        'summary': agent_text_output,
-        'tool_response': tool_response
-    }
-
-    # For A2A: Return structured data as plain JSON (no delimiters)
-    # The orchestrator will parse this JSON directly
-    structured_data = {
-        'summary': agent_text_output,
-        'tool_response': tool_response
-    }
-
-    # Return plain JSON as Content for A2A transmission
-    return types.Content(parts=[types.Part(text=json.dumps(structured_data))])
+    return _finish_data_agent_turn(callback_context, 'patient_agent_output')
 
 
 def check_before_tool_patient(
@@ -107,7 +155,9 @@ def check_before_tool_patient(
     agent_name = tool_context.agent_name
     tool_name = tool.name
     logger.info(f"[Callback] Before tool call for tool '{tool_name}' in agent '{agent_name}'")
+    _start_tool_span(tool, tool_context)
     logger.info(f"[Callback] Original args: {args}")
+    turn_ledger.get_ledger().record_call(tool_context, tool_name, args)
 
     # Generate or retrieve a conversation ID if needed
     patient_data_agent_conversation_id = tool_context.state.get('patient_data_agent_conversation_id')
@@ -130,48 +180,16 @@ def check_before_tool_patient(
 def after_medication_agent_callback(callback_context: CallbackContext) -> types.Content | None:
     """
     This callback restructures the agent's output to include both the summary
-    and the detailed tool response.
+    and references to its tool results in the turn ledger.
 
     For A2A transmission, embeds structured data as JSON in the text output.
     """
     agent_name = callback_context.agent_name
     invocation_id = callback_context.invocation_id
     logger.info(f"[Callback] Exiting agent: {agent_name} (Invocation: {invocation_id})")
+    _end_agent_span(callback_context)
 
-    state = callback_context.state
-
-    # Get the agent's text output (using the correct output_key)
-    agent_text_output = state.get('medication_agent_output', '')
-
-    # Get the detailed tool response as a list of dicts
-    tool_response_list = state.get('medication_data_agent_tool_response', [])
-
-    # Merge the list of dicts into a single dict for better frontend display
-    # Each dict has a single key (query, schema_resolved, sql_generated, etc.)
-    # Merge them into one object: {query: "...", schema_resolved: {...}, ...}
-    merged_tool_response = {}
-    for item in tool_response_list:
-        if isinstance(item, dict):
-            merged_tool_response.update(item)
-
-    # Wrap in a list to match JsonResponseFormatter expected format
-    tool_response = [merged_tool_response] if merged_tool_response else []
-
-    # Restructure medication_agent_output to include both
-    state['medication_agent_output'] = {
-        'summary': agent_text_output,
-        'tool_response': tool_response
-    }
-
-    # For A2A: Return structured data as plain JSON (no delimiters)
-    # The orchestrator will parse this JSON directly
-    structured_data = {
-        'summary': agent_text_output,
-        'tool_response': tool_response
-    }
-
-    # Return plain JSON as Content for A2A transmission
-    return types.Content(parts=[types.Part(text=json.dumps(structured_data))])
+    return _finish_data_agent_turn(callback_context, 'medication_agent_output')
 
 
 def check_before_tool_medication(
@@ -181,7 +199,9 @@ def check_before_tool_medication(
     agent_name = tool_context.agent_name
     tool_name = tool.name
     logger.info(f"[Callback] Before tool call for tool '{tool_name}' in agent '{agent_name}'")
+    _start_tool_span(tool, tool_context)
     logger.info(f"[Callback] Original args: {args}")
+    turn_ledger.get_ledger().record_call(tool_context, tool_name, args)
 
     # Generate or retrieve a conversation ID if needed
     medication_data_agent_conversation_id = tool_context.state.get('medication_data_agent_conversation_id')
@@ -204,45 +224,16 @@ def check_before_tool_medication(
 def after_pbm_agent_callback(callback_context: CallbackContext) -> types.Content | None:
     """
     This callback restructures the PBM agent's output to include both the summary
-    and the detailed tool response.
+    and references to its tool results in the turn ledger.
 
     For A2A transmission, embeds structured data as JSON in the text output.
     """
     agent_name = callback_context.agent_name
     invocation_id = callback_context.invocation_id
     logger.info(f"[Callback] Exiting agent: {agent_name} (Invocation: {invocation_id})")
+    _end_agent_span(callback_context)
 
-    state = callback_context.state
-
-    # Get the agent's text output (using the correct output_key)
-    agent_text_output = state.get('pbm_agent_output', '')
-
-    # Get the detailed tool response as a list of dicts
-    tool_response_list = state.get('pbm_data_agent_tool_response', [])
-
-    # Merge the list of dicts into a single dict for better frontend display
-    merged_tool_response = {}
-    for item in tool_response_list:
-        if isinstance(item, dict):
-            merged_tool_response.update(item)
-
-    # Wrap in a list to match JsonResponseFormatter expected format
-    tool_response = [merged_tool_response] if merged_tool_response else []
-
-    # Restructure pbm_agent_output to include both
-    state['pbm_agent_output'] = {
-        'summary': agent_text_output,
-        'tool_response': tool_response
-    }
-
-    # For A2A: Return structured data as plain JSON (no delimiters)
-    structured_data = {
-        'summary': agent_text_output,
-        'tool_response': tool_response
-    }
-
-    # Return plain JSON as Content for A2A transmission
-    return types.Content(parts=[types.Part(text=json.dumps(structured_data))])
+    return _finish_data_agent_turn(callback_context, 'pbm_agent_output')
 
 
 def check_before_tool_pbm(
@@ -252,7 +243,9 @@ def check_before_tool_pbm(
     agent_name = tool_context.agent_name
     tool_name = tool.name
     logger.info(f"[Callback] Before tool call for tool '{tool_name}' in agent '{agent_name}'")
+    _start_tool_span(tool, tool_context)
     logger.info(f"[Callback] Original args: {args}")
+    turn_ledger.get_ledger().record_call(tool_context, tool_name, args)
 
     # Generate or retrieve a conversation ID if needed
     pbm_data_agent_conversation_id = tool_context.state.get('pbm_data_agent_conversation_id')
@@ -277,8 +270,9 @@ def check_after_tool(tool: BaseTool, args: dict[str, Any], tool_context: ToolCon
     agent_name = tool_context.agent_name
     logger.info(f'[Callback] after_tool_callback for agent: {agent_name}')
     logger.info(f"[Callback] ✅ Tool {tool.name} finished.")
+    _end_tool_span(tool_context, tool_response)
     logger.info(f"[Callback] Tool args: {args}")
-    logger.info(f"[Callback] Tool response - {tool_response}")
+    log_payload(logger, "[Callback] Tool response", tool_response)
 
     # Return None to use the tool's response as is.
     return None
@@ -292,7 +286,7 @@ def before_agent_callback(callback_context: CallbackContext) -> types.Content |
     """
     Callback executed before the agent processes a new user message.
 
-    Clears the tool_calls and tool_responses lists to ensure each turn starts fresh.
+    Clears the tool_calls, tool_responses and turn ledger to ensure each turn starts fresh.
     """
     state = callback_context.state
 
@@ -305,6 +299,15 @@ def before_agent_callback(callback_context: CallbackContext) -> types.Content |
         logger.info("[A2A Orchestrator] Clearing tool_responses from previous turn")
         state['tool_responses'] = []
 
+    if turn_ledger.LEDGER_KEY in state:
+        state[turn_ledger.LEDGER_KEY] = {}
+
+    # Sub-agents called as tools leave storing their results to after_orchestrator_callback
+    if state.get(turn_ledger.LEDGER_OWNER_KEY) != callback_context.agent_name:
+        state[turn_ledger.LEDGER_OWNER_KEY] = callback_context.agent_name
+    turn_ledger.get_ledger().pop(callback_context.invocation_id)
+    _start_agent_span(callback_context, "orchestrator_turn")
+
     return None
 
 
@@ -320,17 +323,11 @@ def before_tool_callback(
     agent_name = tool_context.agent_name
 
     logger.info(f"[A2A Orchestrator] Agent '{agent_name}' calling tool: {tool_name}")
+    _start_tool_span(tool, tool_context)
     logger.info(f"[A2A Orchestrator] Tool input: {args}")
 
-    # Store tool call info in state for later reference
-    state = tool_context.state
-    if 'tool_calls' not in state:
-        state['tool_calls'] = []
-
-    state['tool_calls'].append({
-        'tool_name': tool_name,
-        'input': str(args)
-    })
+    # Record the call for this turn; after_orchestrator_callback writes it to state
+    turn_ledger.get_ledger().record_call(tool_context, tool_name, args)
 
     # Return None to proceed with tool execution
     return None
@@ -349,8 +346,8 @@ def after_tool_callback(
     agent_name = tool_context.agent_name
 
     logger.info(f"[A2A Orchestrator] Tool '{tool_name}' in agent '{agent_name}' completed")
-    logger.info(f"[A2A Orchestrator] Tool response type: {type(tool_response)}")
-    logger.info(f"[A2A Orchestrator] Tool response: {tool_response}")
+    _end_tool_span(tool_context, tool_response)
+    log_payload(logger, "[A2A Orchestrator] Tool response", tool_response)
 
 
     # Parse structured data from A2A responses
@@ -371,16 +368,8 @@ def after_tool_callback(
         logger.info(f"[A2A Orchestrator] Tool response is already a dict (keys: {list(tool_response.keys())})")
         structured_response = tool_response
 
-    # Store the extracted structured data
-    state = tool_context.state
-    if 'tool_responses' not in state:
-        state['tool_responses'] = []
-
-    # Store the structured response (or the original if extraction failed)
-    state['tool_responses'].append({
-        'tool_name': tool_name,
-        'response': structured_response if structured_response else tool_response
-    })
+    # Record the structured response (or the original if extraction failed) for this turn
+    turn_ledger.get_ledger().record_result(tool_context, structured_response if structured_response else tool_response)
 
     # Return None to use original tool response
     return None
@@ -388,19 +377,29 @@ def after_tool_callback(
 
 def after_orchestrator_callback(callback_context: CallbackContext) -> types.Content | None:
     """
-    Callback to structure the orchestrator's output for the frontend.
-
-    When the orchestrator calls A2A agent tools, this captures their response
-    and structures it in a format compatible with the frontend.
+    Callback to structure the orchestrator's output and store this turn's tool results.
+
+    Each result is stored once, in state['turn_ledger'], keyed by function call
+    ID as {'tool_name', 'input', 'result'}. Outputs refer to it by that ID, not
+    by copy: each group in state['agent_output']['tool_response'] lists its IDs
+    under 'results', state['tool_responses'] lists all of them, and so does each
+    '*_agent_output'['tool_response']. Readers get the payload from
+    state['turn_ledger'][function_call_id]['result'] (see README).
     """
     state = callback_context.state
     agent_text_output = state.get('agent_output', '')
 
-    # Get tool calls and responses
-    tool_calls = state.get('tool_calls', [])
-    tool_responses = state.get('tool_responses', [])
+    # Collect this turn's tool calls and responses in the order the model issued them. A call and
+    # its response share one entry keyed by function call ID, so repeated calls to a tool stay paired.
+    turn_entries = turn_ledger.get_ledger().pop(callback_context.invocation_id)
+    tool_calls = [
+        {'tool_name': entry['tool_name'], 'input': entry['input'], 'function_call_id': function_call_id}
+        for function_call_id, entry in turn_entries.items() if 'tool_name' in entry
+    ]
+    _end_agent_span(callback_context, {"adk.tool_calls": len(tool_calls)})
+    state['tool_calls'] = tool_calls
 
-    logger.info(f"[A2A Orchestrator] Processing {len(tool_calls)} tool calls and {len(tool_responses)} responses")
+    logger.info(f"[A2A Orchestrator] Processing {len(tool_calls)} tool calls and {sum('result' in entry for entry in turn_entries.values())} responses")
 
     # Agent metadata for better frontend display (generic, extensible)
     agent_metadata = {
@@ -435,53 +434,44 @@ def after_orchestrator_callback(callback_context: CallbackContext) -> types.Cont
         }
     }
 
-    # Pair each tool call with its response for grouped display
+    # Each tool result is stored once, in the turn ledger; grouped results refer to it by function call ID
+    ledger = {}
     grouped_tool_results = []
 
-    for tool_call in tool_calls:
+    for function_call_id, tool_call in turn_entries.items():
+        if 'tool_name' not in tool_call or 'result' not in tool_call:
+            logger.warning(f"[A2A Orchestrator] No matching tool call and response for function call {function_call_id}")
+            continue
         tool_name = tool_call['tool_name']
         tool_input = tool_call['input']
-
-        # Find corresponding response by matching tool_name (not by index)
-        tool_response = None
-        for resp in tool_responses:
-            if resp.get('tool_name') == tool_name:
-                tool_response = resp
-                break
-
-        if not tool_response:
-            logger.warning(f"[A2A Orchestrator] No matching tool response found for {tool_name}")
-            continue
-
-        response_data = tool_response.get('response', {})
-
-        # Special handling for google_search_agent - it returns a string response, not structured data
-        if tool_name == 'google_search_agent' and isinstance(response_data, str):
-            logger.info(f"[A2A Orchestrator] google_search_agent string response detected (length: {len(response_data)})")
-            merged_data = {'text': response_data}  # Store the structured markdown text
-        # Extract tool_response list from structured response
-        elif isinstance(response_data, dict) and 'tool_response' in response_data:
-            tool_data_list = response_data.get('tool_response', [])
-            logger.info(f"[A2A Orchestrator] tool_data_list has {len(tool_data_list)} items")
-            # Merge list items into single dict
-            merged_data = {}
-            for item in tool_data_list:
-                if isinstance(item, dict):
-                    merged_data.update(item)
-            logger.info(f"[A2A Orchestrator] merged_data keys: {list(merged_data.keys())}")
-        elif isinstance(response_data, list):
-            # Merge list items
-            merged_data = {}
-            for item in response_data:
-                if isinstance(item, dict):
-                    merged_data.update(item)
-            logger.info(f"[A2A Orchestrator] merged_data keys (from list): {list(merged_data.keys())}")
-        elif isinstance(response_data, dict):
-            merged_data = response_data
-            logger.info(f"[A2A Orchestrator] merged_data keys (direct dict): {list(merged_data.keys())}")
+        response_data = tool_call['result']
+
+        # Data sub-agents return one result per data tool call, with the function call IDs their own output refers to
+        result_ids = response_data.get('function_call_ids') if isinstance(response_data, dict) else None
+        if result_ids and len(result_ids) == len(response_data.get('tool_response', [])):
+            for result_id, item in zip(result_ids, response_data['tool_response'], strict=True):
+                ledger[result_id] = {'tool_name': tool_name, 'input': tool_input, 'result': item}
+            logger.info(f"[A2A Orchestrator] Stored {len(result_ids)} results from {tool_name}")
         else:
-            merged_data = {}
-            logger.warning(f"[A2A Orchestrator] response_data is not a recognized type: {type(response_data)}")
+            # Special handling for google_search_agent - it returns a string response, not structured data
+            if tool_name == 'google_search_agent' and isinstance(response_data, str):
+                logger.info(f"[A2A Orchestrator] google_search_agent string response detected (length: {len(response_data)})")
+                merged_data = {'text': response_data}  # Store the structured markdown text
+            # Extract tool_response list from structured response
+            elif isinstance(response_data, dict) and 'tool_response' in response_data:
+                merged_data = turn_ledger.merge_items(response_data.get('tool_response', []))
+                logger.info(f"[A2A Orchestrator] merged_data keys: {list(merged_data.keys())}")
+            elif isinstance(response_data, list):
+                merged_data = turn_ledger.merge_items(response_data)
+                logger.info(f"[A2A Orchestrator] merged_data keys (from list): {list(merged_data.keys())}")
+            elif isinstance(response_data, dict):
+                merged_data = response_data
+                logger.info(f"[A2A Orchestrator] merged_data keys (direct dict): {list(merged_data.keys())}")
+            else:
+                merged_data = {}
+                logger.warning(f"[A2A Orchestrator] response_data is not a recognized type: {type(response_data)}")
+            ledger[function_call_id] = {'tool_name': tool_name, 'input': tool_input, 'result': merged_data}
+            result_ids = [function_call_id]
 
         # Add tool metadata (generic fallback for unknown tools)
         metadata = agent_metadata.get(tool_name, {
@@ -497,11 +487,15 @@ def after_orchestrator_callback(callback_context: CallbackContext) -> types.Cont
             'tool_name': tool_name,
             'tool_input': tool_input,
             'tool_metadata': metadata,
-            **merged_data  # Spread all response data (query, schema, sql, data, text, etc.)
+            'function_call_id': function_call_id,
+            'results': list(result_ids),  # Ledger keys of the response data (query, schema, sql, data, text, etc.)
         }
 
         grouped_tool_results.append(grouped_result)
-        logger.info(f"[A2A Orchestrator] Grouped result for {tool_name} with {len(merged_data)} data fields")
+        logger.info(f"[A2A Orchestrator] Grouped result for {tool_name} with {len(result_ids)} result(s)")
+
+    state[turn_ledger.LEDGER_KEY] = ledger
+    state['tool_responses'] = list(ledger)
 
     # Extract grounding metadata if google_search_agent was called
     grounding_metadata = state.get('grounding_metadata')
@@ -530,9 +524,7 @@ def collect_search_sources_callback(callback_context: CallbackContext) -> types.
     logger.info("[DEBUG] Google Search Agent Output (RAW)")
     logger.info("=" * 80)
     agent_output = state.get('agent_output', '')
-    logger.info(f"[DEBUG] Agent output type: {type(agent_output)}")
-    logger.info(f"[DEBUG] Agent output length: {len(str(agent_output)) if agent_output else 0}")
-    logger.info(f"[DEBUG] Agent output:\n{agent_output}")
+    log_payload(logger, "[DEBUG] Agent output", agent_output)
     logger.info("=" * 80)
 
     sources = []
@@ -0,0 +1,376 @@
+'''
+File: chat_stream.py
+Project: adk-data-analytics
+File Created: Sunday, 18th October 2026 4:31:47 pm
+-------------------------------------------------------------
+Copyright 2025 Google LLC. This software is provided as-is, without
+warranty or representation for any use or purpose. Your use of it is
+subject to your agreement with Google.
+Licensed under the Apache License, Version 2.0 (the 'License');
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an 'AS IS' BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import ClassVar
+
+from google.api_core import exceptions as core_exceptions
+from google.api_core import retry as retries
+from google.api_core import retry_async
+
+from . import config_project, metrics, stream_capture, tracing
+from .data_agent_helper import message_kind, show_message
+from .utils_google_logging import get_logger
+
+logger = get_logger(__name__)
+
+# Transient failures worth retrying. CreateConversation carries a client-generated
+# conversation ID, so a retry can never create a second conversation.
+_RETRYABLE_ERRORS = (
+    core_exceptions.ServiceUnavailable,
+    core_exceptions.DeadlineExceeded,
+    core_exceptions.InternalServerError,
+    core_exceptions.Aborted,
+)
+
+_first_message_latency = metrics.histogram("ca_chat_first_message_seconds", "Time from Chat request to the first streamed message.", ("agent",))
+_deadlines = metrics.counter("ca_chat_deadline_exceeded_total", "CA chat streams cut off by a deadline, by stage.", ("agent", "stage"))
+_hedges = metrics.counter("ca_chat_hedges_total", "Hedged CA chat requests, by the attempt that won.", ("agent", "winner"))
+_stage_latency = metrics.histogram(
+    "ca_stream_stage_seconds",
+    "Time from Chat request to the first schema/sql/data/chart message, and to the end of the stream (total).",
+    ("agent", "stage"),
+)
+_result_rows = metrics.histogram("ca_stream_result_rows", "Rows returned per CA chat stream.", ("agent",), buckets=metrics.ROW_COUNT_BUCKETS)
+_stream_bytes = metrics.histogram("ca_stream_bytes", "Serialized bytes received per CA chat stream.", ("agent",), buckets=metrics.BYTE_SIZE_BUCKETS)
+_create_retries = metrics.counter("ca_create_conversation_retries_total", "CreateConversation attempts retried after a transient error.", ("agent",))
+
+
+class StreamDeadlineExceededError(Exception):
+    """Raised when a CA chat stream misses its time-to-first-message deadline."""
+
+    def __init__(self, agent_id: str, timeout_s: float):
+        super().__init__(f"The data agent sent nothing within {timeout_s} seconds.")
+        self.agent_id = agent_id
+        self.timeout_s = timeout_s
+
+
+class LatencyTracker:
+    """Rolling window of recent time-to-first-message samples for one data agent."""
+
+    def __init__(self, window: int):
+        self._samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self._samples.append(value)
+
+    def percentile(self, q: float, min_samples: int) -> float | None:
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < min_samples:
+            return None
+        return samples[min(len(samples) - 1, math.ceil(q * len(samples)) - 1)]
+
+
+# Opens sync Chat streams so a slow first message can be timed out from the calling thread
+_open_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="ca-chat-open")
+
+_trackers: dict[str, LatencyTracker] = {}
+_trackers_lock = threading.Lock()
+
+
+def _tracker(agent_id: str) -> LatencyTracker:
+    with _trackers_lock:
+        tracker = _trackers.get(agent_id)
+        if tracker is None:
+            tracker = _trackers[agent_id] = LatencyTracker(config_project.CA_CHAT_HEDGE_WINDOW)
+        return tracker
+
+
+def _observe_first_message(agent_id: str, started: float):
+    elapsed = time.perf_counter() - started
+    _tracker(agent_id).observe(elapsed)
+    _first_message_latency.observe(elapsed, agent=agent_id)
+
+
+class StreamObserver:
+    """Times the stages of one Chat stream as its messages arrive.
+
+    Each message is converted with show_message and becomes a span event with
+    its offset from the Chat request. When the stream completes, the offsets of
+    the first schema resolution, SQL, data and chart messages and the total
+    stream time are recorded per agent, together with the rows and bytes the
+    stream returned, and the stream is saved if capture is enabled.
+    """
+
+    # show_message part -> stage label
+    STAGES: ClassVar[dict[str, str]] = {"schema_resolved": "schema", "sql_generated": "sql", "data_retrieved": "data", "chart_result": "chart"}
+
+    def __init__(self, agent_id: str, started: float):
+        self.agent_id = agent_id
+        self.started = started
+        self.stage_offsets: dict[str, float] = {}
+        self.rows = 0
+        self.bytes = 0
+        self.recorder = stream_capture.start_recorder(agent_id)
+
+    def on_message(self, response) -> dict:
+        """Converts a streamed message and records its timing; returns the show_message output."""
+        offset = time.perf_counter() - self.started
+        raw = type(response).pb(response)
+        if self.recorder:
+            self.recorder.record(offset, raw)
+        message = show_message(response)
+        self.bytes += raw.ByteSize()
+        part = next(iter(message), "")
+        tracing.add_event("ca.message", {"kind": message_kind(response), "part": part, "offset_ms": round(offset * 1000, 1)})
+        stage = self.STAGES.get(part)
+        if stage and stage not in self.stage_offsets:
+            self.stage_offsets[stage] = offset
+        if part == "data_retrieved":
+            self.rows += len(raw.system_message.data.result.data)
+        return message
+
+    def finish(self):
+        total = time.perf_counter() - self.started
+        for stage, offset in self.stage_offsets.items():
+            _stage_latency.observe(offset, agent=self.agent_id, stage=stage)
+        _stage_latency.observe(total, agent=self.agent_id, stage="total")
+        if "data" in self.stage_offsets:
+            _result_rows.observe(self.rows, agent=self.agent_id)
+        _stream_bytes.observe(self.bytes, agent=self.agent_id)
+        tracing.set_attributes({"ca.rows": self.rows, "ca.bytes": self.bytes})
+        if self.recorder:
+            self.recorder.save()
+
+
+def hedge_delay(agent_id: str) -> float | None:
+    """Returns how long to wait for a first message before hedging, or None until enough samples exist."""
+    p = _tracker(agent_id).percentile(config_project.CA_CHAT_HEDGE_PERCENTILE, config_project.CA_CHAT_HEDGE_MIN_SAMPLES)
+    return None if p is None else max(p, config_project.CA_CHAT_HEDGE_MIN_DELAY_S)
+
+
+# ----------------------------------------------------------------------------
+# CreateConversation
+# ----------------------------------------------------------------------------
+
+def _create_retry_kwargs(agent_id: str) -> dict:
+    return {
+        "predicate": retries.if_exception_type(*_RETRYABLE_ERRORS),
+        "initial": 0.5,
+        "maximum": 4.0,
+        "multiplier": 2.0,
+        "timeout": config_project.CA_CREATE_CONVERSATION_RETRY_DEADLINE_S,
+        "on_error": lambda e: _create_retries.inc(agent=agent_id),
+    }
+
+
+def create_conversation(client, request, agent_id: str):
+    """Creates a conversation, retrying transient errors and treating ALREADY_EXISTS as success."""
+    try:
+        client.create_conversation(
+            request=request,
+            retry=retries.Retry(**_create_retry_kwargs(agent_id)),
+            timeout=config_project.CA_CREATE_CONVERSATION_TIMEOUT_S,
+        )
+    except core_exceptions.AlreadyExists:
+        # An earlier attempt whose response was lost already created it
+        logger.info(f"Conversation {request.conversation_id} already exists, reusing it.")
+
+
+async def create_conversation_async(client, request, agent_id: str):
+    """Async counterpart of create_conversation."""
+    try:
+        await client.create_conversation(
+            request=request,
+            retry=retry_async.AsyncRetry(**_create_retry_kwargs(agent_id)),
+            timeout=config_project.CA_CREATE_CONVERSATION_TIMEOUT_S,
+        )
+    except core_exceptions.AlreadyExists:
+        logger.info(f"Conversation {request.conversation_id} already exists, reusing it.")
+
+
+# ----------------------------------------------------------------------------
+# Chat streams
+# ----------------------------------------------------------------------------
+
+def collect_chat(agent_id: str, open_stream, first_message_timeout_s: float) -> list[dict]:
+    """Opens and drains a sync Chat stream under a time-to-first-message deadline.
+
+    The sync client reads the first message while opening the stream, so the
+    open runs on a worker thread; a stream that shows up after the deadline is
+    cancelled. The whole-stream deadline is the gRPC timeout open_stream sets.
+    """
+    started = time.perf_counter()
+    future = _open_executor.submit(open_stream)
+    try:
+        stream = future.result(timeout=first_message_timeout_s)
+    except FutureTimeoutError:
+        future.add_done_callback(lambda f: f.exception() is None and f.result().cancel())
+        _deadlines.inc(agent=agent_id, stage="first_message")
+        raise StreamDeadlineExceededError(agent_id, first_message_timeout_s) from None
+    _observe_first_message(agent_id, started)
+    observer = StreamObserver(agent_id, started)
+    responses = []
+    try:
+        for response in stream:
+            # In stateful chat, we don't need to manage the conversation history client-side.
+            message = observer.on_message(response)
+            if message:
+                responses.append(message)
+    except core_exceptions.DeadlineExceeded:
+        _deadlines.inc(agent=agent_id, stage="stream")
+        raise
+    observer.finish()
+    return responses
+
+
+async def _drain_async(observer: StreamObserver, first, stream) -> list[dict]:
+    """Converts the first message and the rest of the stream, then records the stream's timings."""
+    responses = []
+    message = observer.on_message(first)
+    if message:
+        responses.append(message)
+    async for response in stream:
+        message = observer.on_message(response)
+        if message:
+            responses.append(message)
+    observer.finish()
+    return responses
+
+
+async def collect_chat_async(agent_id: str, open_stream, first_message_timeout_s: float, claim=None, observe_first_message: bool = True) -> list[dict] | None:
+    """Opens and drains an async Chat stream under a time-to-first-message deadline.
+
+    Args:
+        agent_id: The data agent the stream belongs to, for metrics.
+        open_stream: Zero-argument coroutine function returning the stream.
+        first_message_timeout_s: How long opening the stream and receiving
+            its first message may take.
+        claim: Optional callable invoked on the first message; when it returns
+            False another attempt already won and the stream is abandoned.
+        observe_first_message: Whether the time to the first message feeds the
+            latency window hedge_delay reads. Hedges pass False: they only start
+            once the primary is slow, so their timing would skew it.
+
+    Returns:
+        The converted messages, or None if the stream lost a hedging race.
+    """
+    started = time.perf_counter()
+    opened = {}
+
+    async def first_message():
+        opened["stream"] = await open_stream()
+        return await anext(aiter(opened["stream"]), None)
+
+    exhausted = False
+    try:
+        try:
+            first = await asyncio.wait_for(first_message(), first_message_timeout_s)
+        except TimeoutError:
+            _deadlines.inc(agent=agent_id, stage="first_message")
+            raise StreamDeadlineExceededError(agent_id, first_message_timeout_s) from None
+        if first is None:
+            exhausted = True
+            return []
+        if observe_first_message:
+            _observe_first_message(agent_id, started)
+        if claim is not None and not claim():
+            return None
+        responses = await _drain_async(StreamObserver(agent_id, started), first, opened["stream"])
+        exhausted = True
+        return responses
+    except core_exceptions.DeadlineExceeded:
+        _deadlines.inc(agent=agent_id, stage="stream")
+        raise
+    finally:
+        if not exhausted and "stream" in opened:
+            # Abandoned or cut off streams are cancelled so the RPC doesn't keep running server-side
+            opened["stream"].cancel()
+
+
+def _claimer(winner: asyncio.Future, label: str):
+    def claim():
+        if winner.done():
+            return False
+        winner.set_result(label)
+        return True
+    return claim
+
+
+async def _chat_attempt(agent_id: str, label: str, open_stream, first_message_timeout_s: float, winner: asyncio.Future):
+    with tracing.span("ca.chat.attempt", {"attempt": label}):
+        return await collect_chat_async(
+            agent_id, open_stream, first_message_timeout_s, _claimer(winner, label), observe_first_message=label == "primary"
+        )
+
+
+async def _launch_hedge_if_slow(agent_id: str, tasks: dict, winner: asyncio.Future, open_hedge, hedge_delay_s: float, first_message_timeout_s: float):
+    """Starts the hedge if neither a first message nor the primary's end arrives within hedge_delay_s."""
+    done, _ = await asyncio.wait([winner, tasks["primary"]], timeout=hedge_delay_s, return_when=asyncio.FIRST_COMPLETED)
+    if not done:
+        logger.info(f"No first message from {agent_id} after {hedge_delay_s:.1f}s, sending a hedged request.")
+        tasks["hedge"] = asyncio.create_task(_chat_attempt(agent_id, "hedge", open_hedge, first_message_timeout_s, winner))
+
+
+async def _await_winner(agent_id: str, tasks: dict, winner: asyncio.Future) -> tuple[str, list[dict]]:
+    """Waits for the attempt that claims the first message, or for one that ends cleanly without any."""
+    while True:
+        if winner.done():
+            label = winner.result()
+            for other, task in tasks.items():
+                if other != label:
+                    task.cancel()
+            if len(tasks) > 1:
+                _hedges.inc(agent=agent_id, winner=label)
+            return label, await tasks[label]
+        for label, task in tasks.items():
+            # A stream that ended without any message also settles the race
+            if task.done() and not task.cancelled() and task.exception() is None:
+                return label, task.result()
+        running = [task for task in tasks.values() if not task.done()]
+        if not running:
+            raise tasks["primary"].exception()
+        await asyncio.wait([*running, winner], return_when=asyncio.FIRST_COMPLETED)
+
+
+def _settle(tasks: dict):
+    """Cancels attempts still running and retrieves the exceptions of finished losers, so none goes unreported."""
+    for task in tasks.values():
+        if not task.done():
+            task.cancel()
+        elif not task.cancelled():
+            task.exception()
+
+
+async def hedged_chat_async(agent_id: str, open_primary, open_hedge, hedge_delay_s: float, first_message_timeout_s: float) -> tuple[str, list[dict]]:
+    """Runs a Chat stream, starting a hedge if the primary has sent nothing after hedge_delay_s.
+
+    Whichever attempt produces the first message wins and the other is
+    cancelled. A primary that fails before the hedge starts is not hedged.
+    If every attempt fails, the primary's error is raised.
+
+    Returns:
+        ("primary" | "hedge", messages of the winning stream).
+    """
+    winner = asyncio.get_running_loop().create_future()
+    tasks = {"primary": asyncio.create_task(_chat_attempt(agent_id, "primary", open_primary, first_message_timeout_s, winner))}
+    try:
+        await _launch_hedge_if_slow(agent_id, tasks, winner, open_hedge, hedge_delay_s, first_message_timeout_s)
+        return await _await_winner(agent_id, tasks, winner)
+    finally:
+        _settle(tasks)
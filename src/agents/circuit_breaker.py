@@ -0,0 +1,145 @@
+'''
+File: circuit_breaker.py
+Project: adk-data-analytics
+File Created: Sunday, 18th October 2026 5:12:36 pm
+-------------------------------------------------------------
+Copyright 2025 Google LLC. This software is provided as-is, without
+warranty or representation for any use or purpose. Your use of it is
+subject to your agreement with Google.
+Licensed under the Apache License, Version 2.0 (the 'License');
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an 'AS IS' BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+import threading
+import time
+from collections import deque
+
+from . import metrics
+from .utils_google_logging import get_logger
+
+logger = get_logger(__name__)
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+_state = metrics.gauge("data_agent_circuit_state", "Circuit state per data agent (0 closed, 1 half-open, 2 open).", ("agent",))
+_transitions = metrics.counter("data_agent_circuit_transitions_total", "Circuit state changes per data agent.", ("agent", "from_state", "to_state"))
+_rejected = metrics.counter("data_agent_circuit_rejected_total", "Calls failed fast while the circuit was open.", ("agent",))
+
+
+class CircuitBreaker:
+    """Tracks the health of one data agent over its last window_size calls.
+
+    The circuit opens once at least min_calls outcomes are recorded and either
+    the failure rate reaches failure_rate or the share of calls slower than
+    slow_call_s reaches slow_call_rate. While open, allow() refuses calls for
+    open_s seconds; the circuit then goes half-open and lets half_open_calls
+    probes through. All probes succeeding closes it, any failure re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window_size: int,
+        min_calls: int,
+        failure_rate: float,
+        slow_call_s: float,
+        slow_call_rate: float,
+        open_s: float,
+        half_open_calls: int,
+    ):
+        self.name = name
+        self._min_calls = min_calls
+        self._failure_rate = failure_rate
+        self._slow_call_s = slow_call_s
+        self._slow_call_rate = slow_call_rate
+        self._open_s = open_s
+        self._half_open_calls = half_open_calls
+        self._lock = threading.Lock()
+        self._outcomes: deque[tuple[bool, bool]] = deque(maxlen=window_size)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probes_succeeded = 0
+        _state.set(_STATE_VALUES[CLOSED], agent=name)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def retry_after_s(self) -> float:
+        """Seconds until an open circuit lets a probe through."""
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self._open_s - time.monotonic())
+
+    def _transition(self, state: str):
+        logger.warning(f"Circuit for {self.name} {self._state} -> {state}")
+        _transitions.inc(agent=self.name, from_state=self._state, to_state=state)
+        _state.set(_STATE_VALUES[state], agent=self.name)
+        self._state = state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        if state == HALF_OPEN:
+            self._probes_in_flight = 0
+            self._probes_succeeded = 0
+        if state == CLOSED:
+            self._outcomes.clear()
+
+    def allow(self) -> bool:
+        """Returns True if a call may proceed. Every allowed call must be followed by record()."""
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self._open_s:
+                self._transition(HALF_OPEN)
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._probes_in_flight + self._probes_succeeded < self._half_open_calls:
+                self._probes_in_flight += 1
+                return True
+        _rejected.inc(agent=self.name)
+        return False
+
+    def record(self, failed: bool | None, latency_s: float = 0.0):
+        """Records the outcome of an allowed call; failed=None means it produced no health signal."""
+        slow = latency_s > self._slow_call_s
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if failed is None:
+                    return
+                if failed or slow:
+                    self._transition(OPEN)
+                    return
+                self._probes_succeeded += 1
+                if self._probes_succeeded >= self._half_open_calls:
+                    self._transition(CLOSED)
+                return
+            if failed is None or self._state != CLOSED:
+                return
+            self._outcomes.append((failed, slow))
+            total = len(self._outcomes)
+            if total < self._min_calls:
+                return
+            failures = sum(1 for f, _ in self._outcomes if f)
+            slow_calls = sum(1 for _, s in self._outcomes if s)
+            if failures / total >= self._failure_rate or slow_calls / total >= self._slow_call_rate:
+                self._transition(OPEN)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "state": self._state,
+                "window_calls": len(self._outcomes),
+                "window_failures": sum(1 for f, _ in self._outcomes if f),
+            }
@@ -1,3 +1,4 @@
+import os
 
 PROJECT_ID = "project-agentspace-468314"
 PROJECT_LOCATION = "us-central1"
@@ -13,3 +14,133 @@ AGENT_ID_TO_CONFIG_DIR = {
     MEDICATION_INVENTORY_AGENT_ID: "medication_inventory",
     PBM_CLAIMS_AGENT_ID: "pbm_claims",
 }
+
+# Conversational Analytics API client pool (see ca_client_pool.py)
+CA_API_ENDPOINT = os.environ.get("CA_API_ENDPOINT", "geminidataanalytics.googleapis.com:443")
+# Plaintext channel without credentials, only for local stand-in servers such as scripts/fake_ca_server.py
+CA_API_INSECURE = os.environ.get("CA_API_INSECURE", "false").lower() == "true"
+CA_CLIENT_POOL_SIZE = 2
+CA_CHANNEL_KEEPALIVE_MS = 30000
+CA_CREDENTIALS_REFRESH_MARGIN_S = 300
+
+# Serve data-agent tools with DataChatServiceAsyncClient so CA streams don't block the event loop.
+# Set to False to fall back to the synchronous tools.
+USE_ASYNC_DATA_AGENT_TOOLS = True
+
+# Startup warm-up (see warmup.py): when the agent package is imported, resolve credentials, connect
+# the CA channels, verify every data agent with get_data_agent and load context files concurrently,
+# so a new instance is ready before its first request. Steps are bounded by the timeout.
+STARTUP_WARMUP = os.environ.get("STARTUP_WARMUP", "false").lower() == "true"
+STARTUP_WARMUP_TIMEOUT_S = float(os.environ.get("STARTUP_WARMUP_TIMEOUT_S", "20"))
+
+# Warm pool of pre-created CA conversations per data agent (see conversation_pool.py)
+WARM_CONVERSATION_POOL_ENABLED = True
+WARM_CONVERSATION_POOL_TARGET_SIZE = 4
+WARM_CONVERSATION_MAX_AGE_S = 3600
+WARM_CONVERSATION_REFILL_INTERVAL_S = 30
+
+# Layout of 'data_retrieved' payloads: "index" keeps the legacy {column: {row: value}} shape,
+# "columns" emits {column: [values]} and "records" emits [{column: value}].
+DATA_RESULT_LAYOUT = "index"
+
+# data_retrieved payloads at or above this size are stored once as an ADK artifact
+# (or under RESULT_STORE_DIR when no artifact service is configured) and referenced from state.
+RESULT_OFFLOAD_THRESHOLD_BYTES = 32 * 1024
+RESULT_STORE_DIR = ".adk/results"
+# Local result files are swept at most every RESULT_STORE_SWEEP_INTERVAL_S: files not written or
+# reused for RESULT_STORE_TTL_S are deleted, then the oldest until the directory fits RESULT_STORE_MAX_BYTES.
+# Sessions that outlive the TTL can no longer resolve their local data_ref handles.
+RESULT_STORE_TTL_S = 24 * 3600
+RESULT_STORE_MAX_BYTES = 1024 * 1024 * 1024
+RESULT_STORE_SWEEP_INTERVAL_S = 300
+
+# NL-to-SQL cache in front of the CA API (see nl_sql_cache.py). The SQLite backend is shared
+# by every worker process on the host. Only the first question of a CA conversation is cached
+# so context-dependent follow-ups always go through the API.
+NL_SQL_CACHE_ENABLED = True
+NL_SQL_CACHE_BACKEND = "sqlite"
+NL_SQL_CACHE_PATH = ".adk/nl_sql_cache.db"
+NL_SQL_CACHE_TTL_S = 24 * 3600
+NL_SQL_CACHE_MAX_ENTRIES = 5000
+BQ_QUERY_TIMEOUT_S = 60
+
+# SQL result cache keyed by (data agent, canonicalized SQL) (see sql_result_cache.py).
+# It caches the results of SQL served from the NL-to-SQL cache, so a domain's sql_result_cache
+# policy requires its nl_sql_cache policy. Results the CA API returns are not cached: their query
+# has already run, so the table watermarks to store with them can no longer be taken beforehand.
+# Entries are re-validated against per-table freshness once older than the table's max staleness.
+# Tables with a watermark column are probed with MAX(column); others use the table's last-modified time.
+# Set SQL_RESULT_CACHE_FRESHNESS_PROBE to "static" for the offline stand-in probe.
+SQL_RESULT_CACHE_ENABLED = True
+SQL_RESULT_CACHE_BACKEND = "sqlite"
+SQL_RESULT_CACHE_PATH = ".adk/sql_result_cache.db"
+SQL_RESULT_CACHE_TTL_S = 6 * 3600
+SQL_RESULT_CACHE_MAX_ENTRIES = 2000
+SQL_RESULT_CACHE_FRESHNESS_PROBE = "bigquery"
+SQL_RESULT_CACHE_TABLE_WATERMARKS = {
+    "patient_records.medication_inventory": "last_updated",
+    "patient_records.pbm_claims": "claim_date",
+}
+SQL_RESULT_CACHE_MAX_STALENESS_S = {
+    "patient_records.medication_inventory": 60,
+    "patient_records.pbm_claims": 300,
+    "patient_records.patient_encounters": 900,
+}
+SQL_RESULT_CACHE_DEFAULT_MAX_STALENESS_S = 300
+
+# Data-agent tool engine (see data_agent_tools.py). One tool is built per entry in
+# AGENT_ID_TO_CONFIG_DIR; DATA_AGENT_TOOL_POLICIES overrides the defaults per agent.
+# state_prefix defaults to the agent's config dir and names its tool and session-state keys.
+# Calls are admitted by an adaptive limiter (see adaptive_limiter.py): a token bucket of
+# rate_per_s/burst plus an AIMD concurrency window between min_ and max_concurrency that
+# shrinks on RESOURCE_EXHAUSTED or calls slower than latency_threshold_s. Up to max_queue
+# calls wait at most max_queue_wait_s for a slot before being shed.
+# timeout_s is the deadline for the whole CA chat stream and first_message_timeout_s for its
+# first message. hedge_requests sends a second first-turn request in its own conversation when
+# the first message is later than the recent CA_CHAT_HEDGE_PERCENTILE (see chat_stream.py).
+# The breaker_* keys configure each agent's circuit breaker (see circuit_breaker.py): it opens
+# when the failure rate or the share of calls slower than breaker_slow_call_s over the last
+# breaker_window calls crosses its threshold, and fails calls fast for breaker_open_s.
+DATA_AGENT_TOOL_DEFAULTS = {
+    "max_concurrency": 8,
+    "min_concurrency": 1,
+    "initial_concurrency": 4,
+    "rate_per_s": 5.0,
+    "burst": 10,
+    "max_queue": 32,
+    "max_queue_wait_s": 15,
+    "latency_threshold_s": 45,
+    "timeout_s": 120,
+    "first_message_timeout_s": 45,
+    "hedge_requests": False,
+    "breaker_window": 20,
+    "breaker_min_calls": 10,
+    "breaker_failure_rate": 0.5,
+    "breaker_slow_call_s": 90,
+    "breaker_slow_call_rate": 0.8,
+    "breaker_open_s": 30,
+    "breaker_half_open_calls": 2,
+    "nl_sql_cache": True,
+    "sql_result_cache": True,
+}
+DATA_AGENT_TOOL_POLICIES = {
+    PATIENT_ANALYTICS_AGENT_ID: {"state_prefix": "patient"},
+    MEDICATION_INVENTORY_AGENT_ID: {"state_prefix": "medication"},
+    PBM_CLAIMS_AGENT_ID: {"state_prefix": "pbm"},
+}
+
+# CA chat stream deadlines, retries and hedging (see chat_stream.py)
+CA_CREATE_CONVERSATION_TIMEOUT_S = 15
+CA_CREATE_CONVERSATION_RETRY_DEADLINE_S = 30
+CA_CHAT_HEDGE_PERCENTILE = 0.95
+CA_CHAT_HEDGE_WINDOW = 200
+CA_CHAT_HEDGE_MIN_SAMPLES = 20
+CA_CHAT_HEDGE_MIN_DELAY_S = 2.0
+
+# Opt-in capture of raw CA chat streams with message timing, for offline replay (see stream_capture.py).
+# Captures hold query results, so only enable this where the data may be stored.
+CA_STREAM_CAPTURE_DIR = os.environ.get("CA_STREAM_CAPTURE_DIR") or None
+CA_STREAM_CAPTURE_SAMPLE_RATE = float(os.environ.get("CA_STREAM_CAPTURE_SAMPLE_RATE", "1.0"))
+
+# Port for the Prometheus /metrics endpoint (see metrics.py); None leaves it off.
+METRICS_PORT = None
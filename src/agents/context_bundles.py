@@ -0,0 +1,327 @@
+'''
+File: context_bundles.py
+Project: adk-data-analytics
+File Created: Sunday, 18th October 2026 11:48:05 pm
+-------------------------------------------------------------
+Copyright 2025 Google LLC. This software is provided as-is, without
+warranty or representation for any use or purpose. Your use of it is
+subject to your agreement with Google.
+Licensed under the Apache License, Version 2.0 (the 'License');
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an 'AS IS' BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import yaml
+
+from .lazy_imports import lazy_import
+from .utils_google_logging import get_logger
+
+logger = get_logger(__name__)
+
+geminidataanalytics = lazy_import("google.cloud.geminidataanalytics")
+
+DATA_DIR = Path(__file__).parent.parent / 'data'
+BUNDLE_DIR = DATA_DIR / 'bundles'
+SOURCE_FILES = ('system_instructions.yaml', 'bigquery_data_context.json', 'ddl_and_dml.sql')
+# Bump when compile_context changes what it builds from the same sources
+BUNDLE_FORMAT_VERSION = 1
+BUNDLE_SUFFIX = '.ctx'
+
+_CREATE_TABLE_RE = re.compile(r"^\s*CREATE\s+(?:OR\s+REPLACE\s+)?TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?`?([\w.-]+)`?", re.IGNORECASE)
+_COLUMN_RE = re.compile(r"^\s*`?(\w+)`?\s+(STRING|INT64|INTEGER|FLOAT64|NUMERIC|BIGNUMERIC|BOOL|BOOLEAN|DATE|DATETIME|TIME|TIMESTAMP|BYTES|JSON|GEOGRAPHY|ARRAY|STRUCT)\b", re.IGNORECASE)
+_TABLE_REFERENCE_RE = re.compile(r"\b(?:FROM|JOIN)\s+`?([\w.-]+)`?", re.IGNORECASE)
+
+
+class ContextValidationError(ValueError):
+    """A domain's context files disagree with its DDL; errors lists every problem found."""
+
+    def __init__(self, config_dir: str, errors: list[str]):
+        super().__init__(f"Invalid context in src/data/{config_dir}: " + "; ".join(errors))
+        self.config_dir = config_dir
+        self.errors = errors
+
+
+@dataclass
+class BundleInfo:
+    """A compiled context bundle on disk."""
+
+    config_dir: str
+    content_hash: str
+    path: Path
+    size_bytes: int
+    warnings: list[str] = field(default_factory=list)
+
+
+# ----------------------------------------------------------------------------
+# Sources
+# ----------------------------------------------------------------------------
+
+def source_hash(config_dir: str) -> str:
+    """Returns the SHA-256 over the bundle format and a domain's source files."""
+    digest = hashlib.sha256(f"context-bundle-v{BUNDLE_FORMAT_VERSION}".encode())
+    for name in SOURCE_FILES:
+        payload = (DATA_DIR / config_dir / name).read_bytes()
+        digest.update(f"\0{name}\0{len(payload)}\0".encode())
+        digest.update(payload)
+    return digest.hexdigest()
+
+
+def parse_ddl_tables(ddl_text: str) -> dict[str, dict[str, str]]:
+    """Returns {table: {column: type}} for every CREATE TABLE in a DDL script.
+
+    Tables are keyed by their name as written, lowercased, e.g. "patient_records.pbm_claims".
+    """
+    tables: dict[str, dict[str, str]] = {}
+    columns = None
+    for line in ddl_text.splitlines():
+        match = _CREATE_TABLE_RE.match(line)
+        if match:
+            columns = tables.setdefault(match.group(1).lower(), {})
+            continue
+        if columns is None:
+            continue
+        if line.strip().startswith(")"):
+            columns = None
+            continue
+        match = _COLUMN_RE.match(line)
+        if match:
+            columns[match.group(1).lower()] = match.group(2).upper()
+    return tables
+
+
+def _ddl_columns(ddl_tables: dict[str, dict[str, str]], table_item: dict) -> dict[str, str] | None:
+    # DDL may name a table by table, dataset.table or project.dataset.table
+    for name in (
+        f"{table_item['project_id']}.{table_item['dataset_id']}.{table_item['table_id']}",
+        f"{table_item['dataset_id']}.{table_item['table_id']}",
+        table_item["table_id"],
+    ):
+        if name.lower() in ddl_tables:
+            return ddl_tables[name.lower()]
+    return None
+
+
+def _check_fields(table_name: str, table_item: dict, ddl_columns: dict[str, str], errors: list[str], warnings: list[str]):
+    # Each described field must be a DDL column, described once; undescribed columns only warn
+    names = [field_item["name"] for field_item in table_item.get("fields", [])]
+    for name in sorted({name for name in names if names.count(name) > 1}):
+        errors.append(f"{table_name}.{name} is described more than once")
+    for name in names:
+        if name.lower() not in ddl_columns:
+            errors.append(f"{table_name}.{name} is not a column in ddl_and_dml.sql")
+    undescribed = sorted(set(ddl_columns) - {name.lower() for name in names})
+    if undescribed:
+        warnings.append(f"{table_name} columns without a field description: {', '.join(undescribed)}")
+
+
+def _check_example_queries(example_queries: list[dict], known_tables: set[str], errors: list[str], warnings: list[str]):
+    for i, query_item in enumerate(example_queries):
+        if not query_item.get("natural_language_question") or not query_item.get("sql_query"):
+            errors.append(f"example query {i} needs both natural_language_question and sql_query")
+            continue
+        for table in _TABLE_REFERENCE_RE.findall(query_item["sql_query"]):
+            if table.lower() not in known_tables:
+                warnings.append(f"example query {i} reads {table}, which is not a table of this context")
+
+
+def validate_context(bq_context: dict, ddl_tables: dict[str, dict[str, str]]) -> tuple[list[str], list[str]]:
+    """Checks a bigquery_data_context.json against the DDL; returns (errors, warnings).
+
+    Errors: a table missing from the DDL, a field that is not a DDL column, a
+    duplicate field, an example query without question or SQL. Warnings: DDL
+    columns the context doesn't describe, example SQL that reads a table the
+    context doesn't declare.
+    """
+    errors, warnings = [], []
+    known_tables = set()
+    for table_item in bq_context.get("tables", []):
+        table_name = f"{table_item['dataset_id']}.{table_item['table_id']}"
+        known_tables.update(name.lower() for name in (
+            f"{table_item['project_id']}.{table_name}", table_name, table_item["table_id"],
+        ))
+        ddl_columns = _ddl_columns(ddl_tables, table_item)
+        if ddl_columns is None:
+            errors.append(f"table {table_name} has no CREATE TABLE in ddl_and_dml.sql")
+            continue
+        _check_fields(table_name, table_item, ddl_columns, errors, warnings)
+
+    _check_example_queries(bq_context.get("example_queries", []), known_tables, errors, warnings)
+    return errors, warnings
+
+
+# ----------------------------------------------------------------------------
+# Compiling
+# ----------------------------------------------------------------------------
+
+def compile_context(config_dir: str) -> tuple[geminidataanalytics.Context, list[str]]:
+    """Validates a domain's source files and builds its published Context; returns it with any warnings.
+
+    Raises:
+        ContextValidationError: The context files disagree with the DDL.
+    """
+    domain_dir = DATA_DIR / config_dir
+
+    # Load system instruction from system_instructions.yaml
+    with open(domain_dir / 'system_instructions.yaml') as file:
+        metadata_config = yaml.safe_load(file)
+    system_instruction = yaml.dump(metadata_config)
+
+    # Load BigQuery table context from bigquery_data_context.json
+    with open(domain_dir / 'bigquery_data_context.json') as file:
+        bq_context_config = json.load(file)
+
+    errors, warnings = validate_context(bq_context_config, parse_ddl_tables((domain_dir / 'ddl_and_dml.sql').read_text()))
+    if errors:
+        raise ContextValidationError(config_dir, errors)
+
+    table_references = []
+    for table_item in bq_context_config["tables"]:
+        fields = []
+        if "fields" in table_item:
+            for field_item in table_item["fields"]:
+                fields.append(geminidataanalytics.Field(
+                    name=field_item["name"],
+                    description=field_item["description"]
+                ))
+
+        schema = geminidataanalytics.Schema(
+            description=table_item.get("description", ""),
+            synonyms=table_item.get("synonyms", []),
+            tags=table_item.get("tags", []),
+            fields=fields
+        )
+
+        table_references.append(geminidataanalytics.BigQueryTableReference(
+            project_id=table_item["project_id"],
+            dataset_id=table_item["dataset_id"],
+            table_id=table_item["table_id"],
+            schema=schema
+        ))
+
+    example_queries = []
+    if "example_queries" in bq_context_config:
+        for query_item in bq_context_config["example_queries"]:
+            example_queries.append(geminidataanalytics.ExampleQuery(
+                natural_language_question=query_item["natural_language_question"],
+                sql_query=query_item["sql_query"]
+            ))
+
+    context = geminidataanalytics.Context(
+        system_instruction=system_instruction,
+        datasource_references=geminidataanalytics.DatasourceReferences(
+            bq=geminidataanalytics.BigQueryTableReferences(
+                table_references=table_references
+            )
+        ),
+        example_queries=example_queries,
+        options=geminidataanalytics.ConversationOptions(
+            analysis=geminidataanalytics.AnalysisOptions(
+                python=geminidataanalytics.AnalysisOptions.Python(
+                    enabled=True
+                )
+            )
+        )
+    )
+    return context, warnings
+
+
+def bundle_path(config_dir: str, content_hash: str) -> Path:
+    return BUNDLE_DIR / f"{config_dir}-{content_hash[:16]}{BUNDLE_SUFFIX}"
+
+
+def compile_bundle(config_dir: str) -> BundleInfo:
+    """Compiles a domain into BUNDLE_DIR under its content hash and removes its stale bundles.
+
+    Raises:
+        ContextValidationError: The context files disagree with the DDL.
+    """
+    content_hash = source_hash(config_dir)
+    context, warnings = compile_context(config_dir)
+    payload = geminidataanalytics.Context.serialize(context)
+    path = bundle_path(config_dir, content_hash)
+    BUNDLE_DIR.mkdir(parents=True, exist_ok=True)
+    # Write then rename, so concurrent loaders never read a partial bundle
+    temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    temp_path.write_bytes(payload)
+    os.replace(temp_path, path)
+    for stale in BUNDLE_DIR.glob(f"{config_dir}-*{BUNDLE_SUFFIX}"):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+    for warning in warnings:
+        logger.warning(f"{config_dir}: {warning}")
+    return BundleInfo(config_dir, content_hash, path, len(payload), warnings)
+
+
+def domains() -> list[str]:
+    """Returns every directory under src/data that has all of SOURCE_FILES."""
+    return sorted(p.name for p in DATA_DIR.iterdir() if p.is_dir() and all((p / name).is_file() for name in SOURCE_FILES))
+
+
+# ----------------------------------------------------------------------------
+# Loading
+# ----------------------------------------------------------------------------
+
+_lock = threading.Lock()
+# config_dir -> ((mtime_ns, size) per source file, content hash)
+_hashes: dict[str, tuple[tuple, str]] = {}
+# content hash -> serialized Context
+_payloads: dict[str, bytes] = {}
+
+
+def current_hash(config_dir: str) -> str:
+    """Returns the domain's content hash, re-hashing its sources only when they change on disk."""
+    signature = tuple((s.st_mtime_ns, s.st_size) for s in ((DATA_DIR / config_dir / name).stat() for name in SOURCE_FILES))
+    with _lock:
+        cached = _hashes.get(config_dir)
+        if cached and cached[0] == signature:
+            return cached[1]
+    content_hash = source_hash(config_dir)
+    with _lock:
+        _hashes[config_dir] = (signature, content_hash)
+    return content_hash
+
+
+def load_context(config_dir: str) -> geminidataanalytics.Context:
+    """Returns a domain's published Context from its compiled bundle.
+
+    A bundle that is missing or older than the sources is compiled (and
+    validated) first; if it can't be written, the context is compiled in
+    memory for this process.
+
+    Raises:
+        ContextValidationError: The bundle had to be compiled and the context files disagree with the DDL.
+    """
+    content_hash = current_hash(config_dir)
+    with _lock:
+        payload = _payloads.get(content_hash)
+    if payload is None:
+        path = bundle_path(config_dir, content_hash)
+        if not path.exists():
+            logger.info(f"No compiled context bundle for {config_dir} at {content_hash[:16]}, compiling it.")
+            try:
+                compile_bundle(config_dir)
+            except OSError as e:
+                logger.warning(f"Could not write the context bundle for {config_dir}, compiling in memory: {e}")
+                context, _ = compile_context(config_dir)
+                payload = geminidataanalytics.Context.serialize(context)
+        if payload is None:
+            payload = path.read_bytes()
+        with _lock:
+            _payloads[content_hash] = payload
+    return geminidataanalytics.Context.deserialize(payload)
@@ -0,0 +1,190 @@
+'''
+File: conversation_pool.py
+Project: adk-data-analytics
+File Created: Sunday, 18th October 2026 10:02:37 am
+-------------------------------------------------------------
+Copyright 2025 Google LLC. This software is provided as-is, without
+warranty or representation for any use or purpose. Your use of it is
+subject to your agreement with Google.
+Licensed under the Apache License, Version 2.0 (the 'License');
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an 'AS IS' BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+import atexit
+import threading
+import time
+import uuid
+from collections import deque
+
+from google.api_core import exceptions as core_exceptions
+
+from . import ca_client_pool, chat_stream, config_project
+from .data_agent_helper import build_create_conversation_request
+from .utils_google_logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class WarmConversationPool:
+    """Keeps a background-filled stock of pre-created CA conversations per data agent.
+
+    Tools claim a conversation on the first turn of a session instead of running
+    CreateConversationRequest inline. Every agent is filled to target_size once;
+    after that the refill thread only tops up agents that had a claim or a miss,
+    so an idle worker stops creating conversations. Conversations older than
+    max_age_s are deleted from the backend unclaimed.
+    """
+
+    def __init__(
+        self,
+        agent_ids: list[str],
+        target_size: int = config_project.WARM_CONVERSATION_POOL_TARGET_SIZE,
+        max_age_s: float = config_project.WARM_CONVERSATION_MAX_AGE_S,
+        refill_interval_s: float = config_project.WARM_CONVERSATION_REFILL_INTERVAL_S,
+    ):
+        self._target_size = target_size
+        self._max_age_s = max_age_s
+        self._refill_interval_s = refill_interval_s
+
+        self._lock = threading.Lock()
+        self._conversations: dict[str, deque[tuple[str, float]]] = {agent_id: deque() for agent_id in agent_ids}
+        # Agents to top up on the next refill: all of them at first, then those with a claim or miss since
+        self._demand = dict.fromkeys(agent_ids, True)
+        # (agent ID, conversation ID) of expired conversations still to delete
+        self._expired: list[tuple[str, str]] = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+        self._stats = {
+            agent_id: {"claimed": 0, "missed": 0, "created": 0, "expired": 0, "deleted": 0, "create_failures": 0}
+            for agent_id in agent_ids
+        }
+
+    def start(self):
+        """Starts the refill thread; safe to call more than once."""
+        with self._lock:
+            if self._thread is None and not self._stop.is_set():
+                self._thread = threading.Thread(target=self._refill_loop, name="ca-warm-conversations", daemon=True)
+                self._thread.start()
+
+    def claim(self, agent_id: str) -> str | None:
+        """Returns a fresh pre-created conversation ID for agent_id, or None if the pool is dry."""
+        self.start()
+        with self._lock:
+            if agent_id not in self._conversations:
+                return None
+            self._drop_expired(agent_id, time.monotonic())
+            self._demand[agent_id] = True
+            conversations = self._conversations[agent_id]
+            if conversations:
+                self._stats[agent_id]["claimed"] += 1
+                conversation_id = conversations.popleft()[0]
+            else:
+                self._stats[agent_id]["missed"] += 1
+                conversation_id = None
+        self._wake.set()
+        return conversation_id
+
+    def _drop_expired(self, agent_id: str, now: float):
+        conversations = self._conversations[agent_id]
+        while conversations and now - conversations[0][1] > self._max_age_s:
+            self._expired.append((agent_id, conversations.popleft()[0]))
+            self._stats[agent_id]["expired"] += 1
+
+    def _delete_expired(self):
+        with self._lock:
+            expired, self._expired = self._expired, []
+        for agent_id, conversation_id in expired:
+            name = f"projects/{config_project.PROJECT_ID}/locations/global/conversations/{conversation_id}"
+            try:
+                ca_client_pool.get_data_chat_client().delete_conversation(name=name, timeout=config_project.CA_CREATE_CONVERSATION_TIMEOUT_S)
+            except core_exceptions.NotFound:
+                pass
+            except Exception as e:
+                logger.warning(f"Could not delete expired conversation {conversation_id} of {agent_id}: {e}")
+                continue
+            with self._lock:
+                self._stats[agent_id]["deleted"] += 1
+
+    def _refill(self, agent_id: str):
+        with self._lock:
+            self._drop_expired(agent_id, time.monotonic())
+            missing = self._target_size - len(self._conversations[agent_id]) if self._demand[agent_id] else 0
+            self._demand[agent_id] = False
+        for _ in range(missing):
+            if self._stop.is_set():
+                return
+            conversation_id = f"conv-{uuid.uuid4()}"
+            request = build_create_conversation_request(config_project.PROJECT_ID, agent_id, conversation_id)
+            try:
+                chat_stream.create_conversation(ca_client_pool.get_data_chat_client(), request, agent_id)
+            except Exception as e:
+                with self._lock:
+                    self._stats[agent_id]["create_failures"] += 1
+                    # Retried on the next refill
+                    self._demand[agent_id] = True
+                logger.warning(f"Could not pre-create conversation for {agent_id}: {e}")
+                return
+            with self._lock:
+                self._conversations[agent_id].append((conversation_id, time.monotonic()))
+                self._stats[agent_id]["created"] += 1
+
+    def _refill_loop(self):
+        while not self._stop.is_set():
+            for agent_id in list(self._conversations):
+                self._refill(agent_id)
+            self._delete_expired()
+            self._wake.wait(self._refill_interval_s)
+            self._wake.clear()
+
+    def stats(self) -> dict:
+        """Returns per-agent availability and claim/create counters."""
+        with self._lock:
+            return {
+                agent_id: {"available": len(self._conversations[agent_id]), **counters}
+                for agent_id, counters in self._stats.items()
+            }
+
+    def shutdown(self):
+        """Stops the refill thread.
+
+        Up to target_size unclaimed conversations per agent are left in the backend:
+        the client pool may already be closed when this runs at exit.
+        """
+        self._stop.set()
+        self._wake.set()
+
+
+_pool: WarmConversationPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> WarmConversationPool:
+    """Returns the process-wide warm conversation pool for every registered data agent."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = WarmConversationPool(list(config_project.AGENT_ID_TO_CONFIG_DIR))
+                atexit.register(_pool.shutdown)
+    return _pool
+
+
+def claim_conversation(agent_id: str) -> str | None:
+    """Claims a warm conversation for agent_id, or returns None when the pool is disabled or empty."""
+    if not config_project.WARM_CONVERSATION_POOL_ENABLED:
+        return None
+    return get_pool().claim(agent_id)
+
+
+def pool_stats() -> dict:
+    """Returns the warm pool stats, or an empty dict before first use."""
+    return _pool.stats() if _pool else {}
@@ -21,14 +21,52 @@ See the License for the specific language governing permissions and
 limitations under the License.
 '''
 
-import pandas as pd
-import proto
+from __future__ import annotations
+
+import datetime
+
 from google.protobuf.json_format import MessageToDict
 
+from . import config_project
+from .lazy_imports import lazy_import
 from .utils_google_logging import get_logger
 
 logger = get_logger(__name__)
 
+geminidataanalytics = lazy_import("google.cloud.geminidataanalytics")
+proto = lazy_import("proto")
+
+
+def build_create_conversation_request(project_id: str, agent_id: str, conversation_id: str) -> geminidataanalytics.CreateConversationRequest:
+    """Builds the request that creates a backend conversation bound to a data agent."""
+    conversation = geminidataanalytics.Conversation()
+    conversation.agents = [f'projects/{project_id}/locations/global/dataAgents/{agent_id}']
+    conversation.name = f"projects/{project_id}/locations/global/conversations/{conversation_id}"
+
+    return geminidataanalytics.CreateConversationRequest(
+        parent=f"projects/{project_id}/locations/global",
+        conversation_id=conversation_id,
+        conversation=conversation,
+    )
+
+def build_chat_request(project_id: str, agent_id: str, conversation_id: str, user_input: str) -> geminidataanalytics.ChatRequest:
+    """Builds a stateful chat request carrying a single user message."""
+    # Create a request that contains a single user message (the new question)
+    messages = [geminidataanalytics.Message(
+        user_message=geminidataanalytics.UserMessage(text=user_input)
+    )]
+
+    # Create a conversation_reference
+    conversation_reference = geminidataanalytics.ConversationReference()
+    conversation_reference.conversation = f"projects/{project_id}/locations/global/conversations/{conversation_id}"
+    conversation_reference.data_agent_context.data_agent = f"projects/{project_id}/locations/global/dataAgents/{agent_id}"
+
+    return geminidataanalytics.ChatRequest(
+        parent=f"projects/{project_id}/locations/global",
+        messages=messages,
+        conversation_reference=conversation_reference
+    )
+
 
 def handle_text_response(resp):
     return {"text": "".join(resp.parts)}
@@ -71,17 +109,117 @@ def handle_data_response(resp):
     elif 'generated_sql' in resp:
         return {"sql_generated": resp.generated_sql}
     elif 'result' in resp:
-        fields = [field.name for field in resp.result.schema.fields]
-        d = {}
-        for el in resp.result.data:
-            for field in fields:
-                if field in d:
-                    d[field].append(el[field])
-                else:
-                    d[field] = [el[field]]
-        return {"data_retrieved": pd.DataFrame(d).to_dict()}
+        fields, columns = decode_result_columns(resp.result)
+        return {
+            "data_retrieved": format_columns(columns),
+            "data_schema": [{"name": name, "type": field_type} for name, field_type in fields],
+        }
     return {}
 
+# ----------------------------------------------------------------------------
+# Columnar decoding of CA data results
+# ----------------------------------------------------------------------------
+
+def _struct_value(value):
+    """Unwraps a raw google.protobuf.Value without going through proto-plus marshalling."""
+    kind = value.WhichOneof("kind")
+    if kind == "string_value":
+        return value.string_value
+    if kind == "number_value":
+        return value.number_value
+    if kind == "bool_value":
+        return value.bool_value
+    if kind is None or kind == "null_value":
+        return None
+    return MessageToDict(value)
+
+def _to_int(column):
+    out = []
+    for v in column:
+        if v is None:
+            out.append(None)
+        elif isinstance(v, str):
+            out.append(int(v) if v.lstrip("-").isdigit() else int(float(v)))
+        else:
+            out.append(int(v))
+    return out
+
+def _to_float(column):
+    return [None if v is None else float(v) for v in column]
+
+def _to_bool(column):
+    return [v if v is None or isinstance(v, bool) else str(v).lower() == "true" for v in column]
+
+def _to_timestamp(column):
+    # BigQuery serializes TIMESTAMP as epoch seconds (number or numeric string) or as ISO text
+    out = []
+    for v in column:
+        if v is None:
+            out.append(None)
+            continue
+        if isinstance(v, datetime.datetime):
+            out.append(v.isoformat())
+            continue
+        try:
+            seconds = float(v)
+        except (TypeError, ValueError):
+            out.append(str(v))
+            continue
+        out.append(datetime.datetime.fromtimestamp(seconds, tz=datetime.UTC).isoformat())
+    return out
+
+def _to_text(column):
+    return [None if v is None else str(v) for v in column]
+
+_COLUMN_CONVERTERS = {
+    "INT64": _to_int,
+    "INTEGER": _to_int,
+    "FLOAT64": _to_float,
+    "FLOAT": _to_float,
+    "NUMERIC": _to_float,
+    "BIGNUMERIC": _to_float,
+    "BOOL": _to_bool,
+    "BOOLEAN": _to_bool,
+    "TIMESTAMP": _to_timestamp,
+    "DATE": _to_text,
+    "DATETIME": _to_text,
+    "TIME": _to_text,
+}
+
+def convert_columns(fields: list[tuple[str, str]], columns: dict[str, list]) -> dict[str, list]:
+    """Converts raw column arrays in bulk according to each field's BigQuery type."""
+    converted = {}
+    for name, field_type in fields:
+        converter = _COLUMN_CONVERTERS.get(field_type)
+        column = columns[name]
+        converted[name] = converter(column) if converter else column
+    return converted
+
+def format_columns(columns: dict[str, list], layout: str = config_project.DATA_RESULT_LAYOUT):
+    """Lays out decoded columns as 'columns' (dict of lists), 'records' (list of dicts)
+    or 'index' (the dict-of-dicts shape DataFrame.to_dict() used to produce)."""
+    if layout == "columns":
+        return columns
+    if layout == "records":
+        names = list(columns)
+        return [dict(zip(names, row, strict=True)) for row in zip(*columns.values(), strict=True)]
+    return {name: dict(enumerate(column)) for name, column in columns.items()}
+
+def decode_result_columns(result) -> tuple[list[tuple[str, str]], dict[str, list]]:
+    """Reads the schema once and returns (fields, typed column arrays) for a DataResult."""
+    result_pb = type(result).pb(result)
+    fields = [(field.name, field.type_.upper()) for field in result_pb.schema.fields]
+    rows = [row.fields for row in result_pb.data]
+    columns = {}
+    for name, _ in fields:
+        columns[name] = [_struct_value(value) if (value := row.get(name)) is not None else None for row in rows]
+    return fields, convert_columns(fields, columns)
+
+def decode_data_result(result, layout: str = config_project.DATA_RESULT_LAYOUT):
+    """Decodes a CA DataResult into a compact row- or column-oriented payload."""
+    _, columns = decode_result_columns(result)
+    return format_columns(columns, layout)
+
 def handle_chart_response(resp):
     def _value_to_dict(v):
         if isinstance(v, proto.marshal.collections.maps.MapComposite):
@@ -110,6 +248,14 @@ def handle_chart_response(resp):
         return {"chart_result": vegaConfig_dict}
     return {}
 
+def message_kind(msg) -> str:
+    """Returns which part of a streamed system message is set: text, schema, data or chart."""
+    m = msg.system_message
+    for kind in ('text', 'schema', 'data', 'chart'):
+        if kind in m:
+            return kind
+    return 'other'
+
 def show_message(msg):
     m = msg.system_message
     if 'text' in m:
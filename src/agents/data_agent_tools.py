@@ -0,0 +1,551 @@
+'''
+File: data_agent_tools.py
+Project: adk-data-analytics
+File Created: Sunday, 18th October 2026 3:25:40 pm
+-------------------------------------------------------------
+Copyright 2025 Google LLC. This software is provided as-is, without
+warranty or representation for any use or purpose. Your use of it is
+subject to your agreement with Google.
+Licensed under the Apache License, Version 2.0 (the 'License');
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an 'AS IS' BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+import asyncio
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+
+from google.adk.tools import FunctionTool, ToolContext
+
+from . import (
+    bq_executor,
+    ca_client_pool,
+    chat_stream,
+    config_project,
+    conversation_pool,
+    metrics,
+    nl_sql_cache,
+    result_store,
+    sql_result_cache,
+    tracing,
+    turn_ledger,
+)
+from .adaptive_limiter import AdaptiveLimiter, LimiterRejectedError, is_quota_error
+from .chat_stream import StreamDeadlineExceededError
+from .circuit_breaker import CircuitBreaker
+from .data_agent_helper import build_chat_request, build_create_conversation_request
+from .utils_google_logging import get_logger
+
+logger = get_logger(__name__)
+
+TOOL_DOCSTRING = """Gets results from a BigQuery Data Analytics Agent in a stateful manner.
+
+    Args:
+        user_input: The query for the agent.
+        tool_context: The context of the tool.
+
+    Returns:
+        A dictionary with the agent's response.
+    """
+
+_calls = metrics.counter("data_agent_tool_calls_total", "Data-agent tool calls by outcome.", ("agent", "outcome"))
+_latency = metrics.histogram("data_agent_tool_latency_seconds", "End-to-end data-agent tool latency.", ("agent",))
+_in_flight = metrics.gauge("data_agent_tool_in_flight", "Data-agent tool calls currently running.", ("agent",))
+
+# Whether a call outcome counts against the circuit breaker; other outcomes (cache hits,
+# quota errors handled by the limiter, cancellations) carry no signal about the CA agent
+_BREAKER_FAILURES = {"ok": False, "error": True, "timeout": True}
+
+
+@dataclass(frozen=True)
+class DataAgentDomain:
+    """A registered CA data agent and the policies its tool runs under."""
+
+    agent_id: str
+    config_dir: str
+    state_prefix: str
+    max_concurrency: int
+    min_concurrency: int
+    initial_concurrency: int
+    rate_per_s: float
+    burst: int
+    max_queue: int
+    max_queue_wait_s: float
+    latency_threshold_s: float
+    timeout_s: float
+    first_message_timeout_s: float
+    hedge_requests: bool
+    breaker_window: int
+    breaker_min_calls: int
+    breaker_failure_rate: float
+    breaker_slow_call_s: float
+    breaker_slow_call_rate: float
+    breaker_open_s: float
+    breaker_half_open_calls: int
+    nl_sql_cache: bool
+    sql_result_cache: bool
+
+    @property
+    def tool_name(self) -> str:
+        return f"stateful_chat_{self.state_prefix}_bq_data_agent"
+
+    @property
+    def conversation_id_key(self) -> str:
+        return f"{self.state_prefix}_data_agent_conversation_id"
+
+    @property
+    def conversation_created_key(self) -> str:
+        return f"{self.state_prefix}_data_agent_conversation_created"
+
+    @property
+    def turns_key(self) -> str:
+        return f"{self.state_prefix}_data_agent_turns"
+
+    @property
+    def cached_turns_key(self) -> str:
+        return f"{self.state_prefix}_data_agent_cached_turns"
+
+
+def load_domains() -> list[DataAgentDomain]:
+    """Builds a domain for every agent in AGENT_ID_TO_CONFIG_DIR, applying DATA_AGENT_TOOL_POLICIES overrides."""
+    domains = []
+    for agent_id, config_dir in config_project.AGENT_ID_TO_CONFIG_DIR.items():
+        policy = {
+            "state_prefix": config_dir,
+            **config_project.DATA_AGENT_TOOL_DEFAULTS,
+            **config_project.DATA_AGENT_TOOL_POLICIES.get(agent_id, {}),
+        }
+        if policy["sql_result_cache"] and not policy["nl_sql_cache"]:
+            raise ValueError(f"Data agent {agent_id}: sql_result_cache requires nl_sql_cache, which supplies the SQL it caches")
+        domains.append(DataAgentDomain(agent_id=agent_id, config_dir=config_dir, **policy))
+    return domains
+
+
+class DataAgentToolEngine:
+    """Runs data-agent tool calls for every registered domain.
+
+    Owns the per-domain circuit breakers, adaptive limiters and metrics. Shared resources (client
+    pool, warm conversations, caches) are initialized once by initialize(), at the latest on the
+    first tool call.
+    """
+
+    def __init__(self, domains: list[DataAgentDomain]):
+        self.domains = {domain.agent_id: domain for domain in domains}
+        self.limiters = {domain.agent_id: self._create_limiter(domain) for domain in domains}
+        self.breakers = {domain.agent_id: self._create_breaker(domain) for domain in domains}
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    @staticmethod
+    def _create_limiter(domain: DataAgentDomain) -> AdaptiveLimiter:
+        return AdaptiveLimiter(
+            domain.agent_id,
+            rate_per_s=domain.rate_per_s,
+            burst=domain.burst,
+            initial_limit=domain.initial_concurrency,
+            min_limit=domain.min_concurrency,
+            max_limit=domain.max_concurrency,
+            max_queue=domain.max_queue,
+            max_wait_s=domain.max_queue_wait_s,
+            latency_threshold_s=domain.latency_threshold_s,
+        )
+
+    @staticmethod
+    def _create_breaker(domain: DataAgentDomain) -> CircuitBreaker:
+        return CircuitBreaker(
+            domain.agent_id,
+            window_size=domain.breaker_window,
+            min_calls=domain.breaker_min_calls,
+            failure_rate=domain.breaker_failure_rate,
+            slow_call_s=domain.breaker_slow_call_s,
+            slow_call_rate=domain.breaker_slow_call_rate,
+            open_s=domain.breaker_open_s,
+            half_open_calls=domain.breaker_half_open_calls,
+        )
+
+    @staticmethod
+    def _unavailable_response(domain: DataAgentDomain, breaker: CircuitBreaker) -> list[dict]:
+        retry_after_s = round(breaker.retry_after_s())
+        domain_label = domain.config_dir.replace("_", " ")
+        logger.warning(f"Circuit open for {domain.agent_id}, failing fast.")
+        return [{
+            "status": "unavailable",
+            "error_type": "domain_unavailable",
+            "domain": domain_label,
+            "retry_after_s": retry_after_s,
+            "error_message": f"The {domain_label} data is temporarily unavailable. Please try again in about {max(retry_after_s, 1)} seconds.",
+        }]
+
+    @staticmethod
+    def _shed_response(rejected: LimiterRejectedError) -> list[dict]:
+        logger.warning(f"Shedding data-agent call: {rejected}")
+        return [{
+            "status": "error",
+            "error_type": "overloaded",
+            "error_message": "The data agent is handling too many requests right now, please try again shortly.",
+        }]
+
+    @staticmethod
+    def _error_response(error: Exception) -> tuple[list[dict], str]:
+        logger.error(f"Error getting response from Data Analytics Agent: {error}")
+        if isinstance(error, StreamDeadlineExceededError):
+            return [{"status": "error", "error_type": "timeout", "error_message": str(error)}], "timeout"
+        if is_quota_error(error):
+            return [{
+                "status": "error",
+                "error_type": "quota_exceeded",
+                "error_message": "The data agent's request quota is exhausted, please try again shortly.",
+            }], "quota"
+        return [{"status": "error", "error_message": str(error)}], "error"
+
+    def initialize(self):
+        """Initializes the shared client pool, warm conversation pool and caches once."""
+        with self._lock:
+            if self._initialized:
+                return
+            self._initialized = True
+        ca_client_pool.get_pool()
+        if config_project.WARM_CONVERSATION_POOL_ENABLED:
+            conversation_pool.get_pool().start()
+        if config_project.NL_SQL_CACHE_ENABLED and any(d.nl_sql_cache for d in self.domains.values()):
+            nl_sql_cache.get_cache()
+        if config_project.SQL_RESULT_CACHE_ENABLED and any(d.sql_result_cache for d in self.domains.values()):
+            sql_result_cache.get_cache()
+        if config_project.METRICS_PORT:
+            metrics.serve_prometheus(config_project.METRICS_PORT)
+        logger.info(f"Data-agent tool engine initialized for {len(self.domains)} domain(s).")
+
+    # ------------------------------------------------------------------
+    # Conversation state
+    # ------------------------------------------------------------------
+
+    def _resolve_conversation_id(self, domain: DataAgentDomain, tool_context: ToolContext) -> tuple[str, bool]:
+        """Returns the conversation ID for this session and whether it still needs creating."""
+        conversation_id = tool_context.state.get(domain.conversation_id_key)
+        conversation_created = tool_context.state.get(domain.conversation_created_key, False)
+
+        # Create conversation if it doesn't exist or hasn't been created in backend yet
+        if not conversation_id or not conversation_created:
+            # Prefer a conversation pre-created in the background over a synchronous create
+            warm_conversation_id = conversation_pool.claim_conversation(domain.agent_id)
+            if warm_conversation_id:
+                logger.info(f"Claimed warm conversation {warm_conversation_id} from pool.")
+                self._mark_conversation_created(domain, tool_context, warm_conversation_id)
+                return warm_conversation_id, False
+
+            # Generate new ID if needed (may have been generated in callback but not created in backend)
+            if not conversation_id:
+                conversation_id = f"conv-{uuid.uuid4()}"
+                logger.info(f"No conversation ID found, creating a new one: {conversation_id}")
+            else:
+                logger.info(f"Conversation ID exists ({conversation_id}) but not created in backend yet. Creating now...")
+            return conversation_id, True
+        return conversation_id, False
+
+    @staticmethod
+    def _mark_conversation_created(domain: DataAgentDomain, tool_context: ToolContext, conversation_id: str):
+        tool_context.state[domain.conversation_id_key] = conversation_id
+        tool_context.state[domain.conversation_created_key] = True
+        logger.info("Updated tool context state with new conversation ID and created flag.")
+
+    @staticmethod
+    def _is_first_turn(domain: DataAgentDomain, tool_context: ToolContext) -> bool:
+        # Only a conversation's first question is context-free enough to answer from cached SQL.
+        # Turns answered from the cache never reach the CA conversation, so they are counted in state.
+        return not tool_context.state.get(domain.turns_key, 0) and not tool_context.state.get(domain.conversation_created_key, False)
+
+    @staticmethod
+    def _record_turn(domain: DataAgentDomain, tool_context: ToolContext, question: str | None = None, cached_sql: str | None = None):
+        """Counts an answered turn; a turn answered from cached SQL is kept until the CA conversation has seen it."""
+        tool_context.state[domain.turns_key] = tool_context.state.get(domain.turns_key, 0) + 1
+        if cached_sql:
+            cached_turns = tool_context.state.get(domain.cached_turns_key) or []
+            tool_context.state[domain.cached_turns_key] = [*cached_turns, {"question": question, "sql": cached_sql}]
+        elif tool_context.state.get(domain.cached_turns_key):
+            tool_context.state[domain.cached_turns_key] = []
+
+    @staticmethod
+    def _chat_input(domain: DataAgentDomain, user_input: str, tool_context: ToolContext) -> str:
+        """Returns the question to send to the CA API, preceded by earlier turns answered from cached SQL.
+
+        The CA conversation holds the history a follow-up depends on, but has not seen
+        turns the cache answered, so those are replayed in the message.
+        """
+        cached_turns = tool_context.state.get(domain.cached_turns_key)
+        if not cached_turns:
+            return user_input
+        earlier = "\n".join(f"- {turn['question']}\n  SQL: {turn['sql']}" for turn in cached_turns)
+        return f"Earlier in this conversation these questions were answered with the SQL shown:\n{earlier}\n\nNow answer this follow-up question: {user_input}"
+
+    def _cache_stream_results(self, domain: DataAgentDomain, user_input: str, responses: list[dict], first_turn: bool):
+        if domain.nl_sql_cache and first_turn:
+            nl_sql_cache.store(domain.agent_id, user_input, responses)
+
+    # ------------------------------------------------------------------
+    # Sync path
+    # ------------------------------------------------------------------
+
+    def _chat(self, domain: DataAgentDomain, user_input: str, tool_context: ToolContext) -> tuple[list[dict], str]:
+        project_id = config_project.PROJECT_ID
+        first_turn = self._is_first_turn(domain, tool_context)
+
+        cached_sql = nl_sql_cache.lookup(domain.agent_id, user_input) if domain.nl_sql_cache and first_turn else None
+        if cached_sql:
+            try:
+                with tracing.span("bq.execute_cached_sql"):
+                    responses = bq_executor.execute_cached_sql(domain.agent_id, cached_sql, use_result_cache=domain.sql_result_cache)
+                self._record_turn(domain, tool_context, user_input, cached_sql)
+                logger.info("Answered from cached SQL, skipped CA API generation.")
+                return responses, "nl_sql_cache_hit"
+            except Exception as e:
+                logger.warning(f"Cached SQL failed, falling back to the CA API: {e}")
+
+        conversation_id, needs_creation = self._resolve_conversation_id(domain, tool_context)
+        data_chat_client = ca_client_pool.get_data_chat_client()
+        if needs_creation:
+            request = build_create_conversation_request(project_id, domain.agent_id, conversation_id)
+            with tracing.span("ca.create_conversation", {"ca.conversation_id": conversation_id}):
+                chat_stream.create_conversation(data_chat_client, request, domain.agent_id)
+            logger.info(f"Created new conversation in backend: {conversation_id}")
+            self._mark_conversation_created(domain, tool_context, conversation_id)
+        else:
+            logger.info(f"Continuing existing conversation {conversation_id} for query: {user_input}")
+
+        request = build_chat_request(project_id, domain.agent_id, conversation_id, self._chat_input(domain, user_input, tool_context))
+        # The gRPC timeout bounds the whole stream; collect_chat bounds time-to-first-message
+        with tracing.span("ca.chat", {"ca.conversation_id": conversation_id, "ca.first_turn": first_turn}):
+            responses = chat_stream.collect_chat(
+                domain.agent_id,
+                lambda: data_chat_client.chat(request=request, timeout=domain.timeout_s),
+                domain.first_message_timeout_s,
+            )
+        logger.info("Received response from chat API")
+        self._cache_stream_results(domain, user_input, responses, first_turn)
+        self._record_turn(domain, tool_context)
+        return responses, "ok"
+
+    def run(self, agent_id: str, user_input: str, tool_context: ToolContext) -> list[dict]:
+        """Runs a data-agent tool call synchronously inside its own trace span."""
+        self.initialize()
+        with tracing.span(f"data_agent {self.domains[agent_id].state_prefix}", {"data_agent.id": agent_id}):
+            responses = self._run(agent_id, user_input, tool_context)
+            # Large result tables are stored once outside session state; the ledger keeps a handle
+            turn_ledger.get_ledger().record_result(tool_context, result_store.offload_responses(responses))
+            return responses
+
+    def _run(self, agent_id: str, user_input: str, tool_context: ToolContext) -> list[dict]:
+        """Runs a data-agent tool call synchronously under the domain's limiter and timeout."""
+        domain = self.domains[agent_id]
+        limiter = self.limiters[agent_id]
+        breaker = self.breakers[agent_id]
+        if not breaker.allow():
+            _calls.inc(agent=agent_id, outcome="circuit_open")
+            tracing.set_attributes({"data_agent.outcome": "circuit_open"})
+            return self._unavailable_response(domain, breaker)
+        start = time.perf_counter()
+        try:
+            limiter.acquire()
+        except LimiterRejectedError as rejected:
+            breaker.record(None)
+            _calls.inc(agent=agent_id, outcome="shed")
+            tracing.set_attributes({"data_agent.outcome": "shed", "limiter.reason": rejected.reason})
+            return self._shed_response(rejected)
+        _in_flight.inc(agent=agent_id)
+        admitted = time.perf_counter()
+        tracing.set_attributes({"limiter.wait_ms": round((admitted - start) * 1000, 1)})
+        outcome = "cancelled"
+        try:
+            responses, outcome = self._chat(domain, user_input, tool_context)
+        except Exception as e:
+            responses, outcome = self._error_response(e)
+        finally:
+            _in_flight.dec(agent=agent_id)
+            service_latency_s = time.perf_counter() - admitted
+            limiter.release(service_latency_s, quota_exceeded=outcome == "quota")
+            breaker.record(_BREAKER_FAILURES.get(outcome), service_latency_s)
+        _calls.inc(agent=agent_id, outcome=outcome)
+        tracing.set_attributes({"data_agent.outcome": outcome}, error=responses[0].get("error_message") if _BREAKER_FAILURES.get(outcome) else None)
+        _latency.observe(time.perf_counter() - start, agent=agent_id)
+        return responses
+
+    # ------------------------------------------------------------------
+    # Async path
+    # ------------------------------------------------------------------
+
+    async def _chat_async(self, domain: DataAgentDomain, user_input: str, tool_context: ToolContext) -> tuple[list[dict], str]:
+        project_id = config_project.PROJECT_ID
+        first_turn = self._is_first_turn(domain, tool_context)
+
+        cached_sql = nl_sql_cache.lookup(domain.agent_id, user_input) if domain.nl_sql_cache and first_turn else None
+        if cached_sql:
+            try:
+                with tracing.span("bq.execute_cached_sql"):
+                    responses = await asyncio.to_thread(bq_executor.execute_cached_sql, domain.agent_id, cached_sql, domain.sql_result_cache)
+                self._record_turn(domain, tool_context, user_input, cached_sql)
+                logger.info("Answered from cached SQL, skipped CA API generation.")
+                return responses, "nl_sql_cache_hit"
+            except Exception as e:
+                logger.warning(f"Cached SQL failed, falling back to the CA API: {e}")
+
+        conversation_id, needs_creation = self._resolve_conversation_id(domain, tool_context)
+        data_chat_client = await ca_client_pool.get_data_chat_async_client()
+        if needs_creation:
+            request = build_create_conversation_request(project_id, domain.agent_id, conversation_id)
+            with tracing.span("ca.create_conversation", {"ca.conversation_id": conversation_id}):
+                await chat_stream.create_conversation_async(data_chat_client, request, domain.agent_id)
+            logger.info(f"Created new conversation in backend: {conversation_id}")
+            self._mark_conversation_created(domain, tool_context, conversation_id)
+        else:
+            logger.info(f"Continuing existing conversation {conversation_id} for query: {user_input}")
+
+        chat_input = self._chat_input(domain, user_input, tool_context)
+
+        def open_chat(chat_conversation_id: str):
+            request = build_chat_request(project_id, domain.agent_id, chat_conversation_id, chat_input)
+            return data_chat_client.chat(request=request, timeout=domain.timeout_s)
+
+        # Only first turns are hedged: the hedge runs in a conversation of its own, which would
+        # lose the history a follow-up question depends on
+        hedge_delay_s = chat_stream.hedge_delay(domain.agent_id) if domain.hedge_requests and first_turn else None
+        with tracing.span("ca.chat", {"ca.conversation_id": conversation_id, "ca.first_turn": first_turn}):
+            if hedge_delay_s is None:
+                responses = await chat_stream.collect_chat_async(domain.agent_id, lambda: open_chat(conversation_id), domain.first_message_timeout_s)
+            else:
+                hedge_conversation_ids = []
+
+                async def open_hedge():
+                    hedge_conversation_id = await self._new_conversation_async(domain, data_chat_client)
+                    hedge_conversation_ids.append(hedge_conversation_id)
+                    return await open_chat(hedge_conversation_id)
+
+                winner, responses = await chat_stream.hedged_chat_async(
+                    domain.agent_id,
+                    lambda: open_chat(conversation_id),
+                    open_hedge,
+                    hedge_delay_s,
+                    domain.first_message_timeout_s,
+                )
+                tracing.set_attributes({"ca.hedge_winner": winner})
+                if winner == "hedge":
+                    logger.info(f"Hedged request won, continuing in conversation {hedge_conversation_ids[0]}.")
+                    self._mark_conversation_created(domain, tool_context, hedge_conversation_ids[0])
+        logger.info("Received response from chat API")
+        self._cache_stream_results(domain, user_input, responses, first_turn)
+        self._record_turn(domain, tool_context)
+        return responses, "ok"
+
+    @staticmethod
+    async def _new_conversation_async(domain: DataAgentDomain, data_chat_client) -> str:
+        """Returns a ready conversation for a hedged request, preferring the warm pool."""
+        conversation_id = conversation_pool.claim_conversation(domain.agent_id)
+        if not conversation_id:
+            conversation_id = f"conv-{uuid.uuid4()}"
+            request = build_create_conversation_request(config_project.PROJECT_ID, domain.agent_id, conversation_id)
+            await chat_stream.create_conversation_async(data_chat_client, request, domain.agent_id)
+        return conversation_id
+
+    async def run_async(self, agent_id: str, user_input: str, tool_context: ToolContext) -> list[dict]:
+        """Runs a data-agent tool call on the event loop inside its own trace span."""
+        self.initialize()
+        with tracing.span(f"data_agent {self.domains[agent_id].state_prefix}", {"data_agent.id": agent_id}):
+            responses = await self._run_async(agent_id, user_input, tool_context)
+            # Large result tables are stored once outside session state; the ledger keeps a handle
+            stored_responses = await result_store.offload_responses_async(responses, tool_context)
+            turn_ledger.get_ledger().record_result(tool_context, stored_responses)
+            return responses
+
+    async def _run_async(self, agent_id: str, user_input: str, tool_context: ToolContext) -> list[dict]:
+        """Runs a data-agent tool call on the event loop under the domain's limiter and timeout."""
+        domain = self.domains[agent_id]
+        limiter = self.limiters[agent_id]
+        breaker = self.breakers[agent_id]
+        if not breaker.allow():
+            _calls.inc(agent=agent_id, outcome="circuit_open")
+            tracing.set_attributes({"data_agent.outcome": "circuit_open"})
+            return self._unavailable_response(domain, breaker)
+        start = time.perf_counter()
+        try:
+            await limiter.acquire_async()
+        except BaseException as e:
+            breaker.record(None)
+            if not isinstance(e, LimiterRejectedError):
+                raise
+            _calls.inc(agent=agent_id, outcome="shed")
+            tracing.set_attributes({"data_agent.outcome": "shed", "limiter.reason": e.reason})
+            return self._shed_response(e)
+        _in_flight.inc(agent=agent_id)
+        admitted = time.perf_counter()
+        tracing.set_attributes({"limiter.wait_ms": round((admitted - start) * 1000, 1)})
+        outcome = "cancelled"
+        try:
+            responses, outcome = await asyncio.wait_for(self._chat_async(domain, user_input, tool_context), domain.timeout_s)
+        except TimeoutError:
+            logger.error(f"Data Analytics Agent {agent_id} timed out after {domain.timeout_s}s")
+            responses, outcome = [{
+                "status": "error",
+                "error_type": "timeout",
+                "error_message": f"The data agent did not answer within {domain.timeout_s} seconds.",
+            }], "timeout"
+        except Exception as e:
+            responses, outcome = self._error_response(e)
+        finally:
+            _in_flight.dec(agent=agent_id)
+            service_latency_s = time.perf_counter() - admitted
+            limiter.release(service_latency_s, quota_exceeded=outcome == "quota")
+            breaker.record(_BREAKER_FAILURES.get(outcome), service_latency_s)
+        _calls.inc(agent=agent_id, outcome=outcome)
+        tracing.set_attributes({"data_agent.outcome": outcome}, error=responses[0].get("error_message") if _BREAKER_FAILURES.get(outcome) else None)
+        _latency.observe(time.perf_counter() - start, agent=agent_id)
+        return responses
+
+
+# ----------------------------------------------------------------------------
+# Tool registry
+# ----------------------------------------------------------------------------
+
+_engine: DataAgentToolEngine | None = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> DataAgentToolEngine:
+    """Returns the process-wide engine built from the registered domains."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = DataAgentToolEngine(load_domains())
+    return _engine
+
+
+def _make_tool_function(domain: DataAgentDomain, use_async: bool):
+    # The closure holds only the agent ID: tools are pickled by value on deployment, and the engine
+    # (locks, limiters, breakers) is looked up in the process that runs them.
+    agent_id = domain.agent_id
+    if use_async:
+        async def tool_function(user_input: str, tool_context: ToolContext):
+            return await get_engine().run_async(agent_id, user_input, tool_context)
+    else:
+        def tool_function(user_input: str, tool_context: ToolContext):
+            return get_engine().run(agent_id, user_input, tool_context)
+    # FunctionTool derives the tool name and description from these
+    tool_function.__name__ = tool_function.__qualname__ = domain.tool_name
+    tool_function.__doc__ = TOOL_DOCSTRING
+    return tool_function
+
+
+def build_data_agent_tools(use_async: bool = config_project.USE_ASYNC_DATA_AGENT_TOOLS) -> dict[str, FunctionTool]:
+    """Returns one FunctionTool per registered data agent, keyed by agent ID.
+
+    Shared resources (client pool, warm conversations, caches) are initialized by
+    the first tool call, not here, so importing the agent stays cheap.
+    """
+    engine = get_engine()
+    return {agent_id: FunctionTool(func=_make_tool_function(domain, use_async)) for agent_id, domain in engine.domains.items()}
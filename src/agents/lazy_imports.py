@@ -0,0 +1,54 @@
+'''
+File: lazy_imports.py
+Project: adk-data-analytics
+File Created: Sunday, 18th October 2026 9:02:44 pm
+-------------------------------------------------------------
+Copyright 2025 Google LLC. This software is provided as-is, without
+warranty or representation for any use or purpose. Your use of it is
+subject to your agreement with Google.
+Licensed under the Apache License, Version 2.0 (the 'License');
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an 'AS IS' BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+import importlib
+
+
+class LazyModule:
+    """Stands in for a module and imports it on first attribute access.
+
+    Heavy client libraries (geminidataanalytics, BigQuery, proto-plus) are only
+    needed once a request arrives, so modules bind them through lazy_import()
+    to keep package import, and with it adk web startup and Agent Engine cold
+    starts, cheap. Modules that do this use `from __future__ import annotations`
+    so type hints don't touch the module at definition time.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def load(self):
+        """Imports the module now, e.g. during startup warm-up, and returns it."""
+        module = self._module
+        if module is None:
+            # import_module holds the import lock, so concurrent first uses get one fully initialized module
+            module = self._module = importlib.import_module(self._name)
+        return module
+
+    def __getattr__(self, attribute: str):
+        return getattr(self.load(), attribute)
+
+    def __repr__(self) -> str:
+        return f"<lazy module {self._name!r}{' (loaded)' if self._module else ''}>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Returns a LazyModule for name; the import happens on first attribute access."""
+    return LazyModule(name)
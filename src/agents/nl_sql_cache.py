@@ -0,0 +1,159 @@
+'''
+File: nl_sql_cache.py
+Project: adk-data-analytics
+File Created: Sunday, 18th October 2026 12:31:09 pm
+-------------------------------------------------------------
+Copyright 2025 Google LLC. This software is provided as-is, without
+warranty or representation for any use or purpose. Your use of it is
+subject to your agreement with Google.
+Licensed under the Apache License, Version 2.0 (the 'License');
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an 'AS IS' BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+import hashlib
+import re
+import threading
+import unicodedata
+from pathlib import Path
+
+from . import config_project
+from .cache_backends import create_backend
+from .utils_google_logging import get_logger
+
+logger = get_logger(__name__)
+
+DATA_DIR = Path(__file__).parent.parent / 'data'
+CONTEXT_FILES = ('bigquery_data_context.json', 'system_instructions.yaml')
+
+
+def normalize_question(question: str) -> str:
+    """Normalizes a question so trivially different phrasings share a cache key."""
+    text = unicodedata.normalize("NFKC", question).lower()
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.rstrip("?.!; ")
+
+
+class NlSqlCache:
+    """Caches the SQL the Conversational Analytics API generated for a question.
+
+    Entries are keyed by data agent ID plus the normalized question and carry a
+    fingerprint of the agent's bigquery_data_context.json and
+    system_instructions.yaml, so editing either file invalidates every entry
+    generated against the old context.
+    """
+
+    def __init__(self, backend, ttl_s: float):
+        self._backend = backend
+        self._ttl_s = ttl_s
+        self._lock = threading.Lock()
+        # agent_id -> ((mtime_ns, size) per file, fingerprint)
+        self._fingerprints: dict[str, tuple[tuple, str]] = {}
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "invalidations": 0}
+
+    def context_fingerprint(self, agent_id: str) -> str | None:
+        """Returns a content hash of the agent's context files, re-hashing only when they change on disk."""
+        config_dir_name = config_project.AGENT_ID_TO_CONFIG_DIR.get(agent_id)
+        if not config_dir_name:
+            return None
+        paths = [DATA_DIR / config_dir_name / name for name in CONTEXT_FILES]
+        try:
+            signature = tuple((p.stat().st_mtime_ns, p.stat().st_size) for p in paths)
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._fingerprints.get(agent_id)
+            if cached and cached[0] == signature:
+                return cached[1]
+        digest = hashlib.sha256()
+        for path in paths:
+            digest.update(path.read_bytes())
+        fingerprint = digest.hexdigest()
+        with self._lock:
+            self._fingerprints[agent_id] = (signature, fingerprint)
+        return fingerprint
+
+    @staticmethod
+    def _key(agent_id: str, question: str) -> str:
+        return hashlib.sha256(f"{agent_id}\0{normalize_question(question)}".encode()).hexdigest()
+
+    def get(self, agent_id: str, question: str) -> str | None:
+        """Returns cached SQL for the question, or None on a miss or stale context."""
+        key = self._key(agent_id, question)
+        entry = self._backend.get(key)
+        if entry is not None and entry.get("fingerprint") != self.context_fingerprint(agent_id):
+            self._backend.delete(key)
+            self._count("invalidations")
+            entry = None
+        if entry is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return entry["sql"]
+
+    def put(self, agent_id: str, question: str, sql: str):
+        """Stores the SQL generated for the question against the current context."""
+        fingerprint = self.context_fingerprint(agent_id)
+        if fingerprint is None:
+            return
+        self._backend.set(self._key(agent_id, question), {"sql": sql, "fingerprint": fingerprint}, self._ttl_s)
+        self._count("stores")
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "entries": len(self._backend)}
+
+
+_cache: NlSqlCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> NlSqlCache:
+    """Returns the process-wide NL-to-SQL cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                backend = create_backend(
+                    config_project.NL_SQL_CACHE_BACKEND,
+                    Path(__file__).parent / config_project.NL_SQL_CACHE_PATH,
+                    config_project.NL_SQL_CACHE_MAX_ENTRIES,
+                    table="nl_sql",
+                )
+                _cache = NlSqlCache(backend, config_project.NL_SQL_CACHE_TTL_S)
+    return _cache
+
+
+def lookup(agent_id: str, question: str) -> str | None:
+    """Returns cached SQL for the question, or None when disabled or on a miss."""
+    if not config_project.NL_SQL_CACHE_ENABLED:
+        return None
+    try:
+        return get_cache().get(agent_id, question)
+    except Exception as e:
+        logger.warning(f"NL-to-SQL cache lookup failed: {e}")
+        return None
+
+
+def store(agent_id: str, question: str, responses: list[dict]):
+    """Caches the generated SQL from a CA stream, if the stream produced SQL and data."""
+    if not config_project.NL_SQL_CACHE_ENABLED:
+        return
+    sql = next((m["sql_generated"] for m in responses if isinstance(m, dict) and "sql_generated" in m), None)
+    has_data = any(isinstance(m, dict) and "data_retrieved" in m for m in responses)
+    if not sql or not has_data:
+        return
+    try:
+        get_cache().put(agent_id, question, sql)
+    except Exception as e:
+        logger.warning(f"NL-to-SQL cache store failed: {e}")
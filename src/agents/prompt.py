@@ -24,6 +24,8 @@ PATIENT_RECORDS_ANALYTICS_INSTRUCTION = r"""
       politely inform them that you can only assist with Patient Records data-related questions.
   * **Ambiguity:** If a query is vague (e.g., "How are my patients?"), ask for clarification before using a tool (e.g., "Which patient ID or metric are you interested in?").
   * **Presentation:** When you get a result from a tool, summarize it for the user in a clear, natural way. Do not just output raw data.
+  * **Unavailable Data:** If the tool returns status `unavailable`, tell the user that the patient records data is temporarily
+    unavailable and to try again shortly. Do not call the tool again for the same question.
 """
 
 MEDICATION_INVENTORY_DESCRIPTION = "An intelligent Pharmacy Inventory Management agent that helps users find where medications are currently in stock at retail pharmacy locations."
@@ -75,6 +77,8 @@ MEDICATION_INVENTORY_INSTRUCTION = r"""
     (e.g., "Which medication are you looking for, and in what area/zip code?").
   * **Presentation:** When you get a result from a tool, summarize it for the user in a clear, actionable way.
     Include specific pharmacy names, locations (zip codes), and stock levels.
+  * **Unavailable Data:** If the tool returns status `unavailable`, tell the user that the pharmacy inventory data is temporarily
+    unavailable and to try again shortly. Do not call the tool again for the same question.
 """
 
 PBM_DESCRIPTION = "An intelligent Pharmacy Benefits Management (PBM) agent that helps users analyze insurance claims, understand coverage decisions, and track medication costs and copays."
@@ -123,6 +127,8 @@ PBM_INSTRUCTION = r"""
     (e.g., "Which medication and insurance plan are you asking about?").
   * **Presentation:** When you get a result from a tool, summarize it for the user in a clear, actionable way.
     Always explicitly state the Approval Status and Cost/Copay where relevant.
+  * **Unavailable Data:** If the tool returns status `unavailable`, tell the user that the claims data is temporarily
+    unavailable and to try again shortly. Do not call the tool again for the same question.
 """
 
 GOOGLE_SEARCH_AGENT_INSTRUCTION = r"""You are a healthcare knowledge specialist that provides context and information
@@ -215,8 +221,8 @@ You have access to three specialized tools:
 - Medication availability/inventory queries → call medication_inventory_agent tool
 - Educational questions about medical concepts → call google_search_agent tool
 - **Multi-domain queries**: Call tools in ANY order that makes sense for the query:
-  - "Find patients with hypertension and where they can get medication" → call patient_data_agent,
-    then medication_inventory_agent (or in parallel if possible)
+  - "Find patients with hypertension and where they can get medication" → call patient_data_agent
+    and medication_inventory_agent in parallel
   - "Where can I get metformin and what are its side effects?" → call medication_inventory_agent
     AND google_search_agent (can be in same run)
   - "Show diabetic patients, check insulin availability, and explain diabetes" → call all three tools
@@ -225,6 +231,11 @@ You have access to three specialized tools:
     if that's what the user asks for
 - **Key principle**: You can call multiple agents in the SAME RUN if the query asks for information
   from multiple domains. Don't artificially split into follow-up turns.
+- **Parallel calls**: When the sub-questions are independent (no tool needs another tool's result),
+  issue ALL of those tool calls together in a SINGLE response so they run concurrently.
+  - "Which of James Smith's prescribed meds are in stock and covered by his plan?" → call patient_data_agent,
+    medication_inventory_agent and pbm_data_agent together, each with a self-contained question
+  - Only call tools one after another when a later call needs values returned by an earlier one
 - Unrelated questions (weather, sports, etc.) → Politely decline and explain your scope
 
 **CRITICAL OUTPUT FORMATTING RULES - MUST FOLLOW:**
@@ -268,6 +279,8 @@ You have access to three specialized tools:
 - If a query is ambiguous, ask clarifying questions before calling tools
 - Maintain context across multi-turn conversations
 - Present data in the most readable format (tables for structured data, charts when available)
+- If a tool reports that its data is temporarily unavailable, answer with what the other tools returned
+  and tell the user which part could not be retrieved right now. Do not retry that tool in the same turn.
 
 **Example Workflows:**
 - "Show me patients with hypertension" → call patient_data_agent tool
@@ -0,0 +1,219 @@
+'''
+File: result_store.py
+Project: adk-data-analytics
+File Created: Sunday, 18th October 2026 11:20:51 am
+-------------------------------------------------------------
+Copyright 2025 Google LLC. This software is provided as-is, without
+warranty or representation for any use or purpose. Your use of it is
+subject to your agreement with Google.
+Licensed under the Apache License, Version 2.0 (the 'License');
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an 'AS IS' BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import google.genai.types as types
+from google.adk.tools import ToolContext
+
+from . import config_project
+from .utils_google_logging import get_logger
+
+logger = get_logger(__name__)
+
+ARTIFACT_PREFIX = "artifact:"
+LOCAL_PREFIX = "local:"
+
+RESULT_STORE_DIR = Path(__file__).parent / config_project.RESULT_STORE_DIR
+
+
+def _row_count(data) -> int:
+    if isinstance(data, list):
+        return len(data)
+    if isinstance(data, dict) and data:
+        return len(next(iter(data.values())))
+    return 0
+
+
+def _serialize(data) -> bytes:
+    return json.dumps(data, default=str, separators=(",", ":")).encode("utf-8")
+
+
+def _build_ref(handle: str, message: dict, size_bytes: int, version: int | None = None) -> dict:
+    return {
+        "handle": handle,
+        "version": version,
+        "row_count": _row_count(message["data_retrieved"]),
+        "schema": message.get("data_schema", []),
+        "size_bytes": size_bytes,
+    }
+
+
+def _save_local(payload: bytes, digest: str) -> str:
+    RESULT_STORE_DIR.mkdir(parents=True, exist_ok=True)
+    path = RESULT_STORE_DIR / f"{digest}.json"
+    # Content-addressed: identical results are written once
+    if path.exists():
+        # Reuse counts as a write for the sweep
+        path.touch()
+    else:
+        # Every writer gets its own temp file; concurrent writers of one digest replace path with the same bytes
+        with tempfile.NamedTemporaryFile(dir=RESULT_STORE_DIR, prefix=f"{digest}.", suffix=".tmp", delete=False) as tmp_file:
+            tmp_file.write(payload)
+        os.replace(tmp_file.name, path)
+    sweep_local_results()
+    return f"{LOCAL_PREFIX}{digest}"
+
+
+_sweep_lock = threading.Lock()
+_last_sweep = 0.0
+
+
+def sweep_local_results(force: bool = False) -> int:
+    """Deletes expired local result files, then the oldest until the store fits its size limit.
+
+    Runs at most once per RESULT_STORE_SWEEP_INTERVAL_S unless forced; returns the number of files deleted.
+    """
+    global _last_sweep
+    now = time.time()
+    with _sweep_lock:
+        if not force and now - _last_sweep < config_project.RESULT_STORE_SWEEP_INTERVAL_S:
+            return 0
+        _last_sweep = now
+    files = []
+    for path in RESULT_STORE_DIR.glob("*"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+    files.sort()
+    total_bytes = sum(size for _, size, _ in files)
+    deleted = 0
+    for mtime, size, path in files:
+        expired = now - mtime >= config_project.RESULT_STORE_TTL_S
+        if not expired and total_bytes <= config_project.RESULT_STORE_MAX_BYTES:
+            break
+        # Another writer's temp file is only removed once it is clearly abandoned
+        if path.suffix == ".tmp" and not expired:
+            continue
+        path.unlink(missing_ok=True)
+        total_bytes -= size
+        deleted += 1
+    if deleted:
+        logger.info(f"Swept {deleted} local result file(s), {total_bytes} bytes left in {RESULT_STORE_DIR}")
+    return deleted
+
+
+def _offload_local(message: dict, payload: bytes, digest: str) -> dict:
+    """Returns message with a local data_ref, or unchanged (rows inline) if the file can't be written."""
+    try:
+        ref = _build_ref(_save_local(payload, digest), message, len(payload))
+    except OSError as e:
+        logger.warning(f"Could not store a {len(payload)} byte result locally, keeping it inline: {e}")
+        return message
+    logger.info(f"Offloaded {len(payload)} bytes of data_retrieved to {ref['handle']}")
+    return _with_ref(message, ref)
+
+
+def _offloadable(message) -> bool:
+    return isinstance(message, dict) and "data_retrieved" in message
+
+
+def _with_ref(message: dict, ref: dict) -> dict:
+    stored = {k: v for k, v in message.items() if k not in ("data_retrieved", "data_schema")}
+    stored["data_ref"] = ref
+    return stored
+
+
+def offload_responses(responses: list[dict]) -> list[dict]:
+    """Returns a copy of responses where data results above the size threshold
+    are replaced by a compact 'data_ref' handle to a local result file.
+
+    Use this from sync tools; async tools should prefer offload_responses_async,
+    which writes ADK artifacts when an artifact service is configured. A result
+    that can't be written stays inline.
+    """
+    stored_responses = []
+    for message in responses:
+        if _offloadable(message):
+            payload = _serialize(message["data_retrieved"])
+            if len(payload) >= config_project.RESULT_OFFLOAD_THRESHOLD_BYTES:
+                message = _offload_local(message, payload, hashlib.sha256(payload).hexdigest())
+        stored_responses.append(message)
+    return stored_responses
+
+
+async def offload_responses_async(responses: list[dict], tool_context: ToolContext) -> list[dict]:
+    """Async variant of offload_responses that stores large results as ADK artifacts.
+
+    Falls back to the local result store when the runner has no artifact service.
+    A result that can't be stored either way stays inline.
+    """
+    stored_responses = []
+    for message in responses:
+        if _offloadable(message):
+            payload = _serialize(message["data_retrieved"])
+            if len(payload) >= config_project.RESULT_OFFLOAD_THRESHOLD_BYTES:
+                digest = hashlib.sha256(payload).hexdigest()
+                filename = f"ca_result_{digest}.json"
+                try:
+                    version = await tool_context.save_artifact(filename, types.Part.from_bytes(data=payload, mime_type="application/json"))
+                except ValueError:
+                    # save_artifact raises ValueError when no artifact service is configured
+                    message = _offload_local(message, payload, digest)
+                except Exception as e:
+                    logger.warning(f"Could not save a {len(payload)} byte result as an artifact, keeping it inline: {e}")
+                else:
+                    ref = _build_ref(f"{ARTIFACT_PREFIX}{filename}", message, len(payload), version)
+                    message = _with_ref(message, ref)
+                    logger.info(f"Offloaded {len(payload)} bytes of data_retrieved to {ref['handle']}")
+        stored_responses.append(message)
+    return stored_responses
+
+
+async def resolve_data_ref(ref: dict, artifact_service=None, app_name: str | None = None, user_id: str | None = None, session_id: str | None = None):
+    """Loads the rows behind a 'data_ref' handle.
+
+    Artifact handles are resolved against the session the frontend is reading,
+    so app_name, user_id and session_id must be supplied for them.
+
+    Args:
+        ref: The 'data_ref' dict stored in session state.
+        artifact_service: The runner's artifact service (artifact handles only).
+        app_name: The app the session belongs to.
+        user_id: The session's user.
+        session_id: The session the artifact was saved under.
+
+    Returns:
+        The original 'data_retrieved' payload.
+    """
+    handle = ref["handle"]
+    if handle.startswith(LOCAL_PREFIX):
+        return json.loads((RESULT_STORE_DIR / f"{handle[len(LOCAL_PREFIX):]}.json").read_bytes())
+    if handle.startswith(ARTIFACT_PREFIX):
+        if artifact_service is None:
+            raise ValueError(f"An artifact service is required to resolve {handle}")
+        part = await artifact_service.load_artifact(
+            app_name=app_name,
+            user_id=user_id,
+            session_id=session_id,
+            filename=handle[len(ARTIFACT_PREFIX):],
+            version=ref.get("version"),
+        )
+        if part is None:
+            raise KeyError(f"Artifact not found for {handle}")
+        return json.loads(part.inline_data.data)
+    raise ValueError(f"Unknown result handle: {handle}")
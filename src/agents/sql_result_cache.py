@@ -0,0 +1,280 @@
+'''
+File: sql_result_cache.py
+Project: adk-data-analytics
+File Created: Sunday, 18th October 2026 1:48:26 pm
+-------------------------------------------------------------
+Copyright 2025 Google LLC. This software is provided as-is, without
+warranty or representation for any use or purpose. Your use of it is
+subject to your agreement with Google.
+Licensed under the Apache License, Version 2.0 (the 'License');
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an 'AS IS' BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+import hashlib
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from . import config_project
+from .cache_backends import create_backend
+from .utils_google_logging import get_logger
+
+logger = get_logger(__name__)
+
+_TABLE_PATTERN = re.compile(r"\b(?:FROM|JOIN)\s+`?([\w\-]+(?:\.[\w\-]+){1,2})`?", re.IGNORECASE)
+
+
+def _split_sql(sql: str) -> list[tuple[bool, str]]:
+    """Splits SQL into (is_literal, text) chunks with comments removed."""
+    chunks, buf, i, n = [], [], 0, len(sql)
+    while i < n:
+        ch = sql[i]
+        if ch in ("'", '"', "`"):
+            j = i + 1
+            while j < n and sql[j] != ch:
+                j += 2 if sql[j] == "\\" else 1
+            chunks.append((False, "".join(buf)))
+            buf = []
+            chunks.append((True, sql[i:j + 1]))
+            i = j + 1
+        elif sql.startswith("--", i) or ch == "#":
+            j = sql.find("\n", i)
+            i = n if j == -1 else j
+        elif sql.startswith("/*", i):
+            j = sql.find("*/", i + 2)
+            i = n if j == -1 else j + 2
+        else:
+            buf.append(ch)
+            i += 1
+    chunks.append((False, "".join(buf)))
+    return chunks
+
+
+def canonicalize_sql(sql: str) -> str:
+    """Strips comments, collapses whitespace and drops the trailing semicolon, leaving literals untouched."""
+    parts = [text if is_literal else re.sub(r"\s+", " ", text) for is_literal, text in _split_sql(sql)]
+    return "".join(parts).strip().rstrip(";").strip()
+
+
+def referenced_tables(sql: str) -> list[str]:
+    """Returns the dataset.table names a query reads, ignoring string literals."""
+    searchable = "".join(text if not is_literal or text.startswith("`") else "''" for is_literal, text in _split_sql(sql))
+    tables = {".".join(match.split(".")[-2:]) for match in _TABLE_PATTERN.findall(searchable)}
+    return sorted(tables)
+
+
+# ----------------------------------------------------------------------------
+# Freshness probes
+# ----------------------------------------------------------------------------
+
+class BigQueryFreshnessProbe:
+    """Reads a table's freshness from its watermark column, or from table metadata.
+
+    Tables listed in SQL_RESULT_CACHE_TABLE_WATERMARKS report MAX(<column>)
+    (e.g. medication_inventory.last_updated, pbm_claims.claim_date); every
+    other table reports its last-modified time.
+    """
+
+    def __init__(self, watermark_columns: dict[str, str]):
+        self._watermark_columns = watermark_columns
+
+    def watermark(self, table: str) -> str:
+        from .bq_executor import get_bigquery_client
+
+        client = get_bigquery_client()
+        table_ref = f"{config_project.PROJECT_ID}.{table}"
+        column = self._watermark_columns.get(table)
+        if column:
+            rows = client.query(f"SELECT CAST(MAX(`{column}`) AS STRING) FROM `{table_ref}`").result(timeout=config_project.BQ_QUERY_TIMEOUT_S)
+            return str(next(iter(rows))[0])
+        return client.get_table(table_ref).modified.isoformat()
+
+
+class StaticFreshnessProbe:
+    """A local stand-in for the BigQuery probe; tests bump watermarks by hand."""
+
+    def __init__(self, watermarks: dict[str, str] | None = None):
+        self._watermarks = dict(watermarks or {})
+        self._lock = threading.Lock()
+
+    def set_watermark(self, table: str, value: str):
+        with self._lock:
+            self._watermarks[table] = value
+
+    def watermark(self, table: str) -> str:
+        with self._lock:
+            return self._watermarks.get(table, "0")
+
+
+# ----------------------------------------------------------------------------
+# Cache
+# ----------------------------------------------------------------------------
+
+class SqlResultCache:
+    """Caches SQL results keyed by (data agent, canonicalized SQL).
+
+    Each entry records the watermark of every table it read. An entry younger
+    than the smallest max staleness of its tables is served without probing;
+    older entries are re-validated against the probe and dropped as soon as any
+    watermark has moved.
+    """
+
+    def __init__(self, backend, probe, ttl_s: float, max_staleness_s: dict[str, float], default_max_staleness_s: float):
+        self._backend = backend
+        self._probe = probe
+        self._ttl_s = ttl_s
+        self._max_staleness_s = max_staleness_s
+        self._default_max_staleness_s = default_max_staleness_s
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "invalidations": 0, "bytes_saved": 0}
+
+    @staticmethod
+    def _key(agent_id: str, sql: str) -> str:
+        return hashlib.sha256(f"{agent_id}\0{canonicalize_sql(sql)}".encode()).hexdigest()
+
+    def _staleness_budget(self, tables) -> float:
+        return min((self._max_staleness_s.get(t, self._default_max_staleness_s) for t in tables), default=0)
+
+    def get(self, agent_id: str, sql: str) -> list[dict] | None:
+        """Returns the cached result messages, or None on a miss or a moved watermark."""
+        key = self._key(agent_id, sql)
+        entry = self._backend.get(key)
+        if entry is not None and time.time() - entry["checked_at"] > self._staleness_budget(entry["tables"]):
+            current = {table: self._probe.watermark(table) for table in entry["tables"]}
+            if current != entry["tables"]:
+                self._backend.delete(key)
+                self._count("invalidations")
+                entry = None
+            else:
+                entry["checked_at"] = time.time()
+                self._backend.set(key, entry, self._ttl_s)
+        if entry is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        self._count("bytes_saved", entry["size_bytes"])
+        return entry["responses"]
+
+    def watermarks(self, sql: str) -> dict[str, str]:
+        """Returns the current watermark of every table the SQL reads.
+
+        Take these before running the query: a write landing while it runs then
+        leaves the entry behind the table instead of marking stale rows as fresh.
+        """
+        return {table: self._probe.watermark(table) for table in referenced_tables(sql)}
+
+    def put(self, agent_id: str, sql: str, responses: list[dict], watermarks: dict[str, str]):
+        """Stores result messages together with the watermarks taken before their query ran."""
+        if not watermarks:
+            return
+        now = time.time()
+        entry = {
+            "responses": responses,
+            "tables": dict(watermarks),
+            "stored_at": now,
+            "checked_at": now,
+            "size_bytes": len(json.dumps(responses, default=str)),
+        }
+        self._backend.set(self._key(agent_id, sql), entry, self._ttl_s)
+        self._count("stores")
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+
+_cache: SqlResultCache | None = None
+_cache_lock = threading.Lock()
+# Stores write to the backend off the request path
+_store_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="sql-result-cache")
+
+
+def _create_probe():
+    if config_project.SQL_RESULT_CACHE_FRESHNESS_PROBE == "static":
+        return StaticFreshnessProbe()
+    return BigQueryFreshnessProbe(config_project.SQL_RESULT_CACHE_TABLE_WATERMARKS)
+
+
+def get_cache() -> SqlResultCache:
+    """Returns the process-wide SQL result cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                backend = create_backend(
+                    config_project.SQL_RESULT_CACHE_BACKEND,
+                    Path(__file__).parent / config_project.SQL_RESULT_CACHE_PATH,
+                    config_project.SQL_RESULT_CACHE_MAX_ENTRIES,
+                    table="sql_results",
+                )
+                _cache = SqlResultCache(
+                    backend,
+                    _create_probe(),
+                    config_project.SQL_RESULT_CACHE_TTL_S,
+                    config_project.SQL_RESULT_CACHE_MAX_STALENESS_S,
+                    config_project.SQL_RESULT_CACHE_DEFAULT_MAX_STALENESS_S,
+                )
+    return _cache
+
+
+def lookup(agent_id: str, sql: str) -> list[dict] | None:
+    """Returns cached result messages for the SQL, or None when disabled or on a miss."""
+    if not config_project.SQL_RESULT_CACHE_ENABLED:
+        return None
+    try:
+        return get_cache().get(agent_id, sql)
+    except Exception as e:
+        logger.warning(f"SQL result cache lookup failed: {e}")
+        return None
+
+
+def watermarks(sql: str) -> dict[str, str] | None:
+    """Returns the watermarks to store with the SQL's result, or None when disabled or the probe fails."""
+    if not config_project.SQL_RESULT_CACHE_ENABLED:
+        return None
+    try:
+        return get_cache().watermarks(sql)
+    except Exception as e:
+        logger.warning(f"SQL result cache freshness probe failed: {e}")
+        return None
+
+
+def _store(agent_id: str, sql: str, responses: list[dict], watermarks: dict[str, str]):
+    try:
+        get_cache().put(agent_id, sql, responses, watermarks)
+    except Exception as e:
+        logger.warning(f"SQL result cache store failed: {e}")
+
+
+def store(agent_id: str, responses: list[dict], watermarks: dict[str, str] | None):
+    """Caches the SQL and data messages of a response list in the background.
+
+    watermarks must come from watermarks() called before the SQL ran; without
+    them nothing is stored.
+    """
+    if not config_project.SQL_RESULT_CACHE_ENABLED or not watermarks:
+        return
+    sql_message = next((m for m in responses if isinstance(m, dict) and "sql_generated" in m), None)
+    data_message = next((m for m in responses if isinstance(m, dict) and "data_retrieved" in m), None)
+    if not sql_message or not data_message:
+        return
+    _store_executor.submit(_store, agent_id, sql_message["sql_generated"], [sql_message, data_message], watermarks)
+
+
+def cache_stats() -> dict:
+    """Returns hit/miss/invalidation counts and bytes saved, or an empty dict before first use."""
+    return _cache.stats() if _cache else {}
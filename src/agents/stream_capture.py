@@ -0,0 +1,248 @@
+'''
+File: stream_capture.py
+Project: adk-data-analytics
+File Created: Sunday, 18th October 2026 8:24:10 pm
+-------------------------------------------------------------
+Copyright 2025 Google LLC. This software is provided as-is, without
+warranty or representation for any use or purpose. Your use of it is
+subject to your agreement with Google.
+Licensed under the Apache License, Version 2.0 (the 'License');
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an 'AS IS' BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import itertools
+import json
+import random
+import struct
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from google.api_core import exceptions as core_exceptions
+
+from . import config_project
+from .lazy_imports import lazy_import
+from .utils_google_logging import get_logger
+
+logger = get_logger(__name__)
+
+geminidataanalytics = lazy_import("google.cloud.geminidataanalytics")
+
+# Capture file layout, gzip-compressed: MAGIC, one JSON header line, then per message
+# a little-endian (offset seconds: float64, length: uint32) record followed by the
+# serialized google.cloud.geminidataanalytics.v1.Message.
+MAGIC = b"CASTREAM1\n"
+SUFFIX = ".castream.gz"
+_RECORD = struct.Struct("<dI")
+
+# Writes run off the request path; one thread keeps file output ordered and cheap
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ca-stream-capture")
+_warned = False
+_warned_lock = threading.Lock()
+
+
+# ----------------------------------------------------------------------------
+# Recording
+# ----------------------------------------------------------------------------
+
+class StreamRecorder:
+    """Buffers the raw messages of one Chat stream with their arrival offsets and saves them on completion."""
+
+    def __init__(self, agent_id: str, directory: Path):
+        self.agent_id = agent_id
+        self.directory = directory
+        self.captured_at = time.time()
+        self.records: list[tuple[float, bytes]] = []
+
+    def record(self, offset_s: float, raw_message):
+        self.records.append((offset_s, raw_message.SerializeToString()))
+
+    def save(self):
+        path = self.directory / self.agent_id / f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime(self.captured_at))}-{uuid.uuid4().hex[:8]}{SUFFIX}"
+        header = {"agent_id": self.agent_id, "captured_at": self.captured_at, "messages": len(self.records)}
+        _writer.submit(_write_capture, path, header, self.records)
+
+
+def _write_capture(path: Path, header: dict, records: list[tuple[float, bytes]]):
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(path, "wb", compresslevel=6) as f:
+            f.write(MAGIC)
+            f.write(json.dumps(header).encode() + b"\n")
+            for offset_s, payload in records:
+                f.write(_RECORD.pack(offset_s, len(payload)))
+                f.write(payload)
+    except Exception as e:
+        logger.warning(f"Could not write CA stream capture {path}: {e}")
+
+
+def start_recorder(agent_id: str) -> StreamRecorder | None:
+    """Returns a recorder for a new Chat stream when capture is enabled and the stream is sampled, else None."""
+    if not config_project.CA_STREAM_CAPTURE_DIR or random.random() >= config_project.CA_STREAM_CAPTURE_SAMPLE_RATE:
+        return None
+    global _warned
+    with _warned_lock:
+        if not _warned:
+            _warned = True
+            logger.warning(
+                f"Capturing raw CA chat streams to {config_project.CA_STREAM_CAPTURE_DIR}; "
+                "captures contain query results and must be handled like the source data."
+            )
+    return StreamRecorder(agent_id, Path(config_project.CA_STREAM_CAPTURE_DIR))
+
+
+# ----------------------------------------------------------------------------
+# Loading
+# ----------------------------------------------------------------------------
+
+@dataclass
+class StreamCapture:
+    """One captured Chat stream: serialized messages with their offsets from the Chat request."""
+
+    agent_id: str
+    captured_at: float
+    records: list[tuple[float, bytes]] = field(default_factory=list)
+    path: Path | None = None
+
+    @property
+    def duration_s(self) -> float:
+        return self.records[-1][0] if self.records else 0.0
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(len(payload) for _, payload in self.records)
+
+
+def load_capture(path: str | Path) -> StreamCapture:
+    """Reads a capture file written by StreamRecorder."""
+    path = Path(path)
+    with gzip.open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a CA stream capture")
+        header = json.loads(f.readline())
+        records = []
+        while True:
+            prefix = f.read(_RECORD.size)
+            if not prefix:
+                break
+            offset_s, length = _RECORD.unpack(prefix)
+            records.append((offset_s, f.read(length)))
+    return StreamCapture(header["agent_id"], header["captured_at"], records, path)
+
+
+def load_captures(directory: str | Path) -> list[StreamCapture]:
+    """Loads every capture under directory, oldest first."""
+    return sorted((load_capture(p) for p in Path(directory).rglob(f"*{SUFFIX}")), key=lambda c: c.captured_at)
+
+
+# ----------------------------------------------------------------------------
+# Replay
+# ----------------------------------------------------------------------------
+
+class ReplayStream:
+    """Plays a capture back as a Chat stream, sleeping so message i arrives at offset_i * time_scale.
+
+    time_scale 1.0 reproduces the captured timing, 0.5 plays twice as fast and
+    0 delivers every message immediately. Iterates synchronously or
+    asynchronously, like the sync and async GAPIC streams.
+    """
+
+    def __init__(self, capture: StreamCapture, time_scale: float = 1.0):
+        self.capture = capture
+        self.time_scale = time_scale
+        self.started = time.perf_counter()
+        self._cancelled = False
+        self._position = 0
+        self._aiter = None
+
+    def _delay(self, offset_s: float) -> float:
+        return self.started + offset_s * self.time_scale - time.perf_counter()
+
+    def _next_record(self) -> tuple[float, bytes] | None:
+        if self._cancelled or self._position >= len(self.capture.records):
+            return None
+        record = self.capture.records[self._position]
+        self._position += 1
+        return record
+
+    def __iter__(self):
+        while (record := self._next_record()) is not None:
+            delay = self._delay(record[0])
+            if delay > 0:
+                time.sleep(delay)
+            yield geminidataanalytics.Message.deserialize(record[1])
+
+    async def _aiterate(self):
+        while (record := self._next_record()) is not None:
+            delay = self._delay(record[0])
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield geminidataanalytics.Message.deserialize(record[1])
+
+    def __aiter__(self):
+        # GAPIC async streams hand out one underlying iterator, so a stream can be resumed after anext()
+        if self._aiter is None:
+            self._aiter = self._aiterate()
+        return self._aiter
+
+    def cancel(self):
+        self._cancelled = True
+
+
+class _ReplaySource:
+    def __init__(self, captures: list[StreamCapture], time_scale: float):
+        self.time_scale = time_scale
+        grouped = defaultdict(list)
+        for capture in captures:
+            grouped[capture.agent_id].append(capture)
+        self._by_agent = {agent_id: itertools.cycle(group) for agent_id, group in grouped.items()}
+        self._lock = threading.Lock()
+
+    def next_stream(self, request) -> ReplayStream:
+        agent_id = request.conversation_reference.data_agent_context.data_agent.rsplit("/", 1)[-1]
+        with self._lock:
+            captures = self._by_agent.get(agent_id)
+            if captures is None:
+                raise core_exceptions.NotFound(f"No captured streams for data agent {agent_id}")
+            return ReplayStream(next(captures), self.time_scale)
+
+
+class ReplayChatClient(_ReplaySource):
+    """Stands in for DataChatServiceClient: Chat replays the data agent's captures round-robin."""
+
+    def create_conversation(self, request, retry=None, timeout=None):
+        return request.conversation
+
+    def chat(self, request, timeout=None):
+        stream = self.next_stream(request)
+        # The sync GAPIC client returns once the first message has arrived
+        if stream.capture.records:
+            delay = stream._delay(stream.capture.records[0][0])
+            if delay > 0:
+                time.sleep(delay)
+        return stream
+
+
+class ReplayChatAsyncClient(_ReplaySource):
+    """Stands in for DataChatServiceAsyncClient: Chat replays the data agent's captures round-robin."""
+
+    async def create_conversation(self, request, retry=None, timeout=None):
+        return request.conversation
+
+    async def chat(self, request, timeout=None):
+        return self.next_stream(request)
@@ -0,0 +1,147 @@
+'''
+File: tracing.py
+Project: adk-data-analytics
+File Created: Sunday, 18th October 2026 5:47:03 pm
+-------------------------------------------------------------
+Copyright 2025 Google LLC. This software is provided as-is, without
+warranty or representation for any use or purpose. Your use of it is
+subject to your agreement with Google.
+Licensed under the Apache License, Version 2.0 (the 'License');
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an 'AS IS' BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+import contextvars
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import Status, StatusCode
+
+from .utils_google_logging import get_logger
+
+logger = get_logger(__name__)
+
+# "none" uses the globally configured tracer provider (e.g. Cloud Trace when deployed),
+# "console" prints finished spans and "memory" keeps them for get_finished_spans().
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()
+# Spans whose closing callback never ran (e.g. a tool raised) are ended once this many are open
+MAX_OPEN_SPANS = int(os.getenv("TRACING_MAX_OPEN_SPANS", "10000"))
+
+# The innermost span opened by this module in the current task. Callbacks run in the task that
+# executes the agent or tool, and AgentTool runs its sub-agent inline, so a span opened in a
+# before_* callback is the parent of everything the sub-agent and its tools do.
+_active_span: contextvars.ContextVar = contextvars.ContextVar("adk_data_agent_active_span", default=None)
+
+_tracer = None
+_memory_exporter: InMemorySpanExporter | None = None
+_open_spans: OrderedDict[str, tuple] = OrderedDict()
+_lock = threading.Lock()
+
+
+def configure_tracing(exporter: str = TRACING_EXPORTER) -> InMemorySpanExporter | None:
+    """Selects where spans go. Returns the in-memory exporter when exporter is "memory".
+
+    "console" and "memory" install a private tracer provider so they work offline
+    without touching the global provider ADK or the deployment may have set.
+    """
+    global _tracer, _memory_exporter
+    if exporter == "none":
+        _tracer, _memory_exporter = trace.get_tracer(__name__), None
+        return None
+    provider = TracerProvider()
+    if exporter == "memory":
+        _memory_exporter = InMemorySpanExporter()
+        provider.add_span_processor(SimpleSpanProcessor(_memory_exporter))
+    elif exporter == "console":
+        _memory_exporter = None
+        provider.add_span_processor(BatchSpanProcessor(ConsoleSpanExporter()))
+    else:
+        raise ValueError(f"Unknown TRACING_EXPORTER {exporter!r}, expected none, console or memory")
+    _tracer = provider.get_tracer(__name__)
+    return _memory_exporter
+
+
+def get_finished_spans() -> list:
+    """Returns spans collected by the in-memory exporter (empty unless configured with "memory")."""
+    return list(_memory_exporter.get_finished_spans()) if _memory_exporter else []
+
+
+def _get_tracer():
+    if _tracer is None:
+        configure_tracing()
+    return _tracer
+
+
+def _parent_context():
+    parent = _active_span.get()
+    # Without an active span of ours, fall back to the current OpenTelemetry context (e.g. ADK's invocation span)
+    return trace.set_span_in_context(parent) if parent is not None else None
+
+
+def start_span(key: str, name: str, attributes: dict | None = None):
+    """Opens a span that is closed later by end_span(key), typically from a matching after_* callback."""
+    span = _get_tracer().start_span(name, context=_parent_context(), attributes=attributes)
+    with _lock:
+        _open_spans[key] = (span, _active_span.get())
+        abandoned = [_open_spans.popitem(last=False) for _ in range(len(_open_spans) - MAX_OPEN_SPANS)]
+    for _, (abandoned_span, _) in abandoned:
+        abandoned_span.set_status(Status(StatusCode.ERROR, "span abandoned without a closing callback"))
+        abandoned_span.end()
+    _active_span.set(span)
+    return span
+
+
+def end_span(key: str, attributes: dict | None = None, error: str | None = None):
+    """Closes a span opened by start_span and restores its parent as the active span."""
+    with _lock:
+        entry = _open_spans.pop(key, None)
+    if entry is None:
+        return
+    span, parent = entry
+    if attributes:
+        span.set_attributes(attributes)
+    if error:
+        span.set_status(Status(StatusCode.ERROR, error))
+    span.end()
+    if _active_span.get() is span:
+        _active_span.set(parent)
+
+
+@contextmanager
+def span(name: str, attributes: dict | None = None):
+    """Runs a block inside a child span of the active span."""
+    with _get_tracer().start_as_current_span(name, context=_parent_context(), attributes=attributes) as current:
+        token = _active_span.set(current)
+        try:
+            yield current
+        finally:
+            _active_span.reset(token)
+
+
+def set_attributes(attributes: dict, error: str | None = None):
+    """Sets attributes, and optionally an error status, on the active span."""
+    current = _active_span.get() or trace.get_current_span()
+    current.set_attributes(attributes)
+    if error:
+        current.set_status(Status(StatusCode.ERROR, error))
+
+
+def add_event(name: str, attributes: dict | None = None):
+    """Adds an event to the active span."""
+    current = _active_span.get() or trace.get_current_span()
+    current.add_event(name, attributes=attributes or {})
+
+
+configure_tracing()
@@ -0,0 +1,105 @@
+'''
+File: turn_ledger.py
+Project: adk-data-analytics
+File Created: Sunday, 18th October 2026 11:58:20 pm
+-------------------------------------------------------------
+Copyright 2025 Google LLC. This software is provided as-is, without
+warranty or representation for any use or purpose. Your use of it is
+subject to your agreement with Google.
+Licensed under the Apache License, Version 2.0 (the 'License');
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an 'AS IS' BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+import threading
+from collections.abc import Iterable
+
+from google.adk.tools.tool_context import ToolContext
+
+# Session state key of the ledger: {function_call_id: {'tool_name', 'input', 'result'}}.
+# Each tool result of a turn is stored here once; agent outputs refer to it by function call ID.
+LEDGER_KEY = 'turn_ledger'
+
+# Name of the agent that writes the ledger, set by the orchestrator. AgentTool seeds a sub-agent's
+# session with a copy of the caller's state, so a sub-agent run as the orchestrator's tool sees
+# the orchestrator here and leaves storing its results to it; run on its own, it sees no owner.
+LEDGER_OWNER_KEY = 'turn_ledger_owner'
+
+# Turns that never reach their agent's after callback (e.g. errors) are dropped oldest-first past this bound
+_MAX_OPEN_TURNS = 1000
+
+
+def function_call_order(tool_context: ToolContext) -> tuple[int, int]:
+    """Returns (event index, position) of this call in the model response that issued it.
+
+    Sorting by this keeps results in the order the model asked for them,
+    regardless of which concurrent call finished first.
+    """
+    events = tool_context._invocation_context.session.events
+    for event_index in range(len(events) - 1, -1, -1):
+        for position, function_call in enumerate(events[event_index].get_function_calls()):
+            if function_call.id == tool_context.function_call_id:
+                return event_index, position
+    return len(events), 0
+
+
+class TurnLedger:
+    """Collects each turn's tool calls and results in process, by invocation and function call ID.
+
+    Parallel function calls run concurrently, each with its own state delta, and
+    the deltas are merged key by key, so tools writing to a shared state key would
+    lose updates. Calls and results are collected here instead and written to state
+    once, by the after callback of the agent that owns the turn.
+    """
+
+    def __init__(self, max_open_turns: int = _MAX_OPEN_TURNS):
+        self.max_open_turns = max_open_turns
+        self._turns: dict[str, dict[str, dict]] = {}
+        self._lock = threading.Lock()
+
+    def _calls(self, invocation_id: str) -> dict[str, dict]:
+        while len(self._turns) >= self.max_open_turns and invocation_id not in self._turns:
+            self._turns.pop(next(iter(self._turns)))
+        return self._turns.setdefault(invocation_id, {})
+
+    def record_call(self, tool_context: ToolContext, tool_name: str, args: dict):
+        entry = {'order': function_call_order(tool_context), 'tool_name': tool_name, 'input': str(args)}
+        with self._lock:
+            self._calls(tool_context.invocation_id).setdefault(tool_context.function_call_id, {}).update(entry)
+
+    def record_result(self, tool_context: ToolContext, result):
+        with self._lock:
+            calls = self._calls(tool_context.invocation_id)
+            calls.setdefault(tool_context.function_call_id, {})['result'] = result
+
+    def pop(self, invocation_id: str) -> dict[str, dict]:
+        """Removes a turn and returns its entries by function call ID, in the order the calls were issued."""
+        with self._lock:
+            calls = self._turns.pop(invocation_id, {})
+        ordered = sorted(calls.items(), key=lambda item: item[1].get('order', (float('inf'), 0)))
+        return {function_call_id: {k: v for k, v in entry.items() if k != 'order'} for function_call_id, entry in ordered}
+
+
+_ledger = TurnLedger()
+
+
+def get_ledger() -> TurnLedger:
+    return _ledger
+
+
+def merge_items(items: Iterable) -> dict:
+    """Merges a list of dicts into one, e.g. the single-key messages of a data agent
+    stream ({query: ...}, {schema_resolved: ...}, {sql_generated: ...}) into one object
+    for display. Items that are not dicts are skipped."""
+    merged = {}
+    for item in items:
+        if isinstance(item, dict):
+            merged.update(item)
+    return merged
+
@@ -21,27 +21,378 @@ See the License for the specific language governing permissions and
 limitations under the License.
 '''
 
+import atexit
+import importlib.util
+import itertools
 import logging
 import os
+import queue
+import random
+import reprlib
+import sys
+import threading
+import time
+from collections import defaultdict
 
-# Attempt to import Google Cloud logging client if available
-try:
+from opentelemetry import trace
+
+# Cloud Logging is only looked up here; the library is imported and its Client() constructed
+# by the batch worker on its own thread, so importing this module needs no credentials and
+# doesn't pay for the Cloud Logging stack at startup.
+google_logging_available = importlib.util.find_spec("google.cloud.logging") is not None
+
+
+def create_cloud_logging_client():
+    """Constructs the Cloud Logging client; raises if the library or credentials are unavailable."""
     from google.cloud import logging as google_cloud_logging
-    from google.cloud.logging_v2.handlers import CloudLoggingHandler, setup_logging
-    from google.cloud.logging_v2.handlers.transports import SyncTransport
 
-    # For local development where the library might not be fully configured
-    # or if running outside GCP, it's good to have a fallback.
-    client = google_cloud_logging.Client()
-    google_logging_available = True
-except ImportError:
-    client = None
-    google_logging_available = False
+    return google_cloud_logging.Client()
+
+
+def detect_cloud_logging_resource(client):
+    """Returns the monitored resource of this environment (Agent Engine, Cloud Run, GCE...), as CloudLoggingHandler infers it."""
+    from google.cloud.logging_v2.handlers._monitored_resources import detect_resource
+
+    return detect_resource(client.project)
+
+
+def _resource_labels(resource, trace: str | None) -> dict:
+    from google.cloud.logging_v2.handlers._monitored_resources import add_resource_labels
+
+    return add_resource_labels(resource, logging.makeLogRecord({"_trace": trace})) or {}
+
+
+def _current_trace() -> tuple[str | None, str | None, bool]:
+    """Returns (trace_id, span_id, sampled) of the active OpenTelemetry span, if any."""
+    span_context = trace.get_current_span().get_span_context()
+    if not span_context.is_valid:
+        return None, None, False
+    return format(span_context.trace_id, "032x"), format(span_context.span_id, "016x"), span_context.trace_flags.sampled
 
 # Determine log level from environment variable or default to INFO
 LOG_LEVEL_STR = os.environ.get("LOG_LEVEL", "INFO").upper()
 LOG_LEVEL = getattr(logging, LOG_LEVEL_STR, logging.INFO)
 
+# Cloud Logging entries are queued and written in batches by a background worker.
+# When the queue is full, LOG_QUEUE_FULL_POLICY decides what gives: "drop_newest" discards
+# the incoming entry, "drop_oldest" evicts the oldest queued entry, and "block" waits up
+# to LOG_QUEUE_BLOCK_TIMEOUT_S before dropping.
+LOG_QUEUE_MAX_SIZE = int(os.environ.get("LOG_QUEUE_MAX_SIZE", "10000"))
+LOG_QUEUE_FULL_POLICY = os.environ.get("LOG_QUEUE_FULL_POLICY", "drop_oldest")
+LOG_QUEUE_BLOCK_TIMEOUT_S = float(os.environ.get("LOG_QUEUE_BLOCK_TIMEOUT_S", "0.01"))
+LOG_BATCH_SIZE = int(os.environ.get("LOG_BATCH_SIZE", "200"))
+LOG_FLUSH_INTERVAL_S = float(os.environ.get("LOG_FLUSH_INTERVAL_S", "1.0"))
+LOG_DELAY_WARN_S = float(os.environ.get("LOG_DELAY_WARN_S", "5.0"))
+
+
+class _StderrHandler(logging.StreamHandler):
+    """Writes to whatever sys.stderr is when a record is emitted, like logging.lastResort."""
+
+    def __init__(self):
+        super().__init__(sys.stderr)
+
+    @property
+    def stream(self):
+        return sys.stderr
+
+    @stream.setter
+    def stream(self, _stream):
+        pass
+
+
+def _create_worker_logger() -> logging.Logger:
+    """A stream-only logger for the batch worker's own problems, so reporting them never enqueues more entries."""
+    worker_logger = logging.getLogger(f"{__name__}.batch_worker")
+    if not worker_logger.handlers:
+        handler = _StderrHandler()
+        handler.setFormatter(logging.Formatter(fmt="%(asctime)s %(levelname)-8s [%(name)s] %(message)s", datefmt="%Y-%m-%d %H:%M:%S"))
+        worker_logger.addHandler(handler)
+    worker_logger.setLevel(logging.WARNING)
+    worker_logger.propagate = False
+    return worker_logger
+
+
+_worker_logger = _create_worker_logger()
+
+
+# Tool and agent payloads are logged as bounded summaries (type, keys, row counts, approximate
+# size, truncated preview) for a sampled fraction of calls. Full payloads are only logged when
+# LOG_FULL_PAYLOADS=true, so log volume and formatting cost stay flat as result sets grow.
+LOG_FULL_PAYLOADS = os.environ.get("LOG_FULL_PAYLOADS", "false").lower() == "true"
+LOG_PAYLOAD_SAMPLE_RATE = float(os.environ.get("LOG_PAYLOAD_SAMPLE_RATE", "1.0"))
+LOG_PAYLOAD_PREVIEW_CHARS = int(os.environ.get("LOG_PAYLOAD_PREVIEW_CHARS", "300"))
+# Upper bound on nodes visited when estimating a payload's size
+LOG_PAYLOAD_MAX_NODES = 2000
+
+
+class CloudLogBatchWorker:
+    """Drains a bounded queue of log entries and writes them to Cloud Logging in batches.
+
+    Callers only ever enqueue; all network writes happen on the worker thread,
+    so logging adds no network latency to the request path.
+    """
+
+    def __init__(self, client_factory, max_size: int = LOG_QUEUE_MAX_SIZE, policy: str = LOG_QUEUE_FULL_POLICY):
+        self._client_factory = client_factory
+        self._client = None
+        self._resource = None
+        self._queue: queue.Queue = queue.Queue(maxsize=max_size)
+        self._policy = policy
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = {"enqueued": 0, "written": 0, "dropped": 0, "delayed": 0, "failed": 0, "batches": 0, "max_delay_s": 0.0}
+        self._thread = threading.Thread(target=self._run, name="cloud-logging-batcher", daemon=True)
+        self._thread.start()
+
+    def _count(self, name: str, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def enqueue(self, log_name: str, entry: dict):
+        item = (time.monotonic(), log_name, entry)
+        try:
+            if self._policy == "block":
+                self._queue.put(item, timeout=LOG_QUEUE_BLOCK_TIMEOUT_S)
+            else:
+                self._queue.put_nowait(item)
+        except queue.Full:
+            if self._policy != "drop_oldest":
+                self._count("dropped")
+                return
+            try:
+                self._queue.get_nowait()
+                self._count("dropped")
+                self._queue.put_nowait(item)
+            except (queue.Empty, queue.Full):
+                self._count("dropped")
+                return
+        self._count("enqueued")
+
+    def _next_batch(self) -> list:
+        batch = []
+        deadline = time.monotonic() + LOG_FLUSH_INTERVAL_S
+        while len(batch) < LOG_BATCH_SIZE:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0 or (self._stop.is_set() and self._queue.empty()):
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _entry_fields(self, entry: dict) -> dict:
+        """Returns the LogEntry fields CloudLoggingHandler used to set: resource, labels, trace and source location."""
+        trace_id = entry["trace_id"]
+        trace_name = f"projects/{self._client.project}/traces/{trace_id}" if trace_id else None
+        return {
+            "severity": entry["severity"],
+            "source_location": entry["source_location"],
+            "resource": self._resource,
+            "labels": {**_resource_labels(self._resource, trace_name), "python_logger": entry["logger"]},
+            "trace": trace_name,
+            "span_id": entry["span_id"],
+            "trace_sampled": entry["trace_sampled"],
+        }
+
+    def _write(self, batch: list):
+        by_log_name = defaultdict(list)
+        for item in batch:
+            by_log_name[item[1]].append(item)
+        for log_name, items in by_log_name.items():
+            try:
+                cloud_batch = self._client.logger(log_name).batch()
+                for _, _, entry in items:
+                    cloud_batch.log_text(entry["message"], **self._entry_fields(entry))
+                cloud_batch.commit()
+            except Exception as e:
+                self._count("failed", len(items))
+                _worker_logger.warning(f"Cloud Logging batch write failed ({len(items)} entries): {e}")
+                continue
+            now = time.monotonic()
+            delays = [now - enqueued_at for enqueued_at, _, _ in items]
+            with self._lock:
+                self._stats["written"] += len(items)
+                self._stats["batches"] += 1
+                self._stats["delayed"] += sum(1 for d in delays if d > LOG_DELAY_WARN_S)
+                self._stats["max_delay_s"] = max(self._stats["max_delay_s"], *delays)
+
+    def _run(self):
+        try:
+            self._client = self._client_factory()
+            self._resource = detect_cloud_logging_resource(self._client)
+        except Exception as e:
+            # Stream handlers still log locally; queued entries are counted as failed and discarded
+            self._client = None
+            _worker_logger.warning(f"Cloud Logging client could not be initialized (e.g. no ADC), entries are not exported: {e}")
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if batch and self._client is None:
+                self._count("failed", len(batch))
+            elif batch:
+                self._write(batch)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "queued": self._queue.qsize()}
+
+    def shutdown(self, timeout_s: float = 5.0):
+        """Flushes queued entries and stops the worker, giving up after timeout_s."""
+        self._stop.set()
+        self._thread.join(timeout_s)
+        stats = self.stats()
+        if stats["dropped"] or stats["queued"] or stats["failed"]:
+            _worker_logger.warning(
+                f"Cloud Logging shutdown: {stats['dropped']} dropped, {stats['failed']} failed, "
+                f"{stats['queued']} unflushed, {stats['delayed']} delayed > {LOG_DELAY_WARN_S}s"
+            )
+
+
+class BatchingCloudLoggingHandler(logging.Handler):
+    """A non-blocking Cloud Logging handler backed by the shared CloudLogBatchWorker.
+
+    The worker, and with it the Cloud Logging client, is created by the first record emitted.
+    """
+
+    def __init__(self, name: str, worker: CloudLogBatchWorker | None = None):
+        super().__init__()
+        self._worker = worker
+        self._log_name = name
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            # The active span is only known on the emitting thread
+            trace_id, span_id, trace_sampled = _current_trace()
+            (self._worker or _get_worker()).enqueue(self._log_name, {
+                "message": self.format(record),
+                "severity": record.levelname,
+                "source_location": {"file": record.pathname, "line": str(record.lineno), "function": record.funcName},
+                "logger": record.name,
+                "trace_id": trace_id,
+                "span_id": span_id,
+                "trace_sampled": trace_sampled,
+            })
+        except Exception:
+            self.handleError(record)
+
+
+_worker: CloudLogBatchWorker | None = None
+_worker_lock = threading.Lock()
+
+
+def _get_worker() -> CloudLogBatchWorker:
+    global _worker
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                _worker = CloudLogBatchWorker(create_cloud_logging_client)
+                atexit.register(_worker.shutdown)
+    return _worker
+
+
+def logging_stats() -> dict:
+    """Returns the Cloud Logging queue counters (enqueued, written, dropped, delayed...)."""
+    return _worker.stats() if _worker else {}
+
+
+_preview_repr = reprlib.Repr()
+_preview_repr.maxlevel = 3
+_preview_repr.maxdict = 8
+_preview_repr.maxlist = 5
+_preview_repr.maxstring = 80
+_preview_repr.maxother = 80
+
+
+def _approx_size(payload) -> tuple[int, bool]:
+    """Estimates a payload's serialized size, visiting at most LOG_PAYLOAD_MAX_NODES nodes.
+
+    Returns (approx_bytes, complete); complete is False when the walk was cut short.
+    """
+    total, visited, stack = 0, 0, [payload]
+    while stack:
+        if visited >= LOG_PAYLOAD_MAX_NODES:
+            return total, False
+        node = stack.pop()
+        visited += 1
+        if isinstance(node, (str, bytes)):
+            total += len(node) + 2
+        elif isinstance(node, dict):
+            total += 2
+            budget = LOG_PAYLOAD_MAX_NODES - visited
+            for key, value in itertools.islice(node.items(), budget):
+                total += len(str(key)) + 4
+                stack.append(value)
+            if len(node) > budget:
+                return total, False
+        elif isinstance(node, (list, tuple)):
+            total += 2
+            budget = LOG_PAYLOAD_MAX_NODES - visited
+            stack.extend(node[:budget])
+            if len(node) > budget:
+                return total, False
+        else:
+            total += 8
+    return total, True
+
+
+def _row_counts(payload) -> dict:
+    """Finds row counts for data results inside a tool payload without copying them."""
+    counts = {}
+    items = payload if isinstance(payload, list) else [payload]
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        if "data_ref" in item:
+            counts["data_ref_rows"] = item["data_ref"].get("row_count")
+        data = item.get("data_retrieved")
+        if isinstance(data, list):
+            counts["data_rows"] = len(data)
+        elif isinstance(data, dict) and data:
+            first = next(iter(data.values()))
+            counts["data_rows"] = len(first) if isinstance(first, (list, dict)) else 1
+        if isinstance(item.get("tool_response"), list):
+            counts.update(_row_counts(item["tool_response"]))
+    return counts
+
+
+def summarize_payload(payload) -> dict:
+    """Returns a bounded summary of a tool or agent payload: type, keys, row counts, size and preview."""
+    summary = {"type": type(payload).__name__}
+    if isinstance(payload, dict):
+        summary["keys"] = list(payload)[:20]
+    elif isinstance(payload, list):
+        summary["items"] = len(payload)
+        summary["keys"] = sorted({key for item in payload if isinstance(item, dict) for key in item})[:20]
+    summary.update(_row_counts(payload))
+    size, complete = _approx_size(payload)
+    summary["approx_bytes"] = size if complete else f">={size}"
+    summary["preview"] = _preview_repr.repr(payload)[:LOG_PAYLOAD_PREVIEW_CHARS]
+    return summary
+
+
+def log_payload(logger: logging.Logger, label: str, payload, level: int = logging.INFO):
+    """Logs a tool or agent payload lazily.
+
+    Nothing is computed unless the level is enabled and the call is sampled. The
+    full payload is only rendered when LOG_FULL_PAYLOADS is set; otherwise a
+    bounded summary from summarize_payload is logged.
+
+    Args:
+        logger: The logger to write to.
+        label: A prefix identifying the payload.
+        payload: The tool response, agent output or other payload.
+        level: The logging level.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    if LOG_FULL_PAYLOADS:
+        # %-style args defer formatting to the handler
+        logger.log(level, "%s: %s", label, payload, stacklevel=2)
+        return
+    if LOG_PAYLOAD_SAMPLE_RATE < 1.0 and random.random() >= LOG_PAYLOAD_SAMPLE_RATE:
+        return
+    logger.log(level, "%s (summary): %s", label, summarize_payload(payload), stacklevel=2)
+
 
 def get_logger(name: str | None = None, level: int = LOG_LEVEL) -> logging.Logger:
     """
@@ -64,14 +415,9 @@ def get_logger(name: str | None = None, level: int = LOG_LEVEL) -> logging.Logge
 
     logger.setLevel(level)
 
-    if google_logging_available and client:
-        # Add Google Cloud Logging handler
-        handler = CloudLoggingHandler(
-            client,
-            name=name if name else "python_boilerplate_log",
-            transport=SyncTransport,
-        )
-        # setup_logging(handler) # This will exclusively use the Cloud handler
+    if google_logging_available:
+        # Add Google Cloud Logging handler; entries are written in batches off the request path
+        handler = BatchingCloudLoggingHandler(name=name if name else "python_boilerplate_log")
         logger.addHandler(handler)
 
         # Also add a stream handler for local visibility
@@ -90,10 +436,7 @@ def get_logger(name: str | None = None, level: int = LOG_LEVEL) -> logging.Logge
         stream_handler.setLevel(level)
         stream_handler.setFormatter(formatter)
         logger.addHandler(stream_handler)
-        if not google_logging_available:
-            logger.info("Google Cloud Logging client library not found or not configured. Using standard stream logger.")
-        elif not client:
-            logger.info("Google Cloud Logging client could not be initialized (e.g. no ADC). Using standard stream logger.")
+        logger.info("Google Cloud Logging client library not found or not configured. Using standard stream logger.")
 
     # Prevent log propagation to the root logger if this is a named logger
     # and you want to avoid duplicate messages if the root logger also has handlers.
@@ -0,0 +1,120 @@
+'''
+File: warmup.py
+Project: adk-data-analytics
+File Created: Sunday, 18th October 2026 11:02:37 pm
+-------------------------------------------------------------
+Copyright 2025 Google LLC. This software is provided as-is, without
+warranty or representation for any use or purpose. Your use of it is
+subject to your agreement with Google.
+Licensed under the Apache License, Version 2.0 (the 'License');
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an 'AS IS' BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from . import (
+    bq_executor,
+    ca_client_pool,
+    config_project,
+    data_agent_helper,
+    data_agent_tools,
+    metrics,
+    nl_sql_cache,
+)
+from .utils_google_logging import get_logger
+
+logger = get_logger(__name__)
+
+_step_seconds = metrics.gauge("startup_warmup_step_seconds", "Duration of each startup warm-up step.", ("step", "status"))
+
+
+def _import_client_libraries():
+    data_agent_helper.geminidataanalytics.load()
+    bq_executor.bigquery.load()
+
+
+def _connect_channels(timeout_s: float):
+    ca_client_pool.get_pool().connect(timeout_s)
+
+
+def _verify_data_agent(agent_id: str, timeout_s: float):
+    # Same lookup as ca_api_helper.get_data_agent; that module doubles as a CLI run with
+    # python -m, and steps can't import package modules while the package is importing
+    request = data_agent_helper.geminidataanalytics.GetDataAgentRequest(
+        name=f"projects/{config_project.PROJECT_ID}/locations/global/dataAgents/{agent_id}",
+    )
+    data_agent = ca_client_pool.get_data_agent_client().get_data_agent(request=request, timeout=timeout_s)
+    logger.info(f"Verified data agent {data_agent.name}.")
+
+
+def _load_context_files():
+    # The NL-to-SQL cache fingerprints each domain's context files on its first lookup
+    if config_project.NL_SQL_CACHE_ENABLED:
+        cache = nl_sql_cache.get_cache()
+        for agent_id in config_project.AGENT_ID_TO_CONFIG_DIR:
+            cache.context_fingerprint(agent_id)
+
+
+def warmup_steps(timeout_s: float) -> dict:
+    """Returns the warm-up steps by name; they only share lazily created, thread-safe singletons."""
+    steps = {
+        "imports": _import_client_libraries,
+        "credentials": ca_client_pool.get_credentials,
+        "ca_channels": lambda: _connect_channels(timeout_s),
+        "context_files": _load_context_files,
+        "tool_engine": lambda: data_agent_tools.get_engine().initialize(),
+    }
+    for agent_id in config_project.AGENT_ID_TO_CONFIG_DIR:
+        steps[f"data_agent {agent_id}"] = lambda agent_id=agent_id: _verify_data_agent(agent_id, timeout_s)
+    return steps
+
+
+def warm_up(timeout_s: float = config_project.STARTUP_WARMUP_TIMEOUT_S) -> dict[str, dict]:
+    """Runs every warm-up step concurrently and returns each step's status and duration.
+
+    Credential discovery, token minting, channel connects and data agent lookups
+    otherwise land on the first user request. Steps that fail or are still
+    running after timeout_s are reported and logged, never raised, so a slow
+    dependency delays readiness by at most timeout_s.
+    """
+    start = time.perf_counter()
+    report: dict[str, dict] = {}
+
+    def timed(name: str, step):
+        step_start = time.perf_counter()
+        try:
+            step()
+            result = {"status": "ok"}
+        except Exception as e:
+            result = {"status": "error", "error": str(e)}
+        report[name] = {**result, "seconds": round(time.perf_counter() - step_start, 3)}
+
+    steps = warmup_steps(timeout_s)
+    executor = ThreadPoolExecutor(max_workers=len(steps), thread_name_prefix="startup-warmup")
+    futures = [executor.submit(timed, name, step) for name, step in steps.items()]
+    wait(futures, timeout=timeout_s)
+    # Steps still running are left to finish in the background
+    executor.shutdown(wait=False)
+
+    # Steps still running keep writing to report, so the result is built from a snapshot
+    finished = dict(report)
+    results = {name: finished.get(name, {"status": "timeout", "seconds": timeout_s}) for name in steps}
+    for name, result in results.items():
+        _step_seconds.set(result["seconds"], step=name, status=result["status"])
+        if result["status"] == "ok":
+            logger.info(f"Warm-up step {name} took {result['seconds'] * 1000:.0f} ms.")
+        else:
+            logger.error(f"Warm-up step {name} {result['status']} after {result['seconds'] * 1000:.0f} ms: {result.get('error', '')}")
+    total_s = time.perf_counter() - start
+    failed = sum(result["status"] != "ok" for result in results.values())
+    _step_seconds.set(round(total_s, 3), step="total", status="degraded" if failed else "ok")
+    logger.info(f"Startup warm-up finished in {total_s * 1000:.0f} ms, {len(steps) - failed}/{len(steps)} step(s) ok.")
+    return results
@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+
+from src.agents import adaptive_limiter
+from src.agents.adaptive_limiter import AdaptiveLimiter, LimiterRejectedError
+
+
+class FakeClock:
+    """Stands in for the time module: monotonic() is set by hand and sleep() advances it."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(adaptive_limiter, "time", clock)
+    return clock
+
+
+def make_limiter(**overrides) -> AdaptiveLimiter:
+    settings = {
+        "rate_per_s": 100.0,
+        "burst": 100,
+        "initial_limit": 4,
+        "min_limit": 1,
+        "max_limit": 8,
+        "max_queue": 4,
+        "max_wait_s": 0.05,
+        "latency_threshold_s": 10.0,
+    }
+    return AdaptiveLimiter("test", **{**settings, **overrides})
+
+
+def test_window_grows_by_about_one_per_window_of_healthy_calls(clock):
+    limiter = make_limiter()
+    for _ in range(4):
+        limiter.acquire()
+        limiter.release(latency_s=1.0)
+
+    assert limiter.stats()["window"] == 4
+    limiter.acquire()
+    limiter.release(latency_s=1.0)
+    assert limiter.stats()["window"] == 5
+
+
+def test_slow_calls_halve_the_window_once_per_cooldown(clock):
+    limiter = make_limiter(initial_limit=8)
+    for _ in range(3):
+        limiter.acquire()
+    limiter.release(latency_s=30.0)
+    limiter.release(latency_s=30.0)
+    assert limiter.stats()["window"] == 4
+
+    clock.now += 1.0
+    limiter.release(latency_s=30.0)
+    assert limiter.stats()["window"] == 2
+    assert limiter.stats()["rate_per_s"] == 100.0
+
+
+def test_quota_errors_also_slow_the_token_bucket(clock):
+    limiter = make_limiter(min_limit=2)
+    for _ in range(2):
+        limiter.acquire()
+        limiter.release(latency_s=1.0, quota_exceeded=True)
+        clock.now += 1.0
+
+    stats = limiter.stats()
+    assert stats["window"] == 2
+    assert stats["rate_per_s"] == 25.0
+
+
+def test_full_queue_sheds(clock):
+    limiter = make_limiter(initial_limit=1, max_queue=0)
+    limiter.acquire()
+
+    with pytest.raises(LimiterRejectedError) as rejected:
+        limiter.acquire()
+    assert rejected.value.reason == "queue_full"
+
+
+def test_queue_timeout_sheds_and_leaves_the_queue(clock):
+    limiter = make_limiter(initial_limit=1)
+    limiter.acquire()
+
+    with pytest.raises(LimiterRejectedError) as rejected:
+        limiter.acquire()
+    assert rejected.value.reason == "queue_timeout"
+    assert limiter.stats()["queued"] == 0
+
+
+def test_rate_limited_call_is_shed_and_returns_its_slot(clock):
+    limiter = make_limiter(rate_per_s=1.0, burst=1, max_wait_s=0.5)
+    limiter.acquire()
+
+    with pytest.raises(LimiterRejectedError) as rejected:
+        limiter.acquire()
+    assert rejected.value.reason == "rate_limited"
+    assert limiter.stats()["in_flight"] == 1
+
+
+def test_token_wait_within_deadline_sleeps(clock):
+    limiter = make_limiter(rate_per_s=2.0, burst=1, max_wait_s=1.0)
+    limiter.acquire()
+    started = clock.now
+    limiter.acquire()
+
+    assert clock.now - started == pytest.approx(0.5)
+
+
+def test_release_hands_the_slot_to_a_queued_caller(clock):
+    limiter = make_limiter(initial_limit=1, max_wait_s=5.0)
+
+    async def main():
+        await limiter.acquire_async()
+        queued = asyncio.create_task(limiter.acquire_async())
+        await asyncio.sleep(0)
+        assert limiter.stats()["queued"] == 1
+        limiter.release(latency_s=1.0)
+        await asyncio.wait_for(queued, 1.0)
+
+    asyncio.run(main())
+    stats = limiter.stats()
+    assert (stats["in_flight"], stats["queued"]) == (1, 0)
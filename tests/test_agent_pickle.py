@@ -0,0 +1,22 @@
+import pickle
+
+import cloudpickle
+import pytest
+
+from src.agents import agent, data_agent_tools
+
+
+def test_root_agent_pickles():
+    # agent_engines.create pickles the agent with cloudpickle on deployment
+    restored = pickle.loads(cloudpickle.dumps(agent.root_agent))
+
+    assert restored.name == agent.root_agent.name
+
+
+@pytest.mark.parametrize("use_async", [True, False])
+def test_data_agent_tools_pickle(use_async):
+    tools = data_agent_tools.build_data_agent_tools(use_async=use_async)
+
+    for tool in tools.values():
+        restored = pickle.loads(cloudpickle.dumps(tool))
+        assert restored.name == tool.name
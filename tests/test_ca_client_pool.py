@@ -0,0 +1,49 @@
+import asyncio
+import threading
+import time
+
+from google.auth.credentials import AnonymousCredentials
+
+from src.agents import config_project
+from src.agents.ca_client_pool import DataChatClientPool
+
+
+def test_cold_async_client_resolves_credentials_off_the_event_loop(monkeypatch):
+    monkeypatch.setattr(config_project, "CA_API_INSECURE", True)
+    monkeypatch.setattr(config_project, "CA_API_ENDPOINT", "127.0.0.1:1")
+    pool = DataChatClientPool(size=1)
+    resolved_on = []
+
+    def slow_ensure_credentials():
+        if pool._credentials is not None:
+            return pool._credentials
+        # Stands in for google.auth.default() plus a token refresh
+        resolved_on.append(threading.current_thread())
+        time.sleep(0.2)
+        pool._credentials = AnonymousCredentials()
+        return pool._credentials
+
+    monkeypatch.setattr(pool, "_ensure_credentials", slow_ensure_credentials)
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticking = asyncio.create_task(ticker())
+        first = await pool.get_async_client()
+        second = await pool.get_async_client()
+        ticking.cancel()
+        return first, second, ticks
+
+    first, second, ticks = asyncio.run(main())
+
+    assert resolved_on and resolved_on[0] is not threading.main_thread()
+    assert len(resolved_on) == 1
+    assert ticks >= 5
+    assert first is second
+    pool.shutdown()
@@ -0,0 +1,92 @@
+import asyncio
+import gc
+
+import pytest
+from google.cloud import geminidataanalytics
+
+from src.agents import chat_stream
+
+AGENT_ID = "hedge-test-agent"
+
+
+def text_message(text: str) -> geminidataanalytics.Message:
+    return geminidataanalytics.Message(system_message=geminidataanalytics.SystemMessage(text=geminidataanalytics.TextMessage(parts=[text])))
+
+
+class FakeStream:
+    def __init__(self, messages, delay_s: float = 0.0, error: Exception | None = None):
+        self._messages = list(messages)
+        self._delay_s = delay_s
+        self._error = error
+        self.cancelled = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await asyncio.sleep(self._delay_s)
+        if self._error:
+            raise self._error
+        if not self._messages:
+            raise StopAsyncIteration
+        return self._messages.pop(0)
+
+    def cancel(self):
+        self.cancelled = True
+
+
+def opener(stream: FakeStream):
+    async def open_stream():
+        return stream
+    return open_stream
+
+
+def run_hedged(primary: FakeStream, hedge: FakeStream, hedge_delay_s: float = 0.01):
+    """Runs hedged_chat_async and returns (result or exception, unretrieved task exceptions)."""
+    unretrieved = []
+
+    async def main():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: unretrieved.append(context))
+        try:
+            return await chat_stream.hedged_chat_async(AGENT_ID, opener(primary), opener(hedge), hedge_delay_s, first_message_timeout_s=5)
+        except Exception as e:
+            return e
+        finally:
+            gc.collect()
+
+    return asyncio.run(main()), unretrieved
+
+
+@pytest.fixture(autouse=True)
+def fresh_tracker():
+    chat_stream._trackers.pop(AGENT_ID, None)
+
+
+def test_hedge_wins_when_primary_is_slow():
+    primary = FakeStream([text_message("slow")], delay_s=1.0)
+    hedge = FakeStream([text_message("fast")])
+
+    (label, responses), unretrieved = run_hedged(primary, hedge)
+
+    assert label == "hedge"
+    assert len(responses) == 1
+    assert primary.cancelled
+    assert not unretrieved
+
+
+def test_both_failing_raises_primary_error_and_retrieves_hedge_error():
+    primary = FakeStream([], delay_s=0.05, error=RuntimeError("primary"))
+    hedge = FakeStream([], error=RuntimeError("hedge"))
+
+    error, unretrieved = run_hedged(primary, hedge)
+
+    assert isinstance(error, RuntimeError) and str(error) == "primary"
+    assert not unretrieved
+
+
+def test_only_primary_attempts_feed_the_hedge_tracker():
+    run_hedged(FakeStream([text_message("slow")], delay_s=1.0), FakeStream([text_message("fast")]))
+    assert chat_stream._tracker(AGENT_ID).percentile(0.5, min_samples=1) is None
+
+    run_hedged(FakeStream([text_message("quick")]), FakeStream([text_message("unused")]), hedge_delay_s=1.0)
+    assert chat_stream._tracker(AGENT_ID).percentile(0.5, min_samples=1) is not None
@@ -0,0 +1,96 @@
+import pytest
+from google.api_core import exceptions as core_exceptions
+
+from src.agents import conversation_pool
+from src.agents.conversation_pool import WarmConversationPool
+
+AGENT_ID = "agent"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+class FakeChatClient:
+    def __init__(self):
+        self.created: list[str] = []
+        self.deleted: list[str] = []
+        self.fail_creates = False
+
+    def delete_conversation(self, name, timeout):
+        conversation_id = name.rsplit("/", 1)[-1]
+        self.deleted.append(conversation_id)
+        if conversation_id == self.created[-1]:
+            raise core_exceptions.NotFound("already gone")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(conversation_pool, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = FakeChatClient()
+
+    def create_conversation(_client, request, agent_id):
+        if client.fail_creates:
+            raise core_exceptions.ServiceUnavailable("down")
+        client.created.append(request.conversation_id)
+
+    monkeypatch.setattr(conversation_pool.ca_client_pool, "get_data_chat_client", lambda: client)
+    monkeypatch.setattr(conversation_pool.chat_stream, "create_conversation", create_conversation)
+    return client
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = WarmConversationPool([AGENT_ID], target_size=2, max_age_s=100, refill_interval_s=1)
+    monkeypatch.setattr(pool, "start", lambda: None)  # the tests drive refills themselves
+    return pool
+
+
+def test_idle_pool_deletes_expired_without_replacing(clock, client, pool):
+    pool._refill(AGENT_ID)
+    pool._refill(AGENT_ID)
+    assert len(client.created) == 2
+
+    clock.now = 101
+    pool._refill(AGENT_ID)
+    pool._delete_expired()
+
+    assert len(client.created) == 2
+    assert sorted(client.deleted) == sorted(client.created)
+    stats = pool.stats()[AGENT_ID]
+    assert (stats["available"], stats["expired"], stats["deleted"]) == (0, 2, 2)
+
+
+def test_claim_and_miss_trigger_refill(clock, client, pool):
+    pool._refill(AGENT_ID)
+    assert pool.claim(AGENT_ID) == client.created[0]
+    pool._refill(AGENT_ID)
+    assert len(client.created) == 3
+
+    clock.now = 101
+    assert pool.claim(AGENT_ID) is None
+    pool._refill(AGENT_ID)
+
+    stats = pool.stats()[AGENT_ID]
+    assert stats["available"] == 2
+    assert (stats["claimed"], stats["missed"], stats["expired"]) == (1, 1, 2)
+
+
+def test_failed_create_is_retried(clock, client, pool):
+    client.fail_creates = True
+    pool._refill(AGENT_ID)
+    client.fail_creates = False
+    pool._refill(AGENT_ID)
+
+    assert pool.stats()[AGENT_ID]["create_failures"] == 1
+    assert len(client.created) == 2
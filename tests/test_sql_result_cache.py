@@ -0,0 +1,65 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.agents import bq_executor, config_project, data_agent_tools, sql_result_cache
+from src.agents.cache_backends import MemoryCacheBackend
+from src.agents.sql_result_cache import SqlResultCache, StaticFreshnessProbe
+
+AGENT_ID = "agent"
+SQL = "SELECT drug, quantity FROM `project.patient_records.medication_inventory`"
+TABLE = "patient_records.medication_inventory"
+RESPONSES = [{"sql_generated": SQL}, {"data_retrieved": {"drug": ["a"], "quantity": [1]}}]
+
+
+def make_cache(probe: StaticFreshnessProbe) -> SqlResultCache:
+    # A negative staleness budget re-validates every entry on every get
+    return SqlResultCache(MemoryCacheBackend(100), probe, ttl_s=3600, max_staleness_s={}, default_max_staleness_s=-1)
+
+
+def test_unchanged_watermark_serves_entry():
+    probe = StaticFreshnessProbe({TABLE: "1"})
+    cache = make_cache(probe)
+    cache.put(AGENT_ID, SQL, RESPONSES, cache.watermarks(SQL))
+
+    assert cache.get(AGENT_ID, f"{SQL};\n") == RESPONSES
+    assert cache.stats()["hits"] == 1
+
+
+def test_write_during_query_invalidates_entry():
+    probe = StaticFreshnessProbe({TABLE: "1"})
+    cache = make_cache(probe)
+    watermarks = cache.watermarks(SQL)
+    probe.set_watermark(TABLE, "2")  # the table changes while the query runs
+    cache.put(AGENT_ID, SQL, RESPONSES, watermarks)
+
+    assert cache.get(AGENT_ID, SQL) is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_execute_cached_sql_probes_before_running(monkeypatch):
+    probe = StaticFreshnessProbe({TABLE: "1"})
+    cache = make_cache(probe)
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(config_project, "SQL_RESULT_CACHE_ENABLED", True)
+    monkeypatch.setattr(sql_result_cache, "_cache", cache)
+    monkeypatch.setattr(sql_result_cache, "_store_executor", executor)
+
+    def execute_sql(sql):
+        probe.set_watermark(TABLE, "2")
+        return RESPONSES
+
+    monkeypatch.setattr(bq_executor, "execute_sql", execute_sql)
+    assert bq_executor.execute_cached_sql(AGENT_ID, SQL) == RESPONSES
+    executor.shutdown(wait=True)
+
+    assert cache.stats()["stores"] == 1
+    assert cache.get(AGENT_ID, SQL) is None
+
+
+def test_sql_result_cache_requires_nl_sql_cache(monkeypatch):
+    agent_id = next(iter(config_project.AGENT_ID_TO_CONFIG_DIR))
+    monkeypatch.setattr(config_project, "DATA_AGENT_TOOL_POLICIES", {agent_id: {"nl_sql_cache": False, "sql_result_cache": True}})
+
+    with pytest.raises(ValueError, match="requires nl_sql_cache"):
+        data_agent_tools.load_domains()